@@ -1,7 +1,6 @@
-import os
 import logging
-import openai
 from dotenv import load_dotenv
+from models.backends import create_backend
 
 # 환경 변수 로드
 load_dotenv()
@@ -9,23 +8,21 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 class ContentAnalyzer:
-    def __init__(self):
+    def __init__(self, backend=None, api_key=None):
+        """ContentAnalyzer 초기화
+
+        Args:
+            backend: LLMBackend (기본값: LLM_BACKEND 환경 변수로 생성, 미설정 시 OpenAI)
+            api_key: OpenAI 백엔드를 선택한 경우 사용할 API 키 (기본값: OPENAI_API_KEY)
+        """
         try:
-            # 환경 변수에서 API 키 가져오기
-            api_key = os.getenv('OPENAI_API_KEY')
-            
-            # Vercel 환경 변수에서 API 키 가져오기 시도
-            if not api_key:
-                api_key = os.environ.get('OPENAI_API_KEY')
-            
-            if not api_key:
-                logger.error("OpenAI API 키를 찾을 수 없습니다.")
-                raise ValueError("OpenAI API 키가 환경 변수에 설정되지 않았습니다. OPENAI_API_KEY를 설정해주세요.")
-            
-            openai.api_key = api_key
-            logger.info("OpenAI API 키 설정 성공")
+            if backend is None:
+                # LLM_BACKEND/LLM_BASE_URL/LLM_MODEL 설정을 따르고, API 키는 OpenAI 백엔드에만 전달
+                backend = create_backend(api_key=api_key)
+            self.backend = backend
+            logger.info(f"LLM 백엔드 설정 성공: {backend.name} ({backend.model})")
         except Exception as e:
-            logger.error(f"OpenAI 설정 실패: {str(e)}")
+            logger.error(f"LLM 백엔드 설정 실패: {str(e)}")
             raise
 
     def analyze_content(self, content):
@@ -34,15 +31,10 @@ class ContentAnalyzer:
                 raise ValueError("분석할 컨텐츠가 없습니다.")
                 
             logger.info("컨텐츠 분석 시작")
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Instagram 컨텐츠를 분석하여 주요 내용, 감정, 주제를 추출하는 전문가입니다."},
-                    {"role": "user", "content": f"다음 Instagram 컨텐츠를 분석해주세요:\n\n{content}"}
-                ]
-            )
-            
-            analysis = response.choices[0].message['content']
+            analysis = self.backend.chat([
+                {"role": "system", "content": "Instagram 컨텐츠를 분석하여 주요 내용, 감정, 주제를 추출하는 전문가입니다."},
+                {"role": "user", "content": f"다음 Instagram 컨텐츠를 분석해주세요:\n\n{self._prompt_content(content)}"}
+            ])
             logger.info("컨텐츠 분석 완료")
             
             return {
@@ -56,4 +48,14 @@ class ContentAnalyzer:
                 "success": False,
                 "error": str(e),
                 "original_content": content
-            } 
\ No newline at end of file
+            } 
+
+    @staticmethod
+    def _prompt_content(content):
+        """프롬프트에 넣을 컨텐츠 (스크래핑 결과는 본문과 이미지 수만 사용)
+
+        미디어 URL, 단계별 시간, 전송량 같은 수집 정보는 분석에 필요 없고 토큰만 차지하므로 제외합니다.
+        """
+        if not isinstance(content, dict):
+            return content
+        return f"{content.get('text', '')}\n\n이미지 수: {content.get('image_count', 0)}"
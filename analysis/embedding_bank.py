@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORIES = [
+    "사람", "풍경", "음식", "동물", "제품", "예술작품",
+    "실내", "실외", "스포츠", "패션", "여행", "일상"
+]
+DEFAULT_TEMPLATE = "이 이미지는 {}를 보여줍니다"
+DEFAULT_CACHE_DIR = Path(os.getenv(
+    'CLIP_EMBEDDING_CACHE',
+    str(Path.home() / '.cache' / 'insta_analysis' / 'clip')
+))
+
+# 같은 프로세스의 ImageAnalyzer들이 공유하는 메모리 캐시
+_memory_cache: Dict[str, torch.Tensor] = {}
+_memory_cache_lock = threading.Lock()
+
+
+def safe_model_name(model_name: str) -> str:
+    """파일 이름에 사용할 수 있도록 바꾼 모델 이름"""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+
+
+def prompt_set_key(model_name: str, categories: Sequence[str], template: str) -> str:
+    """모델 이름과 프롬프트 집합으로 만든 캐시 키"""
+    digest = hashlib.sha256("\n".join([model_name, template, *categories]).encode('utf-8')).hexdigest()[:16]
+    return f"{safe_model_name(model_name)}-{digest}"
+
+
+class EmbeddingBank:
+    """카테고리 프롬프트의 정규화된 CLIP 텍스트 임베딩 저장소
+
+    모델 이름과 프롬프트 집합별로 한 번만 계산하고, 메모리와 디스크에 보관합니다.
+    """
+
+    def __init__(self, model_name: str, encode_text: Callable[[List[str]], torch.Tensor],
+                 cache_dir: Optional[Path] = None):
+        """
+        Args:
+            model_name: CLIP 모델 이름 (캐시 키에 포함)
+            encode_text: 프롬프트 목록을 받아 텍스트 임베딩을 반환하는 함수
+            cache_dir: 임베딩 파일을 저장할 디렉토리 (기본값: CLIP_EMBEDDING_CACHE)
+        """
+        self.model_name = model_name
+        self._encode_text = encode_text
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+
+    def get(self, categories: Optional[Sequence[str]] = None, template: str = DEFAULT_TEMPLATE) -> torch.Tensor:
+        """카테고리별 정규화된 텍스트 임베딩 ([카테고리 수, 차원], float32, CPU)
+
+        Args:
+            categories: 카테고리 목록 (기본값: DEFAULT_CATEGORIES)
+            template: 카테고리를 넣을 프롬프트 형식
+        """
+        categories = list(categories or DEFAULT_CATEGORIES)
+        key = prompt_set_key(self.model_name, categories, template)
+        with _memory_cache_lock:
+            features = _memory_cache.get(key)
+        if features is not None:
+            return features
+
+        path = self.cache_dir / f"{key}.pt"
+        features = self._load(path, categories, template)
+        if features is None:
+            features = self._compute(categories, template)
+            self._save(path, categories, template, features)
+
+        with _memory_cache_lock:
+            return _memory_cache.setdefault(key, features)
+
+    def _compute(self, categories: List[str], template: str) -> torch.Tensor:
+        logger.info(f"카테고리 텍스트 임베딩 계산: {self.model_name}, {len(categories)}개")
+        with torch.no_grad():
+            features = self._encode_text([template.format(category) for category in categories])
+        features = features.float().cpu()
+        return features / features.norm(dim=-1, keepdim=True)
+
+    def _load(self, path: Path, categories: List[str], template: str) -> Optional[torch.Tensor]:
+        try:
+            data = torch.load(path, map_location='cpu')
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"카테고리 임베딩 파일을 읽지 못해 다시 계산합니다: {path} ({str(e)})")
+            return None
+        # 해시 충돌이나 다른 형식의 파일을 잘못 사용하지 않도록 내용 확인
+        if data.get('model_name') != self.model_name or data.get('categories') != categories \
+                or data.get('template') != template:
+            return None
+        return data['features']
+
+    def _save(self, path: Path, categories: List[str], template: str, features: torch.Tensor) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.part', delete=False) as f:
+                torch.save({
+                    'model_name': self.model_name,
+                    'template': template,
+                    'categories': categories,
+                    'features': features,
+                }, f)
+            os.replace(f.name, path)
+        except OSError as e:
+            logger.warning(f"카테고리 임베딩 저장 실패: {str(e)}")
@@ -1,19 +1,64 @@
+import io
 import logging
-from typing import List, Optional
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Iterable, List, NamedTuple, Optional, Tuple
 from pathlib import Path
 import torch
 import clip
 from PIL import Image
 import cv2
 import numpy as np
+from analysis.embedding_bank import DEFAULT_CATEGORIES, DEFAULT_TEMPLATE, EmbeddingBank
+from analysis.image_cache import DEFAULT_IMAGE_CACHE_DIR, content_key, get_shared_image_cache
+from analysis.video_frames import KEYFRAME_MIN_DISTANCE, KEYFRAME_SAMPLE_INTERVAL, MAX_KEYFRAMES, KeyframeSelector
 
 logger = logging.getLogger(__name__)
 
+IMAGE_BATCH_SIZE = 16
+# 이미지 디코딩/전처리 스레드 수 (PIL 디코딩은 GIL을 해제하므로 스레드로 병렬화)
+PREPROCESS_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class _Prepared(NamedTuple):
+    """인코딩 준비가 끝난 이미지 (캐시 적중 시 features, 아니면 전처리된 image)"""
+    key: Optional[str]
+    image: Optional[torch.Tensor] = None
+    features: Optional[torch.Tensor] = None
+
 class ImageAnalyzer:
-    def __init__(self):
-        """ImageAnalyzer 초기화"""
+    def __init__(self, categories: Optional[List[str]] = None, template: str = DEFAULT_TEMPLATE,
+                 model_name: str = "ViT-B/32", cache_dir: Optional[Path] = None,
+                 image_cache_dir: Optional[Path] = None):
+        """ImageAnalyzer 초기화
+
+        Args:
+            categories: 이미지 분류 카테고리 (기본값: DEFAULT_CATEGORIES)
+            template: 카테고리 프롬프트 형식
+            model_name: CLIP 모델 이름
+            cache_dir: 카테고리 텍스트 임베딩 캐시 디렉토리
+            image_cache_dir: 이미지 임베딩 캐시 디렉토리 (기본값: IMAGE_EMBEDDING_CACHE, 없으면 사용 안 함)
+        """
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model, self.preprocess = clip.load("ViT-B/32", device=self.device)
+        self.model_name = model_name
+        self.model, self.preprocess = clip.load(model_name, device=self.device)
+        self.embedding_bank = EmbeddingBank(
+            model_name,
+            lambda prompts: self.model.encode_text(clip.tokenize(prompts).to(self.device)),
+            cache_dir
+        )
+        self.set_categories(categories or DEFAULT_CATEGORIES, template)
+        image_cache_dir = image_cache_dir or DEFAULT_IMAGE_CACHE_DIR
+        self.image_cache = get_shared_image_cache(image_cache_dir, model_name) if image_cache_dir else None
+        # analyze_video 누적 키프레임 통계 (seek/grab: 해당 방법으로 샘플링한 영상 수)
+        self.keyframe_stats = {'videos': 0, 'sampled': 0, 'selected': 0, 'skipped': 0, 'capped': 0,
+                               'seek': 0, 'grab': 0}
+    
+    def set_categories(self, categories: List[str], template: str = DEFAULT_TEMPLATE) -> None:
+        """분류 카테고리 변경 (텍스트 임베딩은 캐시에서 불러오거나 한 번만 계산)"""
+        self.categories = list(categories)
+        self.category_features = self.embedding_bank.get(self.categories, template).to(self.device)
     
     def analyze_image(self, image_path: Path) -> str:
         """이미지 분석 및 설명 생성
@@ -25,82 +70,162 @@ class ImageAnalyzer:
             이미지 설명 텍스트
         """
         try:
-            image = Image.open(image_path)
-            image_input = self.preprocess(image).unsqueeze(0).to(self.device)
-            
-            # 미리 정의된 카테고리로 이미지 분류
-            categories = [
-                "사람", "풍경", "음식", "동물", "제품", "예술작품",
-                "실내", "실외", "스포츠", "패션", "여행", "일상"
-            ]
-            
-            text_inputs = torch.cat([
-                clip.tokenize(f"이 이미지는 {category}를 보여줍니다") for category in categories
-            ]).to(self.device)
-            
-            with torch.no_grad():
-                image_features = self.model.encode_image(image_input)
-                text_features = self.model.encode_text(text_inputs)
-                
-                similarity = (100.0 * image_features @ text_features.T).softmax(dim=-1)
-                values, indices = similarity[0].topk(3)
-            
-            top_categories = [categories[idx] for idx in indices]
-            description = f"이 이미지는 {', '.join(top_categories)}와 관련된 내용을 보여줍니다."
+            prepared = self._load_image(image_path)
+            if prepared is None:
+                return "이미지 분석에 실패했습니다."
             
-            return description
+            return self._describe(self._image_features([prepared]))[0]
             
         except Exception as e:
             logger.error(f"이미지 분석 중 에러 발생: {str(e)}")
             return "이미지 분석에 실패했습니다."
     
-    def analyze_video(self, video_path: Path, sample_interval: int = 30) -> List[str]:
+    def analyze_images(self, image_paths: List[Path], batch_size: int = IMAGE_BATCH_SIZE,
+                       workers: int = PREPROCESS_WORKERS) -> List[str]:
+        """여러 이미지를 배치로 분석
+
+        디코딩과 전처리는 스레드 풀에서 다음 배치를 미리 준비하고,
+        인코딩은 배치마다 encode_image 한 번으로 처리합니다.
+
+        Args:
+            image_paths: 이미지 파일 경로 목록
+            batch_size: encode_image 한 번에 넣을 이미지 수
+            workers: 디코딩/전처리 스레드 수
+
+        Returns:
+            입력 순서와 같은 순서의 이미지 설명 목록 (실패한 이미지는 실패 메시지)
+        """
+        return self._encode_in_batches(image_paths, self._load_image, batch_size, workers)
+    
+    def _encode_in_batches(self, items: Iterable[Any], load: Callable[[Any], Optional[_Prepared]],
+                           batch_size: int, workers: int) -> List[str]:
+        """items를 스레드 풀에서 load로 전처리하고 batch_size개씩 인코딩
+
+        전처리는 인코딩보다 최대 한 배치만 앞서 진행하므로 긴 입력에서도 메모리 사용량이 일정합니다.
+        """
+        descriptions: List[str] = []
+        pending: Deque[Future] = deque()
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for item in items:
+                pending.append(executor.submit(load, item))
+                descriptions.append("이미지 분석에 실패했습니다.")
+                # 다음 배치를 전처리하는 동안 앞 배치를 인코딩
+                if len(pending) >= 2 * batch_size:
+                    start = len(descriptions) - len(pending)
+                    self._encode_batch([pending.popleft() for _ in range(batch_size)], start, descriptions)
+            while pending:
+                start = len(descriptions) - len(pending)
+                self._encode_batch([pending.popleft() for _ in range(min(batch_size, len(pending)))], start, descriptions)
+        
+        return descriptions
+    
+    def _encode_batch(self, futures: List[Future], start: int, descriptions: List[str]) -> None:
+        loaded = [(start + offset, future.result()) for offset, future in enumerate(futures)]
+        loaded = [(i, prepared) for i, prepared in loaded if prepared is not None]
+        if not loaded:
+            return
+        try:
+            image_features = self._image_features([prepared for _, prepared in loaded])
+            for (i, _), description in zip(loaded, self._describe(image_features)):
+                descriptions[i] = description
+        except Exception as e:
+            logger.error(f"이미지 배치 분석 중 에러 발생 ({len(loaded)}개): {str(e)}")
+    
+    def _image_features(self, prepared: List[_Prepared]) -> torch.Tensor:
+        """캐시에 없는 이미지만 encode_image 한 번으로 인코딩하여 [N, 차원] 임베딩 반환"""
+        features = [item.features for item in prepared]
+        missing = [i for i, item in enumerate(prepared) if item.features is None]
+        if missing:
+            image_input = torch.stack([prepared[i].image for i in missing]).to(self.device)
+            with torch.no_grad():
+                encoded = self.model.encode_image(image_input).float().cpu()
+            for i, row in zip(missing, encoded):
+                features[i] = row
+            if self.image_cache is not None:
+                self.image_cache.put([prepared[i].key for i in missing], encoded.numpy())
+        return torch.stack(features).to(self.device)
+    
+    def _cached_features(self, data: bytes) -> Tuple[Optional[str], Optional[torch.Tensor]]:
+        """이미지 내용 키와 캐시된 임베딩 (캐시를 사용하지 않거나 없으면 None)"""
+        if self.image_cache is None:
+            return None, None
+        key = content_key(data)
+        features = self.image_cache.get(key)
+        return key, torch.from_numpy(features) if features is not None else None
+    
+    def _load_image(self, image_path: Path) -> Optional[_Prepared]:
+        try:
+            data = Path(image_path).read_bytes()
+            key, features = self._cached_features(data)
+            if features is not None:
+                return _Prepared(key, features=features)
+            with Image.open(io.BytesIO(data)) as image:
+                return _Prepared(key, image=self.preprocess(image))
+        except Exception as e:
+            logger.error(f"이미지 로드 중 에러 발생 ({image_path}): {str(e)}")
+            return None
+    
+    def _describe(self, image_features: torch.Tensor) -> List[str]:
+        """이미지 임베딩을 카테고리 텍스트 임베딩과 비교하여 상위 3개 카테고리로 설명"""
+        image_features = image_features.float()
+        image_features = image_features / image_features.norm(dim=-1, keepdim=True)
+        similarity = (100.0 * image_features @ self.category_features.T).softmax(dim=-1)
+        indices = similarity.topk(min(3, len(self.categories)), dim=-1).indices.tolist()
+        
+        return [
+            f"이 이미지는 {', '.join(self.categories[idx] for idx in row)}와 관련된 내용을 보여줍니다."
+            for row in indices
+        ]
+    
+    def analyze_video(self, video_path: Path, sample_interval: float = KEYFRAME_SAMPLE_INTERVAL,
+                      batch_size: int = IMAGE_BATCH_SIZE, max_frames: Optional[int] = MAX_KEYFRAMES,
+                      min_distance: int = KEYFRAME_MIN_DISTANCE) -> List[str]:
         """비디오 분석 및 설명 생성
 
+        sample_interval마다 뽑은 후보 프레임 중 장면이 바뀐 프레임만 골라
+        임시 파일 없이 메모리에서 전처리하여 배치로 인코딩합니다.
+        기본값은 앞에서부터 새 장면 최대 MAX_KEYFRAMES개만 인코딩하므로,
+        장면이 많은 영상을 끝까지 보려면 max_frames를 늘리세요 (키프레임마다 CLIP 인코딩 한 번).
+
         Args:
             video_path: 비디오 파일 경로
-            sample_interval: 프레임 샘플링 간격 (초)
+            sample_interval: 후보 프레임 샘플링 간격 (초)
+            batch_size: encode_image 한 번에 넣을 프레임 수
+            max_frames: 분석할 최대 키프레임 수 (None이면 제한 없음)
+            min_distance: 새 장면으로 볼 최소 dHash 해밍 거리 (0이면 고정 간격 샘플링)
 
         Returns:
-            프레임별 설명 리스트
+            키프레임별 설명 리스트
         """
+        selector = KeyframeSelector(sample_interval, max_frames, min_distance)
         try:
-            cap = cv2.VideoCapture(str(video_path))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_interval = int(fps * sample_interval)
-            
-            descriptions = []
-            frame_count = 0
-            
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                if frame_count % frame_interval == 0:
-                    # OpenCV BGR을 RGB로 변환
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    image = Image.fromarray(frame_rgb)
-                    
-                    # 임시 파일로 저장
-                    temp_path = Path("temp_frame.jpg")
-                    image.save(temp_path)
-                    
-                    # 프레임 분석
-                    description = self.analyze_image(temp_path)
-                    descriptions.append(description)
-                    
-                    # 임시 파일 삭제
-                    temp_path.unlink()
-                
-                frame_count += 1
-            
-            cap.release()
-            return descriptions
+            return self._encode_in_batches(selector.frames(video_path), self._preprocess_frame,
+                                           batch_size, PREPROCESS_WORKERS)
             
         except Exception as e:
             logger.error(f"비디오 분석 중 에러 발생: {str(e)}")
             return ["비디오 분석에 실패했습니다."]
+        finally:
+            self.keyframe_stats['videos'] += 1
+            for key, value in selector.stats.items():
+                if key == 'mode':
+                    if value is not None:
+                        self.keyframe_stats[value] += 1
+                else:
+                    self.keyframe_stats[key] += int(value)
+    
+    def _preprocess_frame(self, frame: np.ndarray) -> Optional[_Prepared]:
+        try:
+            # 캐시를 사용할 때만 프레임 전체를 복사하여 해시
+            key, features = self._cached_features(frame.tobytes()) if self.image_cache is not None else (None, None)
+            if features is not None:
+                return _Prepared(key, features=features)
+            # OpenCV BGR을 RGB로 변환
+            return _Prepared(key, image=self.preprocess(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))))
+        except Exception as e:
+            logger.error(f"프레임 전처리 중 에러 발생: {str(e)}")
+            return None
     
     def get_content_description(self, media_path: Path) -> Optional[str]:
         """미디어 파일 분석 및 설명 생성
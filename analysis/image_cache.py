@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from analysis.embedding_bank import safe_model_name
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 설정하지 않으면 이미지 임베딩 캐시를 사용하지 않음
+DEFAULT_IMAGE_CACHE_DIR = os.getenv('IMAGE_EMBEDDING_CACHE') or None
+
+_shared_caches: Dict[Tuple[str, str], 'ImageEmbeddingCache'] = {}
+_shared_caches_lock = threading.Lock()
+
+
+def content_key(data: bytes) -> str:
+    """이미지 내용(바이트)의 sha256 키"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_shared_image_cache(cache_dir: Path, model_name: str) -> 'ImageEmbeddingCache':
+    """디렉토리와 모델별로 프로세스에서 공유하는 이미지 임베딩 캐시 반환"""
+    key = (str(Path(cache_dir).resolve()), model_name)
+    with _shared_caches_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = _shared_caches[key] = ImageEmbeddingCache(cache_dir, model_name)
+        return cache
+
+
+class ImageEmbeddingCache:
+    """이미지 내용 해시를 키로 하는 CLIP 이미지 임베딩 저장소
+
+    정규화된 임베딩을 float16 행으로 embeddings.f16 파일 끝에 추가하고,
+    index.txt에 같은 순서로 sha256 키를 한 줄씩 기록합니다. 조회는 메모리 맵으로
+    필요한 행만 읽으므로 모델을 거치지 않고, 저장소 전체를 메모리에 올리지 않습니다.
+
+    쓰기는 파일 잠금(lock) 안에서 다른 인스턴스나 프로세스가 추가한 행을 먼저 읽어 들이고
+    인덱스와 데이터의 행 수를 맞춘 뒤 추가합니다. 같은 프로세스에서는
+    get_shared_image_cache()로 인스턴스를 공유하세요.
+    """
+
+    def __init__(self, cache_dir: Path, model_name: str):
+        """
+        Args:
+            cache_dir: 저장소 상위 디렉토리 (모델별 하위 디렉토리 사용)
+            model_name: CLIP 모델 이름
+        """
+        self.model_name = model_name
+        self.path = Path(cache_dir) / safe_model_name(model_name)
+        self._data_path = self.path / 'embeddings.f16'
+        self._index_path = self.path / 'index.txt'
+        self._meta_path = self.path / 'meta.json'
+        self._lock_path = self.path / 'lock'
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._count = 0
+        # index.txt에서 이미 읽은 바이트 수
+        self._index_offset = 0
+        self._matrix: Optional[np.memmap] = None
+        self._disabled = False
+        self.dim: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        if self._meta_path.exists():
+            try:
+                with self._file_lock():
+                    self._sync()
+            except OSError as e:
+                logger.warning(f"이미지 임베딩 캐시를 읽지 못해 사용하지 않습니다: {self.path} ({str(e)})")
+                self._disabled = True
+
+    @contextmanager
+    def _file_lock(self):
+        """다른 프로세스와 쓰기가 겹치지 않도록 잠금 파일을 배타적으로 잠금"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _sync(self) -> None:
+        """디스크의 메타데이터와 새로 추가된 행을 읽어 들임 (파일 잠금 안에서 호출)"""
+        if self.dim is None:
+            try:
+                meta = json.loads(self._meta_path.read_text(encoding='utf-8'))
+                dim = int(meta['dim'])
+            except FileNotFoundError:
+                return
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"이미지 임베딩 캐시 메타데이터가 잘못되어 사용하지 않습니다: {self.path} ({str(e)})")
+                self._disabled = True
+                return
+            if meta.get('model_name') != self.model_name:
+                logger.warning(f"이미지 임베딩 캐시의 모델이 다릅니다: {meta.get('model_name')} != {self.model_name}")
+                self._disabled = True
+                return
+            self.dim = dim
+
+        # 마지막 줄바꿈 뒤는 쓰다 만 키이므로 완성된 줄만 읽음
+        keys: List[str] = []
+        if self._index_path.exists():
+            with open(self._index_path, 'rb') as f:
+                f.seek(self._index_offset)
+                pending = f.read()
+            complete = pending[:pending.rfind(b'\n') + 1]
+            keys = complete.decode('utf-8').split('\n')[:-1]
+            self._index_offset += len(complete)
+
+        # 인덱스와 데이터가 모두 기록된 행까지만 사용하고, 쓰다 중단된 나머지는 잘라냄
+        count = self._count + len(keys)
+        stored = self._data_path.stat().st_size // self._row_bytes if self._data_path.exists() else 0
+        if stored < count:
+            logger.warning(f"이미지 임베딩 캐시 인덱스가 데이터보다 깁니다. {stored}행까지만 사용합니다: {self.path}")
+            keys = keys[:max(0, stored - self._count)]
+            count = self._count + len(keys)
+            valid = ''.join(f"{key}\n" for key in [*self._keys(), *keys]).encode('utf-8')
+            self._index_path.write_bytes(valid)
+            self._index_offset = len(valid)
+        if self._data_path.exists() and self._data_path.stat().st_size != count * self._row_bytes:
+            os.truncate(self._data_path, count * self._row_bytes)
+
+        for row, key in enumerate(keys, start=self._count):
+            self._rows.setdefault(key, row)
+        if count != self._count:
+            self._count = count
+            self._remap(count)
+
+    def _keys(self) -> List[str]:
+        """이미 읽은 행 순서대로의 키 (중복 키는 첫 행만 조회에 사용)"""
+        with open(self._index_path, 'rb') as f:
+            return f.read(self._index_offset).decode('utf-8').split('\n')[:-1]
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dim * np.dtype(np.float16).itemsize
+
+    def _remap(self, rows: int) -> None:
+        self._matrix = np.memmap(self._data_path, dtype=np.float16, mode='r', shape=(rows, self.dim)) if rows else None
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """키에 해당하는 임베딩 (float32), 없으면 None"""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return np.asarray(self._matrix[row], dtype=np.float32)
+
+    def put(self, keys: Sequence[str], embeddings: np.ndarray) -> None:
+        """임베딩을 정규화하여 저장 (이미 있는 키는 건너뜀)
+
+        Args:
+            keys: 이미지 내용 키 목록
+            embeddings: [len(keys), 차원] 임베딩
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        embeddings = embeddings / np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        with self._lock:
+            if self._disabled or all(key in self._rows for key in keys):
+                return
+            try:
+                with self._file_lock():
+                    self._append(keys, embeddings)
+            except OSError as e:
+                logger.warning(f"이미지 임베딩 캐시 저장 실패: {str(e)}")
+
+    def _append(self, keys: Sequence[str], embeddings: np.ndarray) -> None:
+        self._sync()
+        if self._disabled:
+            return
+        if self.dim is None:
+            self.dim = embeddings.shape[-1]
+            # 메타데이터 없이 남은 파일은 형식을 알 수 없으므로 비우고 시작
+            self._data_path.write_bytes(b'')
+            self._index_path.write_bytes(b'')
+            self._meta_path.write_text(json.dumps({'model_name': self.model_name, 'dim': self.dim}),
+                                       encoding='utf-8')
+        elif embeddings.shape[-1] != self.dim:
+            logger.warning(f"이미지 임베딩 차원이 캐시와 다릅니다: {embeddings.shape[-1]} != {self.dim}")
+            return
+
+        # 다른 인스턴스가 그 사이에 추가한 키도 건너뜀
+        new_keys: List[str] = []
+        new_rows = []
+        for key, embedding in zip(keys, embeddings):
+            if key not in self._rows and key not in new_keys:
+                new_keys.append(key)
+                new_rows.append(embedding)
+        if not new_keys:
+            return
+
+        # _sync()에서 인덱스와 데이터 행 수를 맞췄으므로 두 파일 모두 끝에 추가
+        # 데이터를 먼저 쓰고 인덱스를 기록하여 인덱스가 없는 데이터만 남을 수 있도록 함
+        with open(self._data_path, 'ab') as f:
+            f.write(np.stack(new_rows).astype(np.float16).tobytes())
+        entries = ''.join(f"{key}\n" for key in new_keys).encode('utf-8')
+        with open(self._index_path, 'ab') as f:
+            f.write(entries)
+        self._index_offset += len(entries)
+        for key in new_keys:
+            self._rows[key] = self._count
+            self._count += 1
+        self._remap(self._count)
+
+    def stats(self) -> Dict[str, float]:
+        """조회 적중률과 저장소 크기"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._rows),
+                'store_bytes': self._count * self._row_bytes if self.dim else 0,
+            }
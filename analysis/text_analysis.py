@@ -1,13 +1,20 @@
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List
 from models.llama_model import LlamaAnalyzer
 
 logger = logging.getLogger(__name__)
 
 class TextAnalyzer:
-    def __init__(self):
-        """TextAnalyzer 초기화"""
-        self.llama = LlamaAnalyzer()
+    def __init__(self, combined: bool = False, label_scoring: bool = False, prefix_cache_size: int = 0):
+        """TextAnalyzer 초기화
+
+        Args:
+            combined: True이면 키워드/요약/감정을 한 번의 생성으로 분석
+            label_scoring: True이면 감정과 관련성을 생성 대신 레이블 점수 비교로 분류
+            prefix_cache_size: 0보다 크면 본문 prefix의 KV 캐시를 작업 간에 재사용 (보관할 본문 수)
+        """
+        self.llama = LlamaAnalyzer(label_scoring=label_scoring, prefix_cache_size=prefix_cache_size)
+        self.combined = combined
     
     def analyze_text(self, text: str) -> Dict[str, Any]:
         """텍스트 분석 수행
@@ -22,6 +29,9 @@ class TextAnalyzer:
             - sentiment: 감정 분석 결과
         """
         try:
+            if self.combined:
+                return self.llama.analyze_all(text)
+            
             # 키워드 추출
             keywords = self.llama.extract_keywords(text)
             
@@ -45,6 +55,17 @@ class TextAnalyzer:
                 "sentiment": "알 수 없음"
             }
     
+    def stream_summary(self, text: str) -> Iterator[str]:
+        """요약을 생성되는 대로 텍스트 조각 단위로 반환
+
+        Args:
+            text: 요약할 텍스트
+
+        Yields:
+            요약 텍스트 조각
+        """
+        return self.llama.stream_summary(text)
+    
     def analyze_content_relevance(self, text: str, image_description: str) -> str:
         """텍스트와 이미지 설명 간의 관련성 분석
 
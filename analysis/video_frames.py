@@ -0,0 +1,182 @@
+import logging
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# FPS 정보가 없는 비디오에 사용할 값
+DEFAULT_FPS = 30.0
+# 샘플 사이 프레임을 건너뛰는 방법: auto (처음 샘플에서 두 방법의 시간을 재어 선택), seek, grab
+SAMPLE_MODES = ('auto', 'seek', 'grab')
+
+# 키프레임 후보를 뽑는 간격 (초)
+KEYFRAME_SAMPLE_INTERVAL = 1.0
+# 영상 하나에서 CLIP으로 보낼 최대 키프레임 수
+# 이전 기본값(30초 간격 고정 샘플링)이 일반적인 릴스(90초 이하)에서 인코딩하던 1-3개와 비슷한 비용으로 유지
+# 후보는 1초마다 뽑지만 dHash만 계산하므로 CLIP 비용은 이 값과 장면 수로 정해짐
+MAX_KEYFRAMES = 3
+# dHash(64비트) 해밍 거리가 이보다 작으면 이미 고른 프레임과 같은 장면으로 간주
+KEYFRAME_MIN_DISTANCE = 10
+
+
+class FrameSampler:
+    """비디오에서 sample_interval초마다 프레임 하나를 BGR 배열로 반환하는 반복자
+
+    샘플 사이의 프레임은 grab()으로 색 변환 없이 건너뛰거나 프레임 위치로 탐색(seek)합니다.
+    grab은 건너뛰는 모든 프레임을 디코딩하고, 탐색은 직전 키프레임부터 디코딩하므로
+    어느 쪽이 빠른지는 간격과 코덱의 키프레임 간격에 따라 다릅니다. auto 모드에서는
+    두 번째와 세 번째 샘플을 각각 grab과 탐색으로 가져와 걸린 시간을 비교하고,
+    나머지 샘플에는 더 빠른 방법을 사용합니다.
+
+    반복이 끝나면 mode는 실제로 사용한 방법('seek' 또는 'grab'),
+    timings는 방법별로 측정한 샘플 하나당 시간(초)입니다.
+    """
+
+    def __init__(self, video_path: Path, sample_interval: float, mode: str = 'auto'):
+        """
+        Args:
+            video_path: 비디오 파일 경로
+            sample_interval: 샘플링 간격 (초)
+            mode: 'auto', 'seek', 'grab'
+        """
+        if mode not in SAMPLE_MODES:
+            raise ValueError(f"지원하지 않는 샘플링 모드: {mode} (사용 가능: {', '.join(SAMPLE_MODES)})")
+        self.video_path = video_path
+        self.sample_interval = sample_interval
+        self.mode = mode
+        self.timings: Dict[str, Optional[float]] = {'seek': None, 'grab': None}
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        cap = cv2.VideoCapture(str(self.video_path))
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"비디오를 열 수 없습니다: {self.video_path}")
+
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            if not fps or math.isnan(fps) or fps <= 0:
+                fps = DEFAULT_FPS
+            frame_interval = max(1, int(fps * self.sample_interval))
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            # 탐색하려면 전체 프레임 수가 필요하고, 간격이 1프레임이면 건너뛸 프레임이 없음
+            if total_frames <= 0 or frame_interval == 1:
+                self.mode = 'grab'
+
+            position = 0
+            ok, frame = cap.read()
+            while ok:
+                yield frame
+
+                position += frame_interval
+                if total_frames and position >= total_frames:
+                    break
+                method = self.mode
+                if method == 'auto':
+                    method = 'grab' if self.timings['grab'] is None else 'seek'
+
+                started = time.perf_counter()
+                if method == 'seek' and not cap.set(cv2.CAP_PROP_POS_FRAMES, position):
+                    # 탐색을 지원하지 않는 스트림은 grab으로 대체
+                    logger.debug(f"프레임 탐색 실패, grab으로 건너뜀: {self.video_path}")
+                    self.mode = method = 'grab'
+                if method == 'grab':
+                    ok = all(cap.grab() for _ in range(frame_interval - 1))
+                if ok:
+                    ok, frame = cap.read()
+
+                if ok and self.mode == 'auto':
+                    self.timings[method] = time.perf_counter() - started
+                    if self.timings['seek'] is not None:
+                        self.mode = 'seek' if self.timings['seek'] < self.timings['grab'] else 'grab'
+                        logger.debug(f"프레임 샘플링 방법 선택: {self.mode} (seek {self.timings['seek'] * 1000:.1f}ms, "
+                                     f"grab {self.timings['grab'] * 1000:.1f}ms)")
+        finally:
+            cap.release()
+            # 비교 전에 영상이 끝났으면 사용한 방법으로 기록
+            if self.mode == 'auto':
+                self.mode = 'grab'
+
+
+def sample_frames(video_path: Path, sample_interval: float, mode: str = 'auto') -> Iterator[np.ndarray]:
+    """비디오에서 sample_interval초마다 프레임 하나를 BGR 배열로 반환 (FrameSampler 참고)
+
+    Args:
+        video_path: 비디오 파일 경로
+        sample_interval: 샘플링 간격 (초)
+        mode: 'auto', 'seek', 'grab'
+    """
+    return iter(FrameSampler(video_path, sample_interval, mode))
+
+
+def dhash(frame: np.ndarray, hash_size: int = 8) -> int:
+    """BGR 프레임의 difference hash (hash_size * hash_size 비트)
+
+    프레임을 (hash_size + 1) x hash_size 흑백 이미지로 줄인 뒤
+    가로로 이웃한 픽셀의 밝기 증감을 비트로 기록합니다.
+    """
+    # 색 변환 전에 먼저 축소하여 전체 해상도 변환 비용을 피함
+    small = cv2.resize(frame, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class KeyframeSelector:
+    """일정 간격으로 뽑은 후보 프레임 중 시각적으로 다른 프레임만 고르는 선택기
+
+    후보마다 dHash를 계산하고, 이미 고른 모든 키프레임과의 해밍 거리가
+    min_distance 이상일 때만 키프레임으로 선택합니다. 같은 장면이 다시 나오는
+    릴스에서도 중복 프레임을 CLIP으로 보내지 않습니다.
+
+    stats는 최근 영상 하나의 결과입니다:
+        sampled: 해시를 계산한 후보 프레임 수
+        selected: 선택한 키프레임 수
+        skipped: 중복으로 건너뛴 후보 프레임 수
+        capped: max_frames에 도달해 영상 끝까지 보지 않았는지 여부
+        mode: 후보 프레임 사이를 건너뛴 방법 ('seek' 또는 'grab', FrameSampler 참고)
+    """
+
+    def __init__(self, sample_interval: float = KEYFRAME_SAMPLE_INTERVAL,
+                 max_frames: Optional[int] = MAX_KEYFRAMES, min_distance: int = KEYFRAME_MIN_DISTANCE):
+        """
+        Args:
+            sample_interval: 후보 프레임 샘플링 간격 (초)
+            max_frames: 최대 키프레임 수 (None이면 제한 없음)
+            min_distance: 새 장면으로 볼 최소 해밍 거리 (0이면 모든 후보 선택)
+        """
+        self.sample_interval = sample_interval
+        self.max_frames = max_frames
+        self.min_distance = min_distance
+        self.stats: Dict[str, Any] = {'sampled': 0, 'selected': 0, 'skipped': 0, 'capped': False, 'mode': None}
+
+    def frames(self, video_path: Path) -> Iterator[np.ndarray]:
+        """비디오에서 선택한 키프레임을 BGR 배열로 반환"""
+        self.stats = stats = {'sampled': 0, 'selected': 0, 'skipped': 0, 'capped': False, 'mode': None}
+        hashes: List[int] = []
+        sampler = FrameSampler(video_path, self.sample_interval)
+        candidates = iter(sampler)
+        try:
+            for frame in candidates:
+                if self.max_frames is not None and stats['selected'] >= self.max_frames:
+                    stats['capped'] = True
+                    break
+                stats['sampled'] += 1
+                if self.min_distance > 0:
+                    frame_hash = dhash(frame)
+                    if any(bin(frame_hash ^ kept).count('1') < self.min_distance for kept in hashes):
+                        stats['skipped'] += 1
+                        continue
+                    hashes.append(frame_hash)
+                stats['selected'] += 1
+                yield frame
+        finally:
+            # 중간에 멈춰도 VideoCapture를 바로 해제
+            candidates.close()
+            stats['mode'] = sampler.mode
+        logger.debug(f"키프레임 선택: {video_path} (후보 {stats['sampled']}개, 선택 {stats['selected']}개, "
+                     f"중복 {stats['skipped']}개, {stats['mode']})")
@@ -2,6 +2,7 @@ import os
 import sys
 import json
 import logging
+import threading
 import traceback
 from http.server import BaseHTTPRequestHandler
 from urllib.parse import parse_qs
@@ -26,7 +27,7 @@ except Exception as e:
     raise
 
 try:
-    from scraping.scraper import InstagramScraper
+    from scraping.scraper import InstagramScraper, warm_up_shared_pool
     from analysis.analyzer import ContentAnalyzer
     logger.info("모듈 import 성공")
 except ImportError as e:
@@ -34,6 +35,22 @@ except ImportError as e:
     logger.error(f"현재 Python 경로: {sys.path}")
     raise
 
+# 첫 요청 전에 Chrome 드라이버를 미리 실행 (SCRAPER_WARMUP=1)
+if os.getenv('SCRAPER_WARMUP') == '1':
+    warm_up_shared_pool()
+
+_text_analyzer = None
+_text_analyzer_lock = threading.Lock()
+
+def get_text_analyzer():
+    """스트리밍 요약용 TextAnalyzer (torch/transformers 로드가 무거우므로 첫 요청 시 생성)"""
+    global _text_analyzer
+    with _text_analyzer_lock:
+        if _text_analyzer is None:
+            from analysis.text_analysis import TextAnalyzer
+            _text_analyzer = TextAnalyzer()
+        return _text_analyzer
+
 def read_template():
     try:
         template_path = os.path.join(root_dir, 'templates', 'index.html')
@@ -95,6 +112,10 @@ class Handler(BaseHTTPRequestHandler):
                 self._json_response({'error': 'URL이 필요합니다'}, 400)
                 return
             
+            if self.path.rstrip('/') == '/api/analyze/stream':
+                self._stream_summary(url)
+                return
+            
             logger.info(f"분석 시작: {url}")
             
             # Instagram 스크래핑
@@ -109,7 +130,7 @@ class Handler(BaseHTTPRequestHandler):
             
             # 컨텐츠 분석
             analyzer = ContentAnalyzer()
-            analysis_result = analyzer.analyze_content(content)
+            analysis_result = analyzer.analyze_content({'text': content['text'], 'image_count': content['image_count']})
             
             logger.info("분석 완료")
             self._json_response(analysis_result)
@@ -121,6 +142,47 @@ class Handler(BaseHTTPRequestHandler):
             logger.error(f"분석 중 오류: {str(e)}\n{traceback.format_exc()}")
             self._json_response({'error': f'분석 중 오류가 발생했습니다: {str(e)}'}, 500)
 
+    def _stream_summary(self, url):
+        """스크래핑 후 요약 토큰을 Server-Sent Events로 전송
+
+        이벤트: content (스크래핑 결과), summary (요약 조각), done (전체 요약), error
+        """
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        
+        try:
+            logger.info(f"스트리밍 분석 시작: {url}")
+            content = InstagramScraper().scrape(url)
+            if not content:
+                self._send_event('error', {'error': '컨텐츠를 가져오지 못했습니다'})
+                return
+            self._send_event('content', {'text': content['text'], 'image_count': content['image_count']})
+            
+            parts = []
+            for chunk in get_text_analyzer().stream_summary(content['text']):
+                parts.append(chunk)
+                self._send_event('summary', {'token': chunk})
+            self._send_event('done', {'summary': ''.join(parts).strip()})
+            logger.info("스트리밍 분석 완료")
+            
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 연결을 끊으면 생성기가 닫히면서 생성도 중단됨
+            logger.info("클라이언트 연결 종료로 스트리밍 중단")
+        except Exception as e:
+            logger.error(f"스트리밍 분석 중 오류: {str(e)}\n{traceback.format_exc()}")
+            try:
+                self._send_event('error', {'error': f'분석 중 오류가 발생했습니다: {str(e)}'})
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    def _send_event(self, event, data):
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
     def _set_headers(self, content_type='text/html'):
         self.send_response(200)
         self.send_header('Content-type', content_type)
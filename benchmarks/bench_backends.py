@@ -0,0 +1,52 @@
+"""가짜 LLM 서버로 HTTP 백엔드 연결 재사용 효과 측정
+
+사용법:
+    python -m benchmarks.bench_backends [--requests N] [--concurrency N] [--latency 초]
+
+요청마다 새 연결을 여는 requests.post 호출과 keep-alive 세션을 공유하는
+백엔드를 같은 가짜 서버(models.fake_server)에 대해 비교합니다. 네트워크는 사용하지 않습니다.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from models.backends import OllamaBackend, OpenAIBackend
+from models.fake_server import FakeLLMServer
+
+MESSAGES = [{"role": "user", "content": "다음 Instagram 컨텐츠를 분석해주세요:\n\n제주 바다 여행"}]
+
+
+def run(call, count, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda _: call(), range(count)))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 백엔드 벤치마크")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0, help="가짜 서버의 요청당 지연 시간 (초)")
+    args = parser.parse_args()
+
+    print(f"요청 {args.requests}개, 동시 {args.concurrency}개, 서버 지연 {args.latency * 1000:.0f}ms")
+    print(f"{'client':<16}{'req/s':>10}{'connections':>14}")
+    with FakeLLMServer(latency=args.latency) as server:
+        clients = {
+            "requests.post": lambda: requests.post(f"{server.url}/api/chat", json={"model": "llama2", "messages": MESSAGES,
+                                                                                  "stream": False}, timeout=60).json(),
+            "ollama": OllamaBackend(base_url=server.url, max_concurrency=args.concurrency).chat,
+            "openai": OpenAIBackend(base_url=server.url, max_concurrency=args.concurrency).chat,
+        }
+        for name, client in clients.items():
+            call = client if name == "requests.post" else (lambda client=client: client(MESSAGES))
+            before = server.stats["connections"]
+            elapsed = run(call, args.requests, args.concurrency)
+            print(f"{name:<16}{args.requests / elapsed:>10.0f}{server.stats['connections'] - before:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""저장된 게시물 페이지로 HTML 추출 엔진 성능 비교
+
+사용법:
+    python -m benchmarks.bench_extraction [HTML 파일 또는 디렉토리 ...] [--repeat N]
+    python -m benchmarks.bench_extraction --archive ARCHIVE_DIR [--limit N]
+
+경로를 지정하지 않으면 tests/fixtures의 HTML 파일을 사용합니다.
+--archive를 지정하면 PageArchive에 저장된 실제 브라우저 페이지를 사용합니다.
+tracemalloc은 Python 할당만 측정하므로 libxml2 내부 메모리는 포함되지 않습니다.
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from scraping.archive import PageArchive
+from scraping.extraction import EXTRACTORS
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+
+def load_pages(paths):
+    pages = []
+    for path in map(Path, paths):
+        files = sorted(path.glob("*.html")) if path.is_dir() else [path]
+        pages.extend((file.name, file.read_text(encoding="utf-8")) for file in files)
+    return pages
+
+
+def load_archive_pages(root, limit):
+    pages = []
+    for page in PageArchive(root).pages(latest_only=True):
+        if page.source != 'browser':
+            continue
+        pages.append((f"{page.shortcode}/{page.path.name}", page.read()))
+        if len(pages) >= limit:
+            break
+    return pages
+
+
+def bench_engine(extract, pages, repeat):
+    durations = []
+    for _ in range(repeat):
+        for _, html in pages:
+            started = time.perf_counter()
+            extract(html)
+            durations.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    for _, html in pages:
+        extract(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'median_ms': statistics.median(durations) * 1000,
+        'pages_per_sec': len(durations) / sum(durations),
+        'peak_alloc_mb': peak / (1024 * 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 추출 엔진 벤치마크")
+    parser.add_argument("paths", nargs="*", default=[str(DEFAULT_FIXTURES)])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--archive", help="페이지를 읽어올 PageArchive 디렉토리")
+    parser.add_argument("--limit", type=int, default=200, help="아카이브에서 읽을 최대 페이지 수")
+    args = parser.parse_args()
+
+    pages = load_archive_pages(args.archive, args.limit) if args.archive else load_pages(args.paths)
+    if not pages:
+        raise SystemExit("벤치마크할 HTML 파일이 없습니다.")
+    total_mb = sum(len(html.encode("utf-8")) for _, html in pages) / (1024 * 1024)
+    print(f"페이지 {len(pages)}개 ({total_mb:.2f} MB), 반복 {args.repeat}회")
+
+    # 결과가 다르면 속도 비교는 의미가 없으므로 먼저 확인
+    for name, html in pages:
+        outputs = {engine: extract(html) for engine, extract in EXTRACTORS.items()}
+        if len({repr(output) for output in outputs.values()}) > 1:
+            print(f"경고: {name}에서 엔진별 추출 결과가 다릅니다")
+
+    print(f"{'engine':<8}{'median ms':>12}{'pages/s':>12}{'peak MB':>12}")
+    for engine, extract in EXTRACTORS.items():
+        result = bench_engine(extract, pages, args.repeat)
+        print(f"{engine:<8}{result['median_ms']:>12.2f}{result['pages_per_sec']:>12.1f}{result['peak_alloc_mb']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""LlamaAnalyzer 정밀도 모드별 추론 성능 비교
+
+사용법:
+    python -m benchmarks.bench_llama_precision [--model MODEL] [--modes float32 bfloat16 int8] [--max-new-tokens N]
+
+모드마다 별도 프로세스에서 모델을 로드하므로 최대 RSS가 서로 섞이지 않습니다.
+고정된 프롬프트를 greedy 디코딩으로 생성하여 tokens/sec를 측정하고,
+float32 결과와 생성 토큰 및 감정 레이블이 얼마나 일치하는지 비교합니다.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+PROMPT_TEXTS = [
+    "제주도 바다 앞 카페에서 보낸 여유로운 오후. 날씨도 좋고 커피도 맛있어서 행복했어요 #제주 #카페",
+    "오늘 출근길 지하철이 40분이나 멈춰서 회의에 늦었다. 정말 최악의 월요일",
+    "신제품 러닝화 착용 후기입니다. 쿠션은 적당하고 무게는 가벼운 편이에요.",
+    "주말에 가족과 함께 캠핑을 다녀왔습니다. 아이들이 특히 즐거워했어요.",
+    "새로 오픈한 전시회 일정 안내: 3월 2일부터 4월 30일까지, 월요일 휴관",
+    "비 오는 날에는 역시 따뜻한 국물 요리가 최고죠. 오늘 저녁은 칼국수!",
+]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return (peak if sys.platform == "darwin" else peak * 1024) / (1024 * 1024)
+
+
+def run_mode(model_path, precision, max_new_tokens):
+    """현재 프로세스에서 한 가지 정밀도 모드를 측정"""
+    import torch
+    from models.llama_model import LlamaAnalyzer
+
+    analyzer = LlamaAnalyzer(model_path, precision=precision)
+    tokenizer = analyzer.tokenizer
+
+    generated = []
+    new_tokens = 0
+    started = time.perf_counter()
+    for text in PROMPT_TEXTS:
+        inputs = tokenizer(analyzer._summary_prompt(text), return_tensors="pt").to(analyzer.device)
+        with torch.no_grad():
+            output = analyzer.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.eos_token_id
+            )
+        tokens = output[0, inputs["input_ids"].shape[1]:].tolist()
+        new_tokens += len(tokens)
+        generated.append(tokens)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "precision": precision,
+        "load_seconds": analyzer._entry.load_seconds,
+        "weights_mb": analyzer._entry.param_bytes / (1024 * 1024),
+        "tokens_per_sec": new_tokens / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "tokens": generated,
+        "sentiments": [analyzer.score_sentiment(text)["label"] for text in PROMPT_TEXTS],
+    }
+
+
+def token_agreement(reference, tokens):
+    """기준 결과와 같은 위치에서 일치하는 토큰 비율"""
+    matched = total = 0
+    for expected, actual in zip(reference, tokens):
+        total += max(len(expected), len(actual))
+        matched += sum(a == b for a, b in zip(expected, actual))
+    return matched / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LlamaAnalyzer 정밀도 모드 벤치마크")
+    parser.add_argument("--model", default="TinyLlama/TinyLlama-1.1B-Chat-v1.0")
+    parser.add_argument("--modes", nargs="+", default=["float32", "bfloat16", "int8"])
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_mode(args.model, args.worker, args.max_new_tokens)))
+        return
+
+    modes = args.modes if "float32" in args.modes else ["float32"] + args.modes
+    results = {}
+    for mode in modes:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_llama_precision", "--model", args.model,
+             "--max-new-tokens", str(args.max_new_tokens), "--worker", mode],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            print(f"{mode}: 실패\n{completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else ''}")
+            continue
+        results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    reference = results.get("float32")
+    print(f"프롬프트 {len(PROMPT_TEXTS)}개, 최대 생성 토큰 {args.max_new_tokens}")
+    print(f"{'mode':<10}{'tokens/s':>10}{'peak RSS MB':>13}{'weights MB':>12}{'token agree':>13}{'label agree':>13}")
+    for mode, result in results.items():
+        token_agree = label_agree = float("nan")
+        if reference:
+            token_agree = token_agreement(reference["tokens"], result["tokens"])
+            label_agree = sum(a == b for a, b in zip(reference["sentiments"], result["sentiments"])) / len(PROMPT_TEXTS)
+        print(f"{mode:<10}{result['tokens_per_sec']:>10.1f}{result['peak_rss_mb']:>13.0f}{result['weights_mb']:>12.0f}"
+              f"{token_agree:>13.2%}{label_agree:>13.2%}")
+
+
+if __name__ == "__main__":
+    main()
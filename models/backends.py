@@ -0,0 +1,228 @@
+"""LLM 백엔드 공통 인터페이스
+
+같은 chat 메시지 형식으로 프로세스 내 transformers 모델, OpenAI 호환 API,
+Ollama 호환 API를 호출합니다. HTTP 백엔드는 base_url별로 keep-alive 세션을 공유하고,
+모든 백엔드는 동시 요청 수를 세마포어로 제한합니다.
+
+환경 변수:
+    LLM_BACKEND: transformers, openai, ollama (기본값: openai)
+    LLM_BASE_URL: API 주소 (기본값: 백엔드별 공식 주소)
+    LLM_MODEL: 모델 이름
+    LLM_TIMEOUT: 요청 제한 시간 (초)
+    LLM_MAX_CONCURRENCY: 백엔드별 최대 동시 요청 수
+"""
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = os.getenv('LLM_BACKEND', 'openai')
+DEFAULT_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+# 생성 길이 기본값이 없는 프로세스 내 모델의 최대 생성 토큰 수 (HTTP 백엔드는 서버 기본값 사용)
+DEFAULT_MAX_NEW_TOKENS = 512
+
+Messages = List[Dict[str, str]]
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+class BackendError(Exception):
+    """LLM 백엔드 호출에 실패한 경우"""
+
+
+def get_session(base_url: str, pool_size: int = DEFAULT_MAX_CONCURRENCY) -> requests.Session:
+    """base_url별로 프로세스에서 공유하는 keep-alive HTTP 세션 반환"""
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[base_url] = session
+        return session
+
+
+class LLMBackend:
+    """chat 메시지를 받아 응답 텍스트를 반환하는 백엔드"""
+
+    name = 'base'
+
+    def __init__(self, model: str, timeout: float = DEFAULT_TIMEOUT, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.model = model
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def chat(self, messages: Messages, max_tokens: Optional[int] = None, temperature: float = 0.7) -> str:
+        """메시지 목록에 대한 응답 생성
+
+        Args:
+            messages: {'role': 'system'|'user'|'assistant', 'content': str} 목록
+            max_tokens: 최대 생성 토큰 수 (기본값: 서버 기본값, transformers는 DEFAULT_MAX_NEW_TOKENS)
+            temperature: 샘플링 온도
+
+        Returns:
+            응답 텍스트
+        """
+        # 동시 요청 수를 넘으면 제한 시간까지 대기
+        if not self._slots.acquire(timeout=self.timeout):
+            raise BackendError(f"{self.name} 백엔드 대기 시간 초과 ({self.timeout}초)")
+        try:
+            return self._chat(messages, max_tokens, temperature)
+        finally:
+            self._slots.release()
+
+    def _chat(self, messages: Messages, max_tokens: Optional[int], temperature: float) -> str:
+        raise NotImplementedError
+
+
+class _HttpBackend(LLMBackend):
+
+    def __init__(self, model: str, base_url: str, timeout: float = DEFAULT_TIMEOUT,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        super().__init__(model, timeout, max_concurrency)
+        self.base_url = base_url.rstrip('/')
+        self.session = get_session(self.base_url, max_concurrency)
+
+    def _post(self, path: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise BackendError(f"{self.name} 요청 실패: {str(e)}") from e
+        if response.status_code != 200:
+            raise BackendError(f"{self.name} API 오류 {response.status_code}: {response.text[:200]}")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise BackendError(f"{self.name} 응답이 JSON이 아닙니다: {response.text[:200]}") from e
+
+
+class OpenAIBackend(_HttpBackend):
+    """OpenAI 호환 /v1/chat/completions API"""
+
+    name = 'openai'
+
+    def __init__(self, model: str = 'gpt-3.5-turbo', base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 timeout: float = DEFAULT_TIMEOUT, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        super().__init__(model, base_url or 'https://api.openai.com', timeout, max_concurrency)
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        if not self.api_key and not base_url:
+            raise ValueError("OpenAI API 키가 환경 변수에 설정되지 않았습니다. OPENAI_API_KEY를 설정해주세요.")
+
+    def _chat(self, messages: Messages, max_tokens: Optional[int], temperature: float) -> str:
+        headers = {'Authorization': f"Bearer {self.api_key}"} if self.api_key else None
+        payload = {'model': self.model, 'messages': messages, 'temperature': temperature}
+        if max_tokens is not None:
+            payload['max_tokens'] = max_tokens
+        data = self._post('/v1/chat/completions', payload, headers)
+        try:
+            return data['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError) as e:
+            raise BackendError(f"예상치 못한 응답 형식: {data}") from e
+
+
+class OllamaBackend(_HttpBackend):
+    """Ollama 호환 /api/chat API"""
+
+    name = 'ollama'
+
+    def __init__(self, model: str = 'llama2', base_url: Optional[str] = None,
+                 timeout: float = DEFAULT_TIMEOUT, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        super().__init__(model, base_url or 'http://localhost:11434', timeout, max_concurrency)
+
+    def _chat(self, messages: Messages, max_tokens: Optional[int], temperature: float) -> str:
+        options = {'temperature': temperature}
+        if max_tokens is not None:
+            options['num_predict'] = max_tokens
+        data = self._post('/api/chat', {
+            'model': self.model,
+            'messages': messages,
+            'stream': False,
+            'options': options,
+        })
+        try:
+            return data['message']['content']
+        except (KeyError, TypeError) as e:
+            raise BackendError(f"예상치 못한 응답 형식: {data}") from e
+
+
+class TransformersBackend(LLMBackend):
+    """프로세스 내 transformers 모델 (LlamaAnalyzer와 같은 모델 레지스트리 사용)"""
+
+    name = 'transformers'
+
+    def __init__(self, model: str = 'TinyLlama/TinyLlama-1.1B-Chat-v1.0', timeout: float = DEFAULT_TIMEOUT,
+                 max_concurrency: int = 1, analyzer=None):
+        super().__init__(model, timeout, max_concurrency)
+        self._analyzer = analyzer
+        self._analyzer_lock = threading.Lock()
+
+    @property
+    def analyzer(self):
+        # torch/transformers 로드가 무거우므로 첫 호출 시 생성
+        with self._analyzer_lock:
+            if self._analyzer is None:
+                from models.llama_model import LlamaAnalyzer
+                self._analyzer = LlamaAnalyzer(self.model)
+            return self._analyzer
+
+    @staticmethod
+    def render_prompt(messages: Messages) -> str:
+        """chat 메시지를 <human>/<assistant> 형식 프롬프트로 변환"""
+        parts = []
+        system = [m['content'] for m in messages if m['role'] == 'system']
+        for message in messages:
+            if message['role'] == 'user':
+                content = "\n\n".join(system + [message['content']]) if system and not parts else message['content']
+                parts.append(f"<human>{content}</human>")
+            elif message['role'] == 'assistant':
+                parts.append(f"<assistant>{message['content']}</assistant>")
+        return "\n".join(parts) + "\n<assistant>"
+
+    def _chat(self, messages: Messages, max_tokens: Optional[int], temperature: float) -> str:
+        try:
+            return self.analyzer._generate_response(self.render_prompt(messages),
+                                                    max_new_tokens=max_tokens or DEFAULT_MAX_NEW_TOKENS,
+                                                    temperature=temperature, task='backend').strip()
+        except Exception as e:
+            raise BackendError(f"transformers 생성 실패: {str(e)}") from e
+
+
+BACKENDS = {
+    'openai': OpenAIBackend,
+    'ollama': OllamaBackend,
+    'transformers': TransformersBackend,
+}
+
+
+def create_backend(name: Optional[str] = None, api_key: Optional[str] = None, **kwargs) -> LLMBackend:
+    """이름과 환경 변수 설정으로 백엔드 생성
+
+    Args:
+        name: 'openai', 'ollama', 'transformers' (기본값: LLM_BACKEND)
+        api_key: OpenAI 백엔드에 사용할 API 키 (다른 백엔드를 선택하면 무시)
+        **kwargs: 백엔드 생성자 인자 (환경 변수보다 우선)
+    """
+    # .env가 모듈 import 이후에 로드될 수 있으므로 호출 시점의 환경 변수 사용
+    name = name or os.getenv('LLM_BACKEND', DEFAULT_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(f"지원하지 않는 LLM 백엔드: {name} (사용 가능: {', '.join(BACKENDS)})")
+
+    options: Dict[str, Any] = {'timeout': float(os.getenv('LLM_TIMEOUT', DEFAULT_TIMEOUT))}
+    if os.getenv('LLM_MODEL'):
+        options['model'] = os.getenv('LLM_MODEL')
+    if os.getenv('LLM_MAX_CONCURRENCY'):
+        options['max_concurrency'] = int(os.getenv('LLM_MAX_CONCURRENCY'))
+    if os.getenv('LLM_BASE_URL') and name != 'transformers':
+        options['base_url'] = os.getenv('LLM_BASE_URL')
+    if api_key and name == 'openai':
+        options['api_key'] = api_key
+    options.update(kwargs)
+    return BACKENDS[name](**options)
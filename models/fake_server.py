@@ -0,0 +1,124 @@
+"""네트워크 없이 테스트와 벤치마크에 사용하는 OpenAI/Ollama 호환 가짜 LLM 서버
+
+고정된 분석 응답을 돌려주며, 요청 수와 새 TCP 연결 수를 세어
+keep-alive 연결 재사용 여부를 확인할 수 있습니다.
+
+단독 실행:
+    python -m models.fake_server [--port 8089] [--latency 0.05]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = "키워드: 제주, 바다, 여행\n요약: 제주 바다에서 보낸 여유로운 오후입니다.\n감정: 긍정"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # keep-alive 연결 유지 (헤더와 본문을 따로 보내므로 Nagle 지연이 생기지 않도록 비활성화)
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.record('connections')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send(400, {'error': 'invalid json'})
+            return
+
+        self.server.record('requests')
+        self.server.requests.append((self.path, payload))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        content = self.server.response_text
+        if self.path == '/v1/chat/completions':
+            self._send(200, {
+                'object': 'chat.completion',
+                'model': payload.get('model'),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            })
+        elif self.path == '/api/chat':
+            self._send(200, {'model': payload.get('model'), 'message': {'role': 'assistant', 'content': content}, 'done': True})
+        elif self.path == '/api/generate':
+            self._send(200, {'model': payload.get('model'), 'response': content, 'done': True})
+        else:
+            self._send(404, {'error': f'unknown path: {self.path}'})
+
+    def _send(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """OpenAI(/v1/chat/completions)와 Ollama(/api/chat, /api/generate) 형식을 흉내 내는 서버
+
+    with 문에서 사용하면 백그라운드 스레드에서 실행되고 종료 시 정리됩니다.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, response_text=DEFAULT_RESPONSE, latency=0.0):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.response_text = response_text
+        self.latency = latency
+        self.requests = []
+        self.stats = {'requests': 0, 'connections': 0}
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def record(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 LLM 서버")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help="요청마다 지연 시간 (초)")
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.port, latency=args.latency)
+    print(f"가짜 LLM 서버 실행 중: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
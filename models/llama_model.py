@@ -1,84 +1,389 @@
+import copy
 import logging
-from typing import List, Dict, Any
+import os
+import re
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import List, Dict, Any, Callable, Iterator, Optional, Sequence, Tuple
 from pathlib import Path
 import torch
-from transformers import (
-    AutoModelForCausalLM,
-    AutoTokenizer,
-    pipeline
-)
+from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+from models.registry import ModelRegistry, model_registry, resolve_precision
 
 logger = logging.getLogger(__name__)
 
+# 통합 분석 응답의 항목 (다음 항목 이름 또는 응답 끝까지)
+_SECTION_PATTERN = re.compile(r"(키워드|요약|감정)\s*[:：]\s*(.*?)(?=(?:키워드|요약|감정)\s*[:：]|</?assistant>|</?human>|$)", re.S)
+
+# 모델 정밀도: auto, float32, float16, bfloat16, int8
+DEFAULT_PRECISION = os.getenv("LLAMA_PRECISION", "auto")
+
+# 프롬프트 최대 토큰 수 (넘는 부분은 잘림, 요약은 청크로 나눠 처리)
+MAX_PROMPT_TOKENS = 512
+# 청크 요약 시 부분 요약 하나의 최대 생성 토큰 수 (단계마다 입력이 충분히 줄어들도록 청크 크기보다 작게)
+CHUNK_SUMMARY_TOKENS = 120
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。！？])\s+|\n+")
+
+SENTIMENT_LABELS = ("긍정", "중립", "부정")
+RELEVANCE_LABELS = ("높음", "중간", "낮음")
+
+# 모델이 대화 형식을 이어서 생성하기 시작하면 응답이 끝난 것으로 판단
+_CHAT_MARKERS = ("</assistant>", "<human>", "</human>", "<assistant>")
+# 부호 뒤에 공백이 와야 문장 끝 ("3.", "v1."처럼 아직 생성 중인 숫자의 마침표는 제외)
+_SENTENCE_END = re.compile(r"[.!?。！？](?=\s)")
+
+# 로그에 사용할 작업 이름
+_TASK_NAMES = {
+    "keywords": "키워드 추출",
+    "summary": "텍스트 요약",
+    "chunk_summary": "청크 요약",
+    "sentiment": "감정 분석",
+    "relevance": "컨텐츠 관련성 분석",
+    "combined": "통합 분석",
+}
+
+
+def _line_ended(text: str) -> bool:
+    """내용이 나온 뒤 줄바꿈이 생성되었는지"""
+    return "\n" in text.lstrip()
+
+
+def _stop_after_keywords(max_keywords: int) -> Callable[[str], bool]:
+    """키워드 max_keywords개가 쉼표로 끝났거나 줄이 바뀌면 중단"""
+    return lambda text: text.count(",") >= max_keywords or _line_ended(text)
+
+
+class _SentenceStop:
+    """문장 count개가 끝나면 중단하는 종료 조건
+
+    문장 끝은 부호 뒤의 공백이 생성된 다음에 확인되므로 한 토큰 더 생성한 뒤 멈춥니다.
+    trim()은 그 토큰을 잘라 count번째 문장 끝까지만 남깁니다.
+    """
+
+    def __init__(self, count: int):
+        self.count = count
+
+    def __call__(self, text: str) -> bool:
+        return len(_SENTENCE_END.findall(text)) >= self.count
+
+    def trim(self, text: str) -> str:
+        ends = [match.end() for match in islice(_SENTENCE_END.finditer(text), self.count)]
+        return text[:ends[-1]] if len(ends) == self.count else text
+
+
+def _stop_after_sentences(count: int) -> _SentenceStop:
+    """문장 count개가 끝나면 중단"""
+    return _SentenceStop(count)
+
+
+def _stop_after_sentiment(text: str) -> bool:
+    """감정 레이블이 나오거나 줄이 바뀌면 중단"""
+    return LlamaAnalyzer._normalize_sentiment(text) is not None or _line_ended(text)
+
+
+def _stop_after_combined(text: str) -> bool:
+    """통합 분석에서 마지막 항목인 감정 레이블이 나오면 중단"""
+    return "감정" in text and LlamaAnalyzer._normalize_sentiment(text.rsplit("감정", 1)[-1]) is not None
+
+
+def _strip_chat_markers(text: str) -> str:
+    positions = [text.find(marker) for marker in _CHAT_MARKERS if marker in text]
+    return text[:min(positions)] if positions else text
+
+
+def _marker_safe_length(text: str) -> int:
+    """끝부분이 대화 표식의 앞부분일 수 있는 경우 그 부분을 제외한 길이 (스트리밍 시 보류할 위치)"""
+    start = text.rfind("<", max(0, len(text) - max(map(len, _CHAT_MARKERS)) + 1))
+    if start != -1 and any(marker.startswith(text[start:]) for marker in _CHAT_MARKERS):
+        return start
+    return len(text)
+
+
+class GenerationTelemetry:
+    """작업별로 생성한 토큰 수와 파싱 후 실제로 사용한 토큰 수를 집계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, Dict[str, int]] = {}
+
+    def _task(self, task: str) -> Dict[str, int]:
+        return self._tasks.setdefault(task, {"calls": 0, "budget_tokens": 0, "generated_tokens": 0, "kept_tokens": 0})
+
+    def record_generated(self, task: str, generated: int, budget: int) -> None:
+        with self._lock:
+            stats = self._task(task)
+            stats["calls"] += 1
+            stats["generated_tokens"] += generated
+            stats["budget_tokens"] += budget
+
+    def record_kept(self, task: str, kept: int) -> None:
+        with self._lock:
+            self._task(task)["kept_tokens"] += kept
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """작업별 호출 수, 최대 생성 토큰 합, 생성 토큰 수, 사용 토큰 수와 사용 비율"""
+        with self._lock:
+            return {
+                task: {
+                    **stats,
+                    "kept_ratio": round(stats["kept_tokens"] / stats["generated_tokens"], 3) if stats["generated_tokens"] else None,
+                }
+                for task, stats in self._tasks.items()
+            }
+
+
+class _TextStoppingCriteria(StoppingCriteria):
+    """새로 생성된 텍스트가 작업별 종료 조건을 만족한 시퀀스부터 생성을 중단"""
+
+    def __init__(self, tokenizer, prompt_length: int, predicate: Optional[Callable[[str], bool]]):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.predicate = predicate
+
+    def __call__(self, input_ids, scores, **kwargs):
+        texts = self.tokenizer.batch_decode(input_ids[:, self.prompt_length:], skip_special_tokens=True)
+        done = [
+            any(marker in text for marker in _CHAT_MARKERS) or bool(self.predicate and self.predicate(text))
+            for text in texts
+        ]
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+
+class _CancelCriteria(StoppingCriteria):
+    """이벤트가 설정되면 생성을 중단 (스트리밍 소비자가 연결을 끊은 경우)"""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+
 class LlamaAnalyzer:
-    def __init__(self, model_path: str = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"):
-        """LlamaAnalyzer 초기화"""
+    def __init__(self, model_path: str = "TinyLlama/TinyLlama-1.1B-Chat-v1.0", registry: Optional[ModelRegistry] = None,
+                 max_batch_size: int = 16, max_batch_memory_mb: int = 1024, label_scoring: bool = False,
+                 precision: Optional[str] = None, prefix_cache_size: int = 0):
+        """LlamaAnalyzer 초기화
+
+        모델과 토크나이저는 레지스트리에서 가져오므로 같은 프로세스에서
+        여러 인스턴스를 만들어도 가중치는 한 번만 로드됩니다.
+
+        Args:
+            model_path: Hugging Face 모델 이름 또는 로컬 경로
+            registry: 모델 레지스트리 (기본값: 프로세스 전역 레지스트리)
+            max_batch_size: 배치 생성 시 한 번에 처리할 최대 텍스트 수
+            max_batch_memory_mb: 배치 생성 시 KV 캐시와 로짓에 사용할 메모리 한도
+            label_scoring: True이면 감정과 관련성을 생성 대신 레이블 점수 비교로 분류
+                (관련성은 이유 설명 없이 레이블만 반환)
+            precision: 추론 정밀도 (auto, float32, float16, bfloat16, int8; 기본값: LLAMA_PRECISION)
+            prefix_cache_size: 0보다 크면 작업 프롬프트를 '본문 prefix + 작업 지시'로 구성하고
+                본문 prefix의 KV 캐시를 이 개수만큼 보관하여 키워드/요약/감정/관련성 분석에서 재사용
+        """
+        self.label_scoring = label_scoring
+        self.max_batch_size = max_batch_size
+        self.max_batch_memory_mb = max_batch_memory_mb
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model = AutoModelForCausalLM.from_pretrained(
+        self.precision = precision or DEFAULT_PRECISION
+        dtype, quantization = resolve_precision(self.precision, self.device)
+        self._entry = (registry or model_registry).get(
             model_path,
-            torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-            low_cpu_mem_usage=True
-        )
-        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-        self.model.to(self.device)
-        
-    def _generate_response(self, prompt: str, max_new_tokens: int = 100, temperature: float = 0.7) -> str:
-        """텍스트 생성 공통 함수"""
-        inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=512).to(self.device)
-        
-        outputs = self.model.generate(
-            **inputs,
-            max_new_tokens=max_new_tokens,
-            do_sample=True,
-            temperature=temperature,
-            pad_token_id=self.tokenizer.eos_token_id,
-            num_return_sequences=1
+            dtype=dtype,
+            device=self.device,
+            quantization=quantization
         )
+        self.model = self._entry.model
+        self.tokenizer = self._entry.tokenizer
+        self.telemetry = GenerationTelemetry()
+        self.prefix_cache_size = prefix_cache_size
+        self._prefix_cache: "OrderedDict[str, Tuple[torch.Tensor, Any]]" = OrderedDict()
+        self._prefix_cache_lock = threading.Lock()
+        self.prefix_cache_stats = {"hits": 0, "misses": 0, "reused_tokens": 0}
+        
+    def _generate_response(self, prompt: str, max_new_tokens: int = 100, temperature: float = 0.7,
+                           task: str = "generate", stop: Optional[Callable[[str], bool]] = None) -> str:
+        """텍스트 생성 공통 함수
+
+        Args:
+            task: 텔레메트리에 기록할 작업 이름
+            stop: 새로 생성된 텍스트를 받아 생성을 끝낼지 판단하는 함수
+
+        Returns:
+            새로 생성된 텍스트 (프롬프트 제외)
+        """
+        with self._entry.tokenizer_lock:
+            inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=MAX_PROMPT_TOKENS).to(self.device)
         
-        return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        return self._generate_new_text(inputs, max_new_tokens, temperature, task, stop, self.tokenizer.eos_token_id)[0]
+    
+    def _generate_new_text(self, inputs, max_new_tokens: int, temperature: float, task: str,
+                           stop: Optional[Callable[[str], bool]], pad_token_id: int, **generate_kwargs) -> List[str]:
+        prompt_length = inputs["input_ids"].shape[1]
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=True,
+                temperature=temperature,
+                pad_token_id=pad_token_id,
+                stopping_criteria=StoppingCriteriaList([_TextStoppingCriteria(self.tokenizer, prompt_length, stop)]),
+                **generate_kwargs
+            )
+        
+        # 프롬프트를 제외한 새 토큰만 디코딩 (먼저 끝난 시퀀스 뒤에 붙은 패딩은 생성 토큰에서 제외)
+        new_tokens = outputs[:, prompt_length:]
+        for row in new_tokens:
+            self.telemetry.record_generated(task, int((row != pad_token_id).sum()), max_new_tokens)
+        texts = [_strip_chat_markers(text) for text in self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)]
+        # 종료 조건을 확인하느라 더 생성한 부분 제거
+        trim = getattr(stop, "trim", None)
+        return [trim(text) for text in texts] if trim else texts
+    
+    def _generate_task(self, text: str, prompt: str, suffix: str, **kwargs) -> str:
+        """작업 프롬프트로 생성 (prefix 캐시 모드이면 본문 prefix의 KV 캐시 뒤에 작업 지시만 이어서 생성)
+
+        Args:
+            text: 분석할 본문
+            prompt: prefix 캐시를 쓰지 않을 때 사용할 전체 프롬프트
+            suffix: 본문 prefix 뒤에 붙일 작업 지시
+            **kwargs: _generate_response 인자
+        """
+        if self.prefix_cache_size:
+            state = self._prefix_state(text)
+            if state is not None:
+                prefix_ids, past_key_values = state
+                with self._entry.tokenizer_lock:
+                    suffix_ids = self.tokenizer(suffix, add_special_tokens=False, return_tensors="pt")["input_ids"]
+                input_ids = torch.cat([prefix_ids, suffix_ids.to(self.device)], dim=1)
+                inputs = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+                # generate가 캐시에 새 토큰을 덧붙이므로 복사본을 넘겨 원본 prefix 캐시를 보존
+                return self._generate_new_text(
+                    inputs, kwargs.get("max_new_tokens", 100), kwargs.get("temperature", 0.7),
+                    kwargs.get("task", "generate"), kwargs.get("stop"), self.tokenizer.eos_token_id,
+                    past_key_values=copy.deepcopy(past_key_values)
+                )[0]
+        return self._generate_response(prompt, **kwargs)
+    
+    def _prefix_state(self, text: str) -> Optional[Tuple[torch.Tensor, Any]]:
+        """본문 prefix의 토큰과 KV 캐시 (캐시에 없으면 한 번 forward하여 저장, 너무 길면 None)"""
+        prefix = self._content_prefix(text)
+        with self._prefix_cache_lock:
+            state = self._prefix_cache.get(prefix)
+            if state is not None:
+                self._prefix_cache.move_to_end(prefix)
+                self.prefix_cache_stats["hits"] += 1
+                self.prefix_cache_stats["reused_tokens"] += state[0].shape[1]
+                return state
+        
+        with self._entry.tokenizer_lock:
+            prefix_ids = self.tokenizer(prefix, return_tensors="pt")["input_ids"].to(self.device)
+        # 작업 지시가 들어갈 자리가 없으면 기존 방식(잘린 전체 프롬프트)으로 처리
+        if prefix_ids.shape[1] > MAX_PROMPT_TOKENS - 64:
+            return None
+        with torch.no_grad():
+            past_key_values = self.model(input_ids=prefix_ids, use_cache=True).past_key_values
+        
+        state = (prefix_ids, past_key_values)
+        with self._prefix_cache_lock:
+            self.prefix_cache_stats["misses"] += 1
+            self._prefix_cache[prefix] = state
+            self._prefix_cache.move_to_end(prefix)
+            while len(self._prefix_cache) > self.prefix_cache_size:
+                self._prefix_cache.popitem(last=False)
+        return state
+    
+    def _record_kept(self, task: str, kept_text: str) -> None:
+        self.telemetry.record_kept(task, self._count_tokens([kept_text])[0] if kept_text else 0)
+    
+    def _generate_batch(self, prompts: List[str], max_new_tokens: int = 100, temperature: float = 0.7,
+                        task: str = "generate", stop: Optional[Callable[[str], bool]] = None) -> List[Optional[str]]:
+        """여러 프롬프트를 패딩된 배치로 생성
+
+        프롬프트를 길이순으로 정렬해 비슷한 길이끼리 묶어 패딩을 줄이고,
+        배치 크기는 프롬프트 길이에 따라 max_batch_memory_mb 안에 들어오도록 정합니다.
+        실패한 배치의 응답은 None으로 반환합니다.
+
+        Returns:
+            입력 순서와 같은 순서의 응답 목록
+        """
+        if not prompts:
+            return []
+        
+        with self._entry.tokenizer_lock:
+            lengths = [len(ids) for ids in self.tokenizer(prompts, truncation=True, max_length=MAX_PROMPT_TOKENS)["input_ids"]]
+        order = sorted(range(len(prompts)), key=lambda i: lengths[i], reverse=True)
+        
+        responses: List[Optional[str]] = [None] * len(prompts)
+        start = 0
+        while start < len(order):
+            # 가장 긴 프롬프트가 배치의 패딩 길이를 정하므로 그 길이로 배치 크기 계산
+            batch_size = self._batch_size_for(lengths[order[start]] + max_new_tokens)
+            batch = order[start:start + batch_size]
+            start += len(batch)
+            try:
+                outputs = self._generate_padded([prompts[i] for i in batch], max_new_tokens, temperature, task, stop)
+                for i, output in zip(batch, outputs):
+                    responses[i] = output
+            except Exception as e:
+                logger.error(f"{_TASK_NAMES.get(task, task)} 중 에러 발생 (배치 {len(batch)}개): {str(e)}")
+        return responses
+    
+    def _generate_padded(self, prompts: List[str], max_new_tokens: int, temperature: float, task: str,
+                         stop: Optional[Callable[[str], bool]]) -> List[str]:
+        with self._entry.tokenizer_lock:
+            # 생성은 마지막 토큰 뒤에 이어지므로 왼쪽에 패딩
+            padding_side = self.tokenizer.padding_side
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            self.tokenizer.padding_side = "left"
+            try:
+                inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, truncation=True,
+                                        max_length=MAX_PROMPT_TOKENS).to(self.device)
+            finally:
+                self.tokenizer.padding_side = padding_side
+        
+        return self._generate_new_text(inputs, max_new_tokens, temperature, task, stop, self.tokenizer.pad_token_id)
+    
+    def _batch_size_for(self, sequence_length: int) -> int:
+        """시퀀스 길이에서 메모리 한도에 맞는 배치 크기 추정
+
+        시퀀스 하나가 차지하는 메모리는 KV 캐시(레이어 × 2 × KV 헤드 × 헤드 차원)와
+        프롬프트 전체에 대한 첫 로짓(어휘 크기 × float32)으로 어림합니다.
+        """
+        config = self.model.config
+        hidden_size = config.hidden_size
+        head_dim = getattr(config, "head_dim", None) or hidden_size // config.num_attention_heads
+        kv_heads = getattr(config, "num_key_value_heads", None) or config.num_attention_heads
+        element_size = next(self.model.parameters()).element_size()
+        
+        kv_bytes_per_token = 2 * config.num_hidden_layers * kv_heads * head_dim * element_size
+        sequence_bytes = sequence_length * (kv_bytes_per_token + config.vocab_size * 4)
+        batch_size = int(self.max_batch_memory_mb * 1024 * 1024 // max(sequence_bytes, 1))
+        return max(1, min(batch_size, self.max_batch_size))
     
     def extract_keywords(self, text: str, max_keywords: int = 5) -> List[str]:
         """텍스트에서 주요 키워드 추출"""
         try:
-            prompt = f"""<human>다음 텍스트에서 가장 중요한 키워드 {max_keywords}개를 추출해주세요. 쉼표(,)로 구분해서 답변해주세요:
-
-{text}
-
-키워드:</human>
-<assistant>"""
-            
-            response = self._generate_response(prompt, max_new_tokens=50)
-            # 응답에서 키워드 부분만 추출
-            if "키워드:" in response:
-                keywords = response.split("키워드:")[-1].strip()
-            else:
-                keywords = response.split("<assistant>")[-1].strip()
-            
-            # 쉼표로 분리하고 정제
-            keyword_list = [k.strip() for k in keywords.split(",") if k.strip()]
-            return keyword_list[:max_keywords]
+            response = self._generate_task(text, self._keywords_prompt(text, max_keywords), self._keywords_suffix(max_keywords),
+                                           max_new_tokens=50, task="keywords", stop=_stop_after_keywords(max_keywords))
+            keywords = self._parse_keywords(response, max_keywords)
+            self._record_kept("keywords", ", ".join(keywords))
+            return keywords
             
         except Exception as e:
             logger.error(f"키워드 추출 중 에러 발생: {str(e)}")
             return []
     
     def summarize_text(self, text: str) -> str:
-        """텍스트 요약"""
+        """텍스트 요약 (프롬프트가 MAX_PROMPT_TOKENS를 넘으면 청크로 나눠 요약)"""
         try:
-            prompt = f"""<human>다음 텍스트를 2-4문장으로 요약해주세요:
-
-{text}
-
-요약:</human>
-<assistant>"""
-            
-            response = self._generate_response(prompt, max_new_tokens=200)
-            
-            if "요약:" in response:
-                summary = response.split("요약:")[-1].strip()
-            else:
-                summary = response.split("<assistant>")[-1].strip()
+            if not self._fits_prompt(self._summary_prompt(text)):
+                return self.summarize_long_text(text)
             
+            response = self._generate_task(text, self._summary_prompt(text), self._summary_suffix(),
+                                           max_new_tokens=200, task="summary", stop=_stop_after_sentences(4))
+            summary = self._parse_summary(response)
+            self._record_kept("summary", summary)
             return summary
             
         except Exception as e:
@@ -88,36 +393,301 @@ class LlamaAnalyzer:
     def analyze_sentiment(self, text: str) -> str:
         """감정 분석"""
         try:
-            prompt = f"""<human>다음 텍스트의 감정을 분석하여 '긍정', '중립', '부정' 중 하나로만 답변해주세요:
-
-{text}
-
-감정:</human>
-<assistant>"""
-            
-            response = self._generate_response(prompt, max_new_tokens=50, temperature=0.3)
-            
-            if "감정:" in response:
-                sentiment = response.split("감정:")[-1].strip()
-            else:
-                sentiment = response.split("<assistant>")[-1].strip()
+            if self.label_scoring:
+                return self.score_sentiment(text)["label"]
             
-            # 응답을 세 가지 감정 중 하나로 정규화
-            sentiment = sentiment.lower()
-            if "긍정" in sentiment:
-                return "긍정"
-            elif "부정" in sentiment:
-                return "부정"
-            else:
-                return "중립"
+            response = self._generate_task(text, self._sentiment_prompt(text), self._sentiment_suffix(),
+                                           max_new_tokens=50, temperature=0.3, task="sentiment", stop=_stop_after_sentiment)
+            sentiment = self._parse_sentiment(response)
+            self._record_kept("sentiment", sentiment)
+            return sentiment
             
         except Exception as e:
             logger.error(f"감정 분석 중 에러 발생: {str(e)}")
             return "알 수 없음"
     
+    def summarize_long_text(self, text: str, max_depth: int = 5) -> str:
+        """긴 텍스트를 잘라내지 않고 요약 (map-reduce)
+
+        문장 경계에서 프롬프트 길이 제한에 맞게 청크를 나눠 배치로 요약하고,
+        부분 요약을 합친 결과가 여전히 길면 같은 방식으로 다시 요약합니다.
+        부분 요약은 청크보다 짧게 생성하므로 단계마다 입력이 줄어들고 전체 비용은 입력 길이에 비례합니다.
+
+        Args:
+            text: 요약할 텍스트
+            max_depth: 최대 축약 단계 수 (넘으면 마지막 요약에서 본문 뒷부분이 잘림)
+        """
+        text = self._condense_long_text(text, max_depth)
+        response = self._generate_response(self._summary_prompt(text), max_new_tokens=200,
+                                           task="summary", stop=_stop_after_sentences(4))
+        summary = self._parse_summary(response)
+        self._record_kept("summary", summary)
+        return summary
+    
+    def _condense_long_text(self, text: str, max_depth: int = 5) -> str:
+        """요약 프롬프트 한 번에 들어가도록 청크별 부분 요약으로 텍스트를 줄임 (map 단계)
+
+        max_depth 단계 후에도 길면 본문만 잘라 프롬프트의 작업 지시는 항상 남깁니다.
+        """
+        budget = MAX_PROMPT_TOKENS - self._count_tokens([self._summary_prompt("")])[0] - 8
+        for depth in range(max_depth):
+            chunks = self._split_chunks(text, budget)
+            if len(chunks) <= 1:
+                break
+            logger.info(f"긴 텍스트 분할 요약 {depth + 1}단계: 청크 {len(chunks)}개")
+            responses = self._generate_batch([self._summary_prompt(chunk) for chunk in chunks],
+                                             max_new_tokens=CHUNK_SUMMARY_TOKENS, task="chunk_summary",
+                                             stop=_stop_after_sentences(4))
+            # 요약에 실패한 청크는 원문을 그대로 다음 단계로 넘김
+            partials = [self._parse_summary(response) if response is not None else chunk
+                        for response, chunk in zip(responses, chunks)]
+            # 다시 토큰화하면 길어질 수 있으므로 부분 요약 길이를 제한하여 단계마다 입력이 줄어들도록 보장
+            partials = [self._truncate_tokens(partial, CHUNK_SUMMARY_TOKENS) for partial in partials if partial]
+            for partial in partials:
+                self._record_kept("chunk_summary", partial)
+            text = "\n".join(partials)
+        else:
+            logger.warning(f"{max_depth}단계 축약 후에도 텍스트가 길어 마지막 요약에서 일부가 잘립니다.")
+            text = self._truncate_tokens(text, budget)
+        return text
+    
+    def _count_tokens(self, texts: List[str]) -> List[int]:
+        with self._entry.tokenizer_lock:
+            return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+    
+    def _fits_prompt(self, prompt: str) -> bool:
+        """BOS 등 특수 토큰을 포함해 인코딩해도 MAX_PROMPT_TOKENS 안에 들어가 뒤쪽이 잘리지 않는지"""
+        with self._entry.tokenizer_lock:
+            return len(self.tokenizer(prompt)["input_ids"]) <= MAX_PROMPT_TOKENS
+    
+    def _split_chunks(self, text: str, budget: int) -> List[str]:
+        """문장 단위로 묶어 각각 budget 토큰 이하인 청크로 분할 (한 문장이 너무 길면 토큰 단위로 분할)"""
+        sentences = [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if sentence and sentence.strip()]
+        if not sentences:
+            return []
+        
+        chunks: List[str] = []
+        current: List[str] = []
+        size = 0
+        for sentence, count in zip(sentences, self._count_tokens(sentences)):
+            pieces = self._split_by_tokens(sentence, budget) if count > budget else [(sentence, count)]
+            for piece, piece_count in pieces:
+                # 문장 사이 공백이 토큰 하나가 될 수 있으므로 여유를 둠
+                if current and size + piece_count + 1 > budget:
+                    chunks.append(" ".join(current))
+                    current, size = [], 0
+                current.append(piece)
+                size += piece_count + 1
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+    
+    def _truncate_tokens(self, text: str, max_tokens: int) -> str:
+        if self._count_tokens([text])[0] <= max_tokens:
+            return text
+        return self._split_by_tokens(text, max_tokens)[0][0]
+    
+    def _split_by_tokens(self, text: str, budget: int) -> List[Tuple[str, int]]:
+        with self._entry.tokenizer_lock:
+            ids = self.tokenizer(text, add_special_tokens=False)["input_ids"]
+            return [(self.tokenizer.decode(ids[i:i + budget]), len(ids[i:i + budget]))
+                    for i in range(0, len(ids), budget)]
+    
+    def stream_summary(self, text: str, max_new_tokens: int = 200, temperature: float = 0.7) -> Iterator[str]:
+        """요약을 생성되는 대로 텍스트 조각 단위로 반환
+
+        생성은 별도 스레드에서 실행되고, 반복을 중간에 멈추면 다음 토큰에서 생성도 중단됩니다.
+        summarize_text와 같이 문장 4개가 끝나거나 대화 표식(<human> 등)이 나오면 멈추며,
+        대화 표식과 네 번째 문장 끝 뒤의 텍스트는 전송하지 않습니다.
+
+        Yields:
+            새로 디코딩된 요약 텍스트 조각
+        """
+        # 프롬프트 뒤쪽(작업 지시)이 잘리지 않도록 긴 본문은 summarize_text처럼 청크 요약으로 먼저 줄임
+        if not self._fits_prompt(self._summary_prompt(text)):
+            text = self._condense_long_text(text)
+        
+        with self._entry.tokenizer_lock:
+            inputs = self.tokenizer(self._summary_prompt(text), return_tensors="pt", truncation=True,
+                                    max_length=MAX_PROMPT_TOKENS).to(self.device)
+        
+        prompt_length = inputs["input_ids"].shape[1]
+        stop = _stop_after_sentences(4)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        cancel = threading.Event()
+        errors: List[Exception] = []
+        
+        def generate():
+            try:
+                with torch.no_grad():
+                    self.model.generate(
+                        **inputs,
+                        max_new_tokens=max_new_tokens,
+                        do_sample=True,
+                        temperature=temperature,
+                        pad_token_id=self.tokenizer.eos_token_id,
+                        streamer=streamer,
+                        stopping_criteria=StoppingCriteriaList([
+                            _CancelCriteria(cancel),
+                            _TextStoppingCriteria(self.tokenizer, prompt_length, stop),
+                        ])
+                    )
+            except Exception as e:
+                errors.append(e)
+                # 소비자가 대기 상태로 남지 않도록 스트림 종료
+                streamer.end()
+        
+        thread = threading.Thread(target=generate, daemon=True)
+        thread.start()
+        text = ""
+        sent = 0
+        try:
+            for chunk in streamer:
+                text += chunk
+                # 대화 표식이나 네 번째 문장 끝 뒤는 전송하지 않음
+                stripped = stop.trim(_strip_chat_markers(text))
+                # 대화 표식의 앞부분일 수 있는 끝부분은 다음 조각을 볼 때까지 보류
+                end = len(stripped) if len(stripped) < len(text) else _marker_safe_length(text)
+                if end > sent:
+                    yield text[sent:end]
+                    sent = end
+                if len(stripped) < len(text):
+                    break
+            else:
+                if len(text) > sent:
+                    yield text[sent:]
+        finally:
+            cancel.set()
+            thread.join()
+        if errors:
+            raise errors[0]
+    
+    def extract_keywords_batch(self, texts: List[str], max_keywords: int = 5) -> List[List[str]]:
+        """여러 텍스트의 키워드를 배치 생성으로 추출 (입력 순서 유지)"""
+        prompts = [self._keywords_prompt(text, max_keywords) for text in texts]
+        responses = self._generate_batch(prompts, max_new_tokens=50, task="keywords",
+                                         stop=_stop_after_keywords(max_keywords))
+        results = [self._parse_keywords(r, max_keywords) if r is not None else [] for r in responses]
+        for keywords in results:
+            self._record_kept("keywords", ", ".join(keywords))
+        return results
+    
+    def summarize_text_batch(self, texts: List[str]) -> List[str]:
+        """여러 텍스트를 배치 생성으로 요약 (입력 순서 유지)"""
+        responses = self._generate_batch([self._summary_prompt(text) for text in texts], max_new_tokens=200,
+                                         task="summary", stop=_stop_after_sentences(4))
+        results = []
+        for response in responses:
+            if response is None:
+                results.append("텍스트 요약에 실패했습니다.")
+                continue
+            results.append(self._parse_summary(response))
+            self._record_kept("summary", results[-1])
+        return results
+    
+    def analyze_sentiment_batch(self, texts: List[str]) -> List[str]:
+        """여러 텍스트의 감정을 배치 생성으로 분석 (입력 순서 유지)"""
+        responses = self._generate_batch([self._sentiment_prompt(text) for text in texts], max_new_tokens=50,
+                                         temperature=0.3, task="sentiment", stop=_stop_after_sentiment)
+        results = []
+        for response in responses:
+            if response is None:
+                results.append("알 수 없음")
+                continue
+            results.append(self._parse_sentiment(response))
+            self._record_kept("sentiment", results[-1])
+        return results
+    
+    @staticmethod
+    def _content_prefix(text: str) -> str:
+        """prefix 캐시 모드에서 모든 작업이 공유하는 본문 부분"""
+        return f"""<human>다음 텍스트를 읽고 요청에 답변해주세요:
+
+{text}
+
+"""
+    
+    @staticmethod
+    def _keywords_suffix(max_keywords: int) -> str:
+        return f"""위 텍스트에서 가장 중요한 키워드 {max_keywords}개를 추출해주세요. 쉼표(,)로 구분해서 답변해주세요.
+
+키워드:</human>
+<assistant>"""
+    
+    @staticmethod
+    def _summary_suffix() -> str:
+        return """위 텍스트를 2-4문장으로 요약해주세요.
+
+요약:</human>
+<assistant>"""
+    
+    @staticmethod
+    def _sentiment_suffix() -> str:
+        return """위 텍스트의 감정을 분석하여 '긍정', '중립', '부정' 중 하나로만 답변해주세요.
+
+감정:</human>
+<assistant>"""
+    
+    @staticmethod
+    def _keywords_prompt(text: str, max_keywords: int) -> str:
+        return f"""<human>다음 텍스트에서 가장 중요한 키워드 {max_keywords}개를 추출해주세요. 쉼표(,)로 구분해서 답변해주세요:
+
+{text}
+
+키워드:</human>
+<assistant>"""
+    
+    @staticmethod
+    def _summary_prompt(text: str) -> str:
+        return f"""<human>다음 텍스트를 2-4문장으로 요약해주세요:
+
+{text}
+
+요약:</human>
+<assistant>"""
+    
+    @staticmethod
+    def _sentiment_prompt(text: str) -> str:
+        return f"""<human>다음 텍스트의 감정을 분석하여 '긍정', '중립', '부정' 중 하나로만 답변해주세요:
+
+{text}
+
+감정:</human>
+<assistant>"""
+    
+    @staticmethod
+    def _parse_keywords(response: str, max_keywords: int) -> List[str]:
+        # 응답에서 키워드 부분만 추출
+        if "키워드:" in response:
+            keywords = response.split("키워드:")[-1].strip()
+        else:
+            keywords = response.split("<assistant>")[-1].strip()
+        
+        # 쉼표로 분리하고 정제
+        keyword_list = [k.strip() for k in keywords.split(",") if k.strip()]
+        return keyword_list[:max_keywords]
+    
+    @staticmethod
+    def _parse_summary(response: str) -> str:
+        if "요약:" in response:
+            return response.split("요약:")[-1].strip()
+        return response.split("<assistant>")[-1].strip()
+    
+    def _parse_sentiment(self, response: str) -> str:
+        if "감정:" in response:
+            sentiment = response.split("감정:")[-1].strip()
+        else:
+            sentiment = response.split("<assistant>")[-1].strip()
+        
+        # 응답을 세 가지 감정 중 하나로 정규화
+        return self._normalize_sentiment(sentiment) or "중립"
+    
     def analyze_content_relevance(self, text: str, image_description: str) -> str:
-        """텍스트와 이미지 간의 관련성 분석"""
+        """텍스트와 이미지 간의 관련성 분석 (label_scoring 모드에서는 높음/중간/낮음 레이블만 반환)"""
         try:
+            if self.label_scoring:
+                return self.score_relevance(text, image_description)["label"]
+            
             prompt = f"""<human>다음 텍스트와 이미지 설명 간의 관련성을 분석해주세요:
 
 텍스트: {text}
@@ -127,15 +697,165 @@ class LlamaAnalyzer:
 관련성을 높음/중간/낮음 중 하나로 평가하고, 그 이유를 1-2문장으로 설명해주세요.</human>
 <assistant>"""
             
-            response = self._generate_response(prompt, max_new_tokens=150)
+            suffix = f"""이미지 설명: {image_description}
+
+위 텍스트와 이미지 설명 간의 관련성을 높음/중간/낮음 중 하나로 평가하고, 그 이유를 1-2문장으로 설명해주세요.</human>
+<assistant>"""
+            
+            # 레이블과 이유 1-2문장
+            response = self._generate_task(text, prompt, suffix, max_new_tokens=150, task="relevance",
+                                           stop=_stop_after_sentences(3))
             
             if "관련성:" in response:
                 relevance = response.split("관련성:")[-1].strip()
             else:
                 relevance = response.split("<assistant>")[-1].strip()
             
+            self._record_kept("relevance", relevance)
             return relevance
             
         except Exception as e:
             logger.error(f"컨텐츠 관련성 분석 중 에러 발생: {str(e)}")
             return "컨텐츠 관련성 분석에 실패했습니다."
+    
+    def score_sentiment(self, text: str) -> Dict[str, Any]:
+        """생성 없이 각 감정 레이블의 로그 우도를 비교하여 분류
+
+        Returns:
+            label (가장 가능성이 높은 레이블)과 probabilities (레이블별 확률) 키를 가진 딕셔너리
+        """
+        try:
+            return self._score_labels(self._sentiment_prompt(text), SENTIMENT_LABELS)
+        except Exception as e:
+            logger.error(f"감정 점수 계산 중 에러 발생: {str(e)}")
+            return {"label": "알 수 없음", "probabilities": {}}
+    
+    def score_relevance(self, text: str, image_description: str) -> Dict[str, Any]:
+        """텍스트와 이미지 설명의 관련성을 높음/중간/낮음 레이블 점수 비교로 분류
+
+        Returns:
+            label과 probabilities 키를 가진 딕셔너리
+        """
+        try:
+            prompt = f"""<human>다음 텍스트와 이미지 설명 간의 관련성을 '높음', '중간', '낮음' 중 하나로만 답변해주세요:
+
+텍스트: {text}
+
+이미지 설명: {image_description}
+
+관련성:</human>
+<assistant>"""
+            return self._score_labels(prompt, RELEVANCE_LABELS)
+        except Exception as e:
+            logger.error(f"관련성 점수 계산 중 에러 발생: {str(e)}")
+            return {"label": "알 수 없음", "probabilities": {}}
+    
+    def _score_labels(self, prompt: str, labels: Sequence[str]) -> Dict[str, Any]:
+        """프롬프트 뒤에 각 레이블이 이어질 로그 우도를 한 번의 배치 forward로 계산
+
+        레이블마다 (프롬프트 + 레이블) 시퀀스를 만들어 함께 forward하고,
+        레이블 토큰들의 평균 로그 확률을 소프트맥스하여 레이블 분포로 사용합니다.
+        합을 쓰면 토큰이 적은 레이블이 항상 유리하므로 토큰 수로 정규화합니다.
+        """
+        with self._entry.tokenizer_lock:
+            prompt_ids = self.tokenizer(prompt)["input_ids"]
+            # 레이블 토큰은 프롬프트와 이어서 토큰화한 결과에서 프롬프트 뒷부분으로 얻음
+            label_ids = [self.tokenizer(prompt + label)["input_ids"][len(prompt_ids):] for label in labels]
+        
+        # 입력 길이 제한을 넘으면 프롬프트 앞부분을 잘라 답변 위치를 유지
+        keep = MAX_PROMPT_TOKENS - max(len(ids) for ids in label_ids)
+        if len(prompt_ids) > keep:
+            prompt_ids = prompt_ids[:1] + prompt_ids[-(keep - 1):]
+        
+        sequences = [prompt_ids + ids for ids in label_ids]
+        width = max(len(ids) for ids in sequences)
+        pad_id = self.tokenizer.pad_token_id if self.tokenizer.pad_token_id is not None else self.tokenizer.eos_token_id
+        input_ids = torch.tensor([ids + [pad_id] * (width - len(ids)) for ids in sequences], device=self.device)
+        attention_mask = torch.tensor([[1] * len(ids) + [0] * (width - len(ids)) for ids in sequences], device=self.device)
+        
+        with torch.no_grad():
+            logits = self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+        log_probs = torch.log_softmax(logits.float(), dim=-1)
+        
+        # 위치 t의 로짓은 t+1번째 토큰을 예측
+        scores = []
+        for row, ids in enumerate(label_ids):
+            positions = torch.arange(len(prompt_ids) - 1, len(prompt_ids) - 1 + len(ids), device=self.device)
+            targets = torch.tensor(ids, device=self.device)
+            scores.append(log_probs[row, positions, targets].mean())
+        probabilities = torch.softmax(torch.stack(scores), dim=0).tolist()
+        
+        distribution = {label: round(p, 4) for label, p in zip(labels, probabilities)}
+        return {"label": max(distribution, key=distribution.get), "probabilities": distribution}
+    
+    def analyze_all(self, text: str, max_keywords: int = 5) -> Dict[str, Any]:
+        """키워드, 요약, 감정을 한 번의 생성으로 분석
+
+        형식에 맞지 않아 파싱하지 못한 항목만 개별 분석 함수로 다시 요청합니다.
+
+        Returns:
+            keywords, summary, sentiment 키를 가진 딕셔너리
+        """
+        result: Dict[str, Any] = {}
+        try:
+            prompt = f"""<human>다음 텍스트를 분석하여 아래 형식으로만 답변해주세요:
+
+{text}
+
+키워드: 가장 중요한 키워드 {max_keywords}개 (쉼표로 구분)
+요약: 2-4문장 요약
+감정: '긍정', '중립', '부정' 중 하나</human>
+<assistant>키워드:"""
+            
+            # 프롬프트가 잘리면 형식 안내 뒤에서 생성이 시작되지 않으므로 개별 분석으로 넘어감
+            if self._count_tokens([prompt])[0] < MAX_PROMPT_TOKENS:
+                response = self._generate_response(prompt, max_new_tokens=260, temperature=0.3,
+                                                   task="combined", stop=_stop_after_combined)
+                result = self._parse_combined_response("키워드:" + response, max_keywords)
+                self._record_kept("combined", "\n".join([", ".join(result.get("keywords", [])),
+                                                          result.get("summary", ""), result.get("sentiment", "")]).strip())
+            
+        except Exception as e:
+            logger.error(f"통합 분석 중 에러 발생: {str(e)}")
+        
+        # 파싱에 실패한 항목은 개별 생성으로 대체
+        missing = [task for task in ("keywords", "summary", "sentiment") if task not in result]
+        if missing:
+            logger.info(f"통합 분석 결과에서 누락된 항목 개별 분석: {', '.join(missing)}")
+        if "keywords" not in result:
+            result["keywords"] = self.extract_keywords(text, max_keywords)
+        if "summary" not in result:
+            result["summary"] = self.summarize_text(text)
+        if "sentiment" not in result:
+            result["sentiment"] = self.analyze_sentiment(text)
+        return result
+    
+    def _parse_combined_response(self, response: str, max_keywords: int) -> Dict[str, Any]:
+        """'키워드: / 요약: / 감정:' 형식의 응답에서 유효한 항목만 추출"""
+        sections: Dict[str, str] = {}
+        for label, value in _SECTION_PATTERN.findall(response):
+            sections.setdefault(label, value.strip())
+        
+        parsed: Dict[str, Any] = {}
+        keywords = [k.strip(" -*.\n") for k in sections.get("키워드", "").split(",")]
+        keywords = [k for k in keywords if k]
+        if keywords:
+            parsed["keywords"] = keywords[:max_keywords]
+        if sections.get("요약"):
+            parsed["summary"] = sections["요약"]
+        sentiment = self._normalize_sentiment(sections.get("감정", ""))
+        if sentiment:
+            parsed["sentiment"] = sentiment
+        return parsed
+    
+    @staticmethod
+    def _normalize_sentiment(text: str) -> Optional[str]:
+        """응답을 세 가지 감정 중 하나로 정규화 (판단할 수 없으면 None)"""
+        text = text.lower()
+        if "긍정" in text:
+            return "긍정"
+        elif "부정" in text:
+            return "부정"
+        elif "중립" in text:
+            return "중립"
+        return None
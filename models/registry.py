@@ -0,0 +1,182 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+logger = logging.getLogger(__name__)
+
+# 정밀도 모드별 가중치 자료형과 양자화 방식
+PRECISION_MODES = {
+    "float32": (torch.float32, None),
+    "float16": (torch.float16, None),
+    "bfloat16": (torch.bfloat16, None),
+    # nn.Linear 가중치를 int8로 동적 양자화 (CPU 전용, float32 모델에서 변환)
+    "int8": (torch.float32, "int8"),
+}
+
+
+def resolve_precision(precision: Optional[str], device: str) -> Tuple[torch.dtype, Optional[str]]:
+    """정밀도 모드 이름을 (dtype, 양자화 방식)으로 변환
+
+    Args:
+        precision: PRECISION_MODES의 키 또는 'auto' (CUDA는 float16, CPU는 float32)
+        device: 'cpu' 또는 'cuda'
+    """
+    precision = precision or "auto"
+    if precision == "auto":
+        precision = "float16" if device == "cuda" else "float32"
+    if precision not in PRECISION_MODES:
+        raise ValueError(f"지원하지 않는 정밀도 모드: {precision} (사용 가능: auto, {', '.join(PRECISION_MODES)})")
+    if PRECISION_MODES[precision][1] and device != "cpu":
+        raise ValueError(f"{precision} 양자화는 CPU에서만 지원합니다.")
+    return PRECISION_MODES[precision]
+
+
+def _state_bytes(model: Any) -> int:
+    # 양자화된 Linear의 가중치는 parameters()에 나타나지 않으므로 state_dict 기준으로 계산
+    total = 0
+    for value in model.state_dict().values():
+        tensors = value if isinstance(value, (tuple, list)) else (value,)
+        for tensor in tensors:
+            if isinstance(tensor, torch.Tensor):
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def current_rss_bytes() -> int:
+    """현재 프로세스의 상주 메모리(RSS) 크기"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # /proc이 없는 환경에서는 최대 RSS로 대체 (Linux: KB, macOS: bytes)
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class ModelEntry:
+    """레지스트리에 로드된 모델과 토크나이저"""
+    model_path: str
+    dtype: torch.dtype
+    device: str
+    quantization: Optional[str]
+    model: Any
+    tokenizer: Any
+    load_seconds: float
+    param_bytes: int
+    rss_delta_bytes: int
+    # fast 토크나이저는 truncation 설정을 바꾸며 동시에 호출하면 오류가 나므로 인코딩 시 사용
+    tokenizer_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class ModelRegistry:
+    """(model_path, dtype, device, 양자화 방식)별로 모델을 프로세스당 한 번만 로드하여 공유하는 레지스트리"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, str, Optional[str]], ModelEntry] = {}
+        self._key_locks: Dict[Tuple[str, str, str, Optional[str]], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_path: str, dtype: torch.dtype, device: str, quantization: Optional[str] = None) -> ModelEntry:
+        """모델을 반환하고, 처음 요청된 경우에만 로드
+
+        Args:
+            model_path: Hugging Face 모델 이름 또는 로컬 경로
+            dtype: 모델 가중치 자료형
+            device: 'cpu' 또는 'cuda'
+            quantization: None 또는 'int8' (Linear 레이어 동적 양자화)
+
+        Returns:
+            ModelEntry
+        """
+        key = (model_path, str(dtype), device, quantization)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        # 같은 모델을 동시에 요청한 스레드는 한 번의 로드를 기다리고, 다른 모델 로드는 막지 않음
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(model_path, dtype, device, quantization)
+                self._entries[key] = entry
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        """로드된 모델별 로드 시간과 메모리 사용량"""
+        return {
+            "rss_mb": current_rss_bytes() / (1024 * 1024),
+            "models": [
+                {
+                    "model_path": entry.model_path,
+                    "dtype": str(entry.dtype),
+                    "device": entry.device,
+                    "quantization": entry.quantization,
+                    "load_seconds": round(entry.load_seconds, 2),
+                    "param_mb": entry.param_bytes / (1024 * 1024),
+                    "rss_delta_mb": entry.rss_delta_bytes / (1024 * 1024),
+                }
+                for entry in self._entries.values()
+            ],
+        }
+
+    def unload(self, model_path: Optional[str] = None) -> None:
+        """모델 언로드 (model_path를 지정하지 않으면 전체)"""
+        with self._lock:
+            for key in [key for key in self._entries if model_path in (None, key[0])]:
+                del self._entries[key]
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def _load(self, model_path: str, dtype: torch.dtype, device: str, quantization: Optional[str] = None) -> ModelEntry:
+        logger.info(f"모델 로드 시작: {model_path} ({dtype}, {device}, 양자화: {quantization or '없음'})")
+        rss_before = current_rss_bytes()
+        started = time.perf_counter()
+
+        model = AutoModelForCausalLM.from_pretrained(
+            model_path,
+            torch_dtype=dtype,
+            low_cpu_mem_usage=True
+        )
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        model.to(device)
+        model.eval()
+        if quantization == "int8":
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif quantization:
+            raise ValueError(f"지원하지 않는 양자화 방식: {quantization}")
+
+        load_seconds = time.perf_counter() - started
+        param_bytes = _state_bytes(model)
+        entry = ModelEntry(
+            model_path=model_path,
+            dtype=dtype,
+            device=device,
+            quantization=quantization,
+            model=model,
+            tokenizer=tokenizer,
+            load_seconds=load_seconds,
+            param_bytes=param_bytes,
+            rss_delta_bytes=max(current_rss_bytes() - rss_before, 0),
+        )
+        logger.info(f"모델 로드 완료: {load_seconds:.1f}초, 가중치 {param_bytes / (1024 * 1024):.0f}MB")
+        return entry
+
+
+# 프로세스 전역 레지스트리
+model_registry = ModelRegistry()
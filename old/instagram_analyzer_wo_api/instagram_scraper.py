@@ -3,10 +3,36 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+import hashlib
+import json
+import re
+import tempfile
 import os
 import requests
 import logging
+from urllib.parse import urlparse
+
+DOWNLOAD_DIR = 'temp_downloads'
+DOWNLOAD_WORKERS = 8
+# 렌더링된 게시물(article)을 기다리는 최대 시간 (초)
+RENDER_TIMEOUT = 10
+
+# 임베디드 게시물 JSON의 이미지 URL (캐러셀 슬라이드마다 후보 목록의 첫 번째가 가장 큰 이미지)
+CANDIDATE_URL_PATTERN = re.compile(r'"image_versions2"\s*:\s*\{\s*"candidates"\s*:\s*\[\s*\{[^{}]*?"url"\s*:\s*"((?:[^"\\]|\\.)+)"')
+DISPLAY_URL_PATTERN = re.compile(r'"display_url"\s*:\s*"((?:[^"\\]|\\.)+)"')
+# 동영상 슬라이드/릴스의 동영상 URL (후보 목록의 첫 번째가 가장 높은 화질)
+VIDEO_VERSIONS_PATTERN = re.compile(r'"video_versions"\s*:\s*\[\s*\{[^{}]*?"url"\s*:\s*"((?:[^"\\]|\\.)+)"')
+VIDEO_URL_PATTERN = re.compile(r'"video_url"\s*:\s*"((?:[^"\\]|\\.)+)"')
+
+MEDIA_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/heic': '.heic',
+    'video/mp4': '.mp4',
+}
 
 class InstagramScraper:
     def __init__(self):
@@ -18,6 +44,14 @@ class InstagramScraper:
         self.chrome_options.add_argument('--window-size=1920,1080')
         self.chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
 
+        # 미디어 다운로드용 keep-alive 세션 (병렬 다운로드 수만큼 연결 유지)
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_WORKERS))
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Referer': 'https://www.instagram.com/'
+        })
+
     def get_post_data(self, post_url):
         driver = None
         try:
@@ -29,47 +63,33 @@ class InstagramScraper:
             clean_url = post_url.split('?')[0]
             self.logger.info(f"접속 URL: {clean_url}")
             
-            # 페이지 로드
+            # 페이지 로드 후 캡션이 있는 게시물 본문이 렌더링되면 바로 진행 (고정 대기 없음)
             driver.get(clean_url)
-            time.sleep(5)
-            
-            # 이미지 URL 수집 (중복 제거를 위해 set 사용)
-            image_urls = set()
-            
-            # 메인 이미지 찾기
             try:
-                main_images = driver.find_elements(By.CSS_SELECTOR, 'img[class*="_aagt"]')
-                for img in main_images:
-                    src = img.get_attribute('src')
-                    if src and 'scontent' in src and not any(x in src.lower() for x in ['profile', 'avatar']):
-                        image_urls.add(src)
-                        self.logger.info(f"메인 이미지 URL 발견: {src}")
-            except Exception as e:
-                self.logger.error(f"메인 이미지 검색 실패: {e}")
+                WebDriverWait(driver, RENDER_TIMEOUT).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, 'article'))
+                )
+            except TimeoutException:
+                self.logger.warning("게시물 렌더링 대기 시간 초과, 현재 페이지로 진행")
             
-            # 다중 이미지 처리
-            try:
-                while True:
-                    # 다음 버튼 찾기
-                    try:
-                        next_button = driver.find_element(By.CSS_SELECTOR, 'button._aahi')
-                        if not next_button.is_displayed():
-                            break
-                            
-                        # 다음 버튼 클릭
-                        driver.execute_script("arguments[0].click();", next_button)
-                        time.sleep(2)
-                        
-                        # 새 이미지 찾기
-                        new_image = driver.find_element(By.CSS_SELECTOR, 'img._aagt')
-                        src = new_image.get_attribute('src')
-                        if src and 'scontent' in src:
-                            image_urls.add(src)
-                            self.logger.info(f"추가 이미지 URL 발견: {src}")
-                    except:
-                        break  # 다음 버튼을 찾지 못하면 종료
-            except Exception as e:
-                self.logger.info(f"다중 이미지 처리 완료: {e}")
+            # 한 번의 페이지 스냅샷에서 모든 슬라이드의 이미지/동영상 URL 수집
+            # (다음 버튼을 눌러가며 슬라이드마다 대기하지 않음)
+            page_source = driver.page_source
+            image_urls = self._extract_media_urls(page_source)
+            video_urls = self._extract_video_urls(page_source)
+            self.logger.info(f"임베디드 JSON에서 이미지 URL {len(image_urls)}개, 동영상 URL {len(video_urls)}개 발견")
+
+            # 임베디드 데이터가 없으면 렌더링된 메인 이미지 사용
+            if not image_urls:
+                try:
+                    main_images = driver.find_elements(By.CSS_SELECTOR, 'img[class*="_aagt"]')
+                    for img in main_images:
+                        src = img.get_attribute('src')
+                        if src and 'scontent' in src and not any(x in src.lower() for x in ['profile', 'avatar']) and src not in image_urls:
+                            image_urls.append(src)
+                            self.logger.info(f"메인 이미지 URL 발견: {src}")
+                except Exception as e:
+                    self.logger.error(f"메인 이미지 검색 실패: {e}")
             
             # 캡션 추출
             caption = ""
@@ -80,55 +100,100 @@ class InstagramScraper:
             except Exception as e:
                 self.logger.error(f"캡션 추출 실패: {e}")
             
-            # 이미지 다운로드
-            downloaded_files = []
-            self.logger.info(f"\n총 {len(image_urls)}개의 고유한 이미지 URL 발견")
-            
-            for url in image_urls:
-                file_path = self._download_media(url)
-                if file_path:
-                    downloaded_files.append(file_path)
+            # 이미지와 동영상을 함께 병렬 다운로드 (동영상 슬라이드는 커버 이미지도 OCR에 사용)
+            self.logger.info(f"\n총 {len(image_urls) + len(video_urls)}개의 고유한 미디어 URL 발견")
+            downloaded_files = self._download_all(image_urls + video_urls)
+            videos = [path for path in downloaded_files if path.endswith('.mp4')]
+            images = [path for path in downloaded_files if not path.endswith('.mp4')]
             
-            self.logger.info(f"총 {len(downloaded_files)}개의 이미지 파일 다운로드 완료")
+            self.logger.info(f"이미지 {len(images)}개, 동영상 {len(videos)}개 다운로드 완료")
             
             if not downloaded_files:
-                self.logger.error("다운로드된 이미지가 없습니다!")
-                return {'images': [], 'caption': caption, 'url': clean_url}
+                self.logger.error("다운로드된 미디어가 없습니다!")
             
             return {
-                'images': downloaded_files,
+                'images': images,
+                'videos': videos,
                 'caption': caption,
                 'url': clean_url
             }
             
         except Exception as e:
             self.logger.error(f"데이터 수집 실패: {e}")
-            return {'images': [], 'caption': '', 'url': post_url}
+            return {'images': [], 'videos': [], 'caption': '', 'url': post_url}
             
         finally:
             if driver:
                 driver.quit()
 
+    def _extract_media_urls(self, page_source):
+        """페이지 소스의 임베디드 JSON에서 슬라이드 순서대로 이미지 URL 추출"""
+        return self._find_urls(page_source, (CANDIDATE_URL_PATTERN, DISPLAY_URL_PATTERN))
+
+    def _extract_video_urls(self, page_source):
+        """페이지 소스의 임베디드 JSON에서 슬라이드 순서대로 동영상 URL 추출"""
+        return self._find_urls(page_source, (VIDEO_VERSIONS_PATTERN, VIDEO_URL_PATTERN))
+
+    @staticmethod
+    def _find_urls(page_source, patterns):
+        """패턴 순서대로 URL을 찾아 첫 번째로 결과가 있는 패턴의 URL 목록 반환"""
+        urls = []
+        for pattern in patterns:
+            for raw in pattern.findall(page_source):
+                try:
+                    url = json.loads(f'"{raw}"')
+                except ValueError:
+                    continue
+                if 'scontent' in url and not any(x in url.lower() for x in ['profile', 'avatar']) and url not in urls:
+                    urls.append(url)
+            # 후보 목록에서 찾았다면 크기만 다른 display_url/video_url은 중복이므로 사용하지 않음
+            if urls:
+                break
+        return urls
+
+    def _download_all(self, urls):
+        """여러 미디어를 동시에 다운로드 (입력 순서 유지, 동일한 파일은 하나만 저장)"""
+        if not urls:
+            return []
+        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=min(DOWNLOAD_WORKERS, len(urls))) as executor:
+            results = list(executor.map(self._download_media, urls))
+        return list(dict.fromkeys(path for path in results if path))
+
     def _download_media(self, url):
+        temp_path = None
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Referer': 'https://www.instagram.com/'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                # 저장 디렉토리 생성
-                os.makedirs('temp_downloads', exist_ok=True)
-                
-                # 파일 저장
-                file_path = f"temp_downloads/media_{hash(url)}.jpg"
-                with open(file_path, 'wb') as f:
-                    f.write(response.content)
-                
+            with self.session.get(url, timeout=10, stream=True) as response:
+                if response.status_code != 200:
+                    self.logger.error(f"미디어 다운로드 실패: HTTP {response.status_code}")
+                    return None
+
+                content_type = response.headers.get('Content-Type', '').split(';')[0]
+                # Content-Type이 없거나 일반적인 값이면 URL의 확장자 사용
+                url_extension = os.path.splitext(urlparse(url).path)[1].lower()
+                extension = MEDIA_EXTENSIONS.get(content_type) or (
+                    url_extension if url_extension in MEDIA_EXTENSIONS.values() else '.jpg')
+
+                # 내용을 스트리밍으로 저장하면서 해시 계산
+                digest = hashlib.sha256()
+                with tempfile.NamedTemporaryFile(dir=DOWNLOAD_DIR, suffix='.part', delete=False) as f:
+                    temp_path = f.name
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        digest.update(chunk)
+                        f.write(chunk)
+
+            # 실행마다 달라지는 hash(url) 대신 내용 해시로 파일명을 정해 실행 간에도 중복 제거
+            file_path = os.path.join(DOWNLOAD_DIR, f"media_{digest.hexdigest()[:16]}{extension}")
+            if os.path.exists(file_path):
+                os.remove(temp_path)
+                self.logger.info(f"이미 다운로드된 미디어: {file_path}")
+            else:
+                os.replace(temp_path, file_path)
                 self.logger.info(f"미디어 다운로드 성공: {file_path}")
-                return file_path
+            return file_path
                 
         except Exception as e:
             self.logger.error(f"미디어 다운로드 실패: {e}")
-        return None
\ No newline at end of file
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+        return None
@@ -0,0 +1,219 @@
+"""원본 페이지 아카이브와 재추출(replay)
+
+스크래핑한 page_source를 압축하여 shortcode와 수집 시각별로 저장하고,
+추출 규칙이 바뀌었을 때 브라우저나 네트워크 없이 다시 추출합니다.
+
+재추출 실행:
+    python -m scraping.archive ARCHIVE_DIR [--output results.jsonl] [--workers N]
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from scraping.cache import extract_shortcode
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = os.getenv('SCRAPER_ARCHIVE_DIR', '')
+
+_TIMESTAMP_FORMAT = '%Y%m%dT%H%M%S%fZ'
+_SUFFIXES = {'zstd': '.html.zst', 'gzip': '.html.gz'}
+
+_shared_archive = None
+_shared_archive_lock = threading.Lock()
+
+
+def get_shared_archive():
+    """SCRAPER_ARCHIVE_DIR가 설정된 경우 프로세스 공유 아카이브 반환"""
+    global _shared_archive
+    if not DEFAULT_ARCHIVE_DIR:
+        return None
+    with _shared_archive_lock:
+        if _shared_archive is None:
+            _shared_archive = PageArchive(DEFAULT_ARCHIVE_DIR)
+        return _shared_archive
+
+
+class ArchivedPage:
+    """아카이브에 저장된 페이지 하나"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.shortcode = self.path.parent.name
+        # 파일명 형식: <수집 시각>.<source>.html.gz|.html.zst
+        timestamp, self.source = self.path.name.split('.')[:2]
+        self.fetched_at = datetime.strptime(timestamp, _TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+    def read(self):
+        """압축을 풀어 HTML 반환"""
+        data = self.path.read_bytes()
+        if self.path.name.endswith(_SUFFIXES['zstd']):
+            if zstandard is None:
+                raise RuntimeError("zstd로 압축된 페이지를 읽으려면 zstandard 패키지가 필요합니다.")
+            data = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            data = gzip.decompress(data)
+        return data.decode('utf-8')
+
+
+class PageArchive:
+    """shortcode/수집 시각별로 압축된 page_source를 저장하는 디렉토리 아카이브
+
+    구조: <root>/<shortcode>/<수집 시각>.<source>.html.(zst|gz)
+    """
+
+    def __init__(self, root, compression=None):
+        """
+        Args:
+            root: 아카이브 디렉토리
+            compression: 'zstd' 또는 'gzip' (기본값: zstandard 설치 시 zstd)
+        """
+        self.root = Path(root)
+        self.compression = compression or ('zstd' if zstandard else 'gzip')
+        if self.compression not in _SUFFIXES:
+            raise ValueError(f"지원하지 않는 압축 방식: {self.compression}")
+        if self.compression == 'zstd' and zstandard is None:
+            raise ValueError("zstd 압축을 사용하려면 zstandard 패키지가 필요합니다.")
+
+    def record(self, url, html, source='browser', fetched_at=None):
+        """페이지 저장
+
+        Args:
+            url: 게시물 URL
+            html: 페이지 HTML
+            source: 'browser' (렌더링된 DOM) 또는 'http' (서버 응답 HTML)
+            fetched_at: 수집 시각 (기본값: 현재 시각)
+
+        Returns:
+            저장된 파일 경로 (shortcode를 알 수 없으면 None)
+        """
+        shortcode = extract_shortcode(url)
+        if not shortcode:
+            logger.warning(f"shortcode를 알 수 없어 아카이브하지 않습니다: {url}")
+            return None
+
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        data = html.encode('utf-8')
+        if self.compression == 'zstd':
+            data = zstandard.ZstdCompressor(level=10).compress(data)
+        else:
+            data = gzip.compress(data, compresslevel=6)
+
+        directory = self.root / shortcode
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{fetched_at.strftime(_TIMESTAMP_FORMAT)}.{source}{_SUFFIXES[self.compression]}"
+
+        # 기록 중인 파일이 재추출 대상에 섞이지 않도록 임시 파일에 쓴 뒤 교체
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.part', delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+        return path
+
+    def pages(self, shortcode=None, latest_only=False):
+        """저장된 페이지 목록 (shortcode, 수집 시각 순)
+
+        Args:
+            shortcode: 특정 게시물만 조회
+            latest_only: 게시물마다 가장 최근 페이지만 반환
+        """
+        if shortcode:
+            directories = [self.root / shortcode]
+        else:
+            directories = sorted(self.root.iterdir()) if self.root.exists() else []
+        for directory in directories:
+            if not directory.is_dir():
+                continue
+            files = sorted(path for path in directory.iterdir() if path.name.endswith(tuple(_SUFFIXES.values())))
+            for path in (files[-1:] if latest_only else files):
+                yield ArchivedPage(path)
+
+
+def extract_archived_page(page, engine=None):
+    """아카이브된 페이지 하나를 현재 추출 규칙으로 다시 추출"""
+    from scraping.extraction import extract_content
+    from scraping.http_fetcher import extract_post
+
+    html = page.read()
+    if page.source == 'http':
+        extracted = extract_post(html)
+    else:
+        extracted = extract_content(html, engine)
+
+    return {
+        'shortcode': page.shortcode,
+        'fetched_at': page.fetched_at.isoformat(),
+        'source': page.source,
+        'text': ' '.join(extracted['text_content']),
+        'image_count': extracted['image_count'],
+        'media_urls': extracted.get('media_urls', []),
+    }
+
+
+def _replay_worker(args):
+    path, engine = args
+    page = ArchivedPage(path)
+    try:
+        return extract_archived_page(page, engine)
+    except Exception as e:
+        return {'shortcode': page.shortcode, 'fetched_at': page.fetched_at.isoformat(), 'error': str(e)}
+
+
+def replay(archive, engine=None, latest_only=True, workers=None, chunksize=64):
+    """브라우저/네트워크 없이 아카이브 전체를 다시 추출
+
+    Args:
+        archive: PageArchive
+        engine: 브라우저 페이지에 사용할 추출 엔진
+        latest_only: 게시물마다 가장 최근 페이지만 사용
+        workers: 추출 프로세스 수 (1이면 현재 프로세스에서 실행)
+        chunksize: 프로세스에 한 번에 넘길 페이지 수
+
+    Yields:
+        페이지별 추출 결과 (아카이브 순서)
+    """
+    tasks = ((str(page.path), engine) for page in archive.pages(latest_only=latest_only))
+    if workers == 1:
+        yield from map(_replay_worker, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_replay_worker, tasks, chunksize=chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="아카이브된 페이지 재추출")
+    parser.add_argument('root', help="아카이브 디렉토리")
+    parser.add_argument('--output', help="결과를 저장할 JSON Lines 파일 (기본값: 표준 출력)")
+    parser.add_argument('--engine', help="브라우저 페이지 추출 엔진 (lxml 또는 bs4)")
+    parser.add_argument('--workers', type=int, help="추출 프로세스 수")
+    parser.add_argument('--all-versions', action='store_true', help="게시물마다 모든 수집본을 재추출")
+    args = parser.parse_args()
+
+    archive = PageArchive(args.root)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        count = 0
+        for result in replay(archive, args.engine, not args.all_versions, args.workers):
+            output.write(json.dumps(result, ensure_ascii=False) + '\n')
+            count += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    logger.info(f"페이지 {count}개 재추출 완료")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
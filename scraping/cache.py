@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.getenv('SCRAPER_CACHE_PATH', '')
+DEFAULT_TTL = float(os.getenv('SCRAPER_CACHE_TTL', str(6 * 60 * 60)))
+DEFAULT_MAX_ENTRIES = int(os.getenv('SCRAPER_CACHE_MAX_ENTRIES', '10000'))
+
+SHORTCODE_PATTERN = re.compile(r'instagram\.com/(?:[^/?#]+/)?(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)')
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def extract_shortcode(url):
+    """게시물 URL에서 shortcode 추출 (/p/, /reel/ 등)"""
+    match = SHORTCODE_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def get_shared_cache():
+    """SCRAPER_CACHE_PATH가 설정된 경우 프로세스 공유 캐시 반환"""
+    global _shared_cache
+    if not DEFAULT_CACHE_PATH:
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ScrapeCache(DEFAULT_CACHE_PATH)
+        return _shared_cache
+
+
+class ScrapeCache:
+    """게시물 shortcode를 키로 하는 SQLite 기반 스크래핑 결과 캐시
+
+    TTL이 지난 항목은 조회 시 삭제되며, 최대 항목 수를 넘으면
+    가장 오래 조회되지 않은 항목부터 제거합니다 (LRU).
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if str(path) != ':memory:':
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS scrape_cache (
+                shortcode TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_scrape_cache_accessed ON scrape_cache (accessed_at)')
+        self._conn.commit()
+
+    def get(self, url):
+        """캐시된 결과 반환 (없거나 만료된 경우 None)"""
+        shortcode = extract_shortcode(url)
+        if not shortcode:
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT result, created_at FROM scrape_cache WHERE shortcode = ?', (shortcode,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute('DELETE FROM scrape_cache WHERE shortcode = ?', (shortcode,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute('UPDATE scrape_cache SET accessed_at = ? WHERE shortcode = ?', (now, shortcode))
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, url, result):
+        """스크래핑 결과 저장"""
+        shortcode = extract_shortcode(url)
+        if not shortcode:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO scrape_cache (shortcode, result, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (shortcode, json.dumps(result, ensure_ascii=False), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def stats(self):
+        """캐시 적중 통계 반환"""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM scrape_cache').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+        }
+
+    def clear(self):
+        """모든 캐시 항목 삭제"""
+        with self._lock:
+            self._conn.execute('DELETE FROM scrape_cache')
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        overflow = self._conn.execute('SELECT COUNT(*) FROM scrape_cache').fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                'DELETE FROM scrape_cache WHERE shortcode IN '
+                '(SELECT shortcode FROM scrape_cache ORDER BY accessed_at ASC LIMIT ?)',
+                (overflow,)
+            )
+            logger.debug(f"캐시 항목 {overflow}개 제거")
@@ -0,0 +1,165 @@
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.getenv('SCRAPER_POOL_SIZE', '2'))
+DEFAULT_MAX_PAGES = int(os.getenv('SCRAPER_MAX_PAGES_PER_DRIVER', '50'))
+DEFAULT_CHECKOUT_TIMEOUT = float(os.getenv('SCRAPER_POOL_TIMEOUT', '60'))
+
+
+class PooledDriver:
+    """풀에서 관리되는 드라이버와 사용 정보"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+
+class DriverPool:
+    """크기가 제한된 WebDriver 풀
+
+    드라이버는 필요할 때 생성되고, 반납 시 상태를 확인하여 재사용합니다.
+    일정 페이지 수를 처리했거나 응답하지 않는 드라이버는 폐기 후 새로 생성합니다.
+    """
+
+    def __init__(self, driver_factory, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES,
+                 checkout_timeout=DEFAULT_CHECKOUT_TIMEOUT):
+        if size < 1:
+            raise ValueError("드라이버 풀 크기는 1 이상이어야 합니다.")
+        self._factory = driver_factory
+        self.size = size
+        self.max_pages = max_pages
+        self.checkout_timeout = checkout_timeout
+        # 가장 최근에 사용한 드라이버를 먼저 재사용 (LIFO)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {'created': 0, 'recycled': 0, 'checkouts': 0}
+
+    def checkout(self, timeout=None):
+        """사용 가능한 드라이버를 대여합니다."""
+        if self._closed:
+            raise RuntimeError("이미 종료된 드라이버 풀입니다.")
+
+        timeout = self.checkout_timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"드라이버 풀 대기 시간 초과 ({timeout}초)")
+
+        try:
+            entry = None
+            while entry is None:
+                try:
+                    candidate = self._idle.get_nowait()
+                except queue.Empty:
+                    entry = self._create()
+                    break
+                if self._is_healthy(candidate):
+                    entry = candidate
+                else:
+                    logger.warning("응답하지 않는 드라이버 폐기")
+                    self._destroy(candidate)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.stats['checkouts'] += 1
+        return entry
+
+    def checkin(self, entry, failed=False):
+        """대여한 드라이버를 반납합니다."""
+        try:
+            entry.pages += 1
+            if self._closed:
+                self._destroy(entry)
+            elif failed and not self._is_healthy(entry):
+                logger.warning("오류 후 응답하지 않는 드라이버 폐기")
+                self._destroy(entry)
+            elif entry.pages >= self.max_pages:
+                logger.info(f"드라이버 재생성 ({entry.pages} 페이지 처리)")
+                self._destroy(entry)
+            else:
+                self._idle.put(entry)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """with 문에서 드라이버를 대여하고 자동으로 반납합니다."""
+        entry = self.checkout(timeout)
+        failed = False
+        try:
+            yield entry.driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.checkin(entry, failed=failed)
+
+    def warm_up(self, count=None):
+        """첫 요청 전에 드라이버를 미리 실행하여 대기열에 넣습니다.
+
+        Args:
+            count: 미리 실행할 드라이버 수 (기본값: 풀 크기)
+
+        Returns:
+            새로 실행한 드라이버 수
+        """
+        count = min(count or self.size, self.size)
+        created = 0
+        while not self._closed and self.live_count < count:
+            # 대여 중인 드라이버와 합쳐 풀 크기를 넘지 않도록 슬롯을 잡고 생성
+            if not self._slots.acquire(blocking=False):
+                break
+            try:
+                self._idle.put(self._create())
+                created += 1
+            finally:
+                self._slots.release()
+        if created:
+            logger.info(f"드라이버 {created}개 미리 실행 완료")
+        return created
+
+    @property
+    def live_count(self):
+        """현재 실행 중인 드라이버 수 (대기 + 대여 중)"""
+        with self._lock:
+            return self.stats['created'] - self.stats['recycled']
+
+    def close(self):
+        """대기 중인 모든 드라이버를 종료합니다."""
+        self._closed = True
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._destroy(entry)
+
+    def _create(self):
+        driver = self._factory()
+        with self._lock:
+            self.stats['created'] += 1
+        return PooledDriver(driver)
+
+    def _destroy(self, entry):
+        with self._lock:
+            self.stats['recycled'] += 1
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            logger.debug(f"드라이버 종료 중 오류: {str(e)}")
+
+    @staticmethod
+    def _is_healthy(entry):
+        try:
+            return entry.driver.execute_script('return 1') == 1
+        except Exception:
+            return False
@@ -0,0 +1,120 @@
+"""chromedriver/Chrome 경로 확인 및 캐시
+
+ChromeDriverManager().install()은 버전 확인과 다운로드를 수행하므로
+요청 처리 중에 반복 호출하지 않도록 확인한 경로를 파일에 고정해 둡니다.
+
+빌드 단계에서 미리 확인하려면:
+    python -m scraping.driver_resolver
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = Path(os.getenv(
+    'SCRAPER_DRIVER_CACHE',
+    str(Path.home() / '.cache' / 'insta_analysis' / 'chromedriver.json')
+))
+
+CHROME_BINARY_NAMES = ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser']
+
+_resolved = None
+_resolve_lock = threading.Lock()
+
+
+def _find_chrome_binary():
+    binary = os.getenv('CHROME_BINARY')
+    if binary:
+        return binary
+    for name in CHROME_BINARY_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def _load_cache(cache_file):
+    try:
+        cached = json.loads(cache_file.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if not Path(cached.get('driver_path', '')).is_file():
+        return None
+    if cached.get('binary_path') and not Path(cached['binary_path']).is_file():
+        return None
+    return cached
+
+
+def _save_cache(cache_file, resolved):
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps(resolved, ensure_ascii=False, indent=2), encoding='utf-8')
+    except OSError as e:
+        logger.warning(f"드라이버 경로 캐시 저장 실패: {str(e)}")
+
+
+def _install_driver():
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        return ChromeDriverManager().install()
+    except Exception as e:
+        # 네트워크가 없는 환경에서는 PATH에 설치된 chromedriver 사용
+        path = shutil.which('chromedriver')
+        if path:
+            logger.warning(f"ChromeDriverManager 실패, PATH의 chromedriver 사용: {str(e)}")
+            return path
+        raise
+
+
+def resolve_chromedriver(refresh=False, cache_file=None, stale=None):
+    """chromedriver와 Chrome 실행 파일 경로를 확인 (프로세스당 한 번, 결과는 파일에 캐시)
+
+    우선순위: CHROMEDRIVER_PATH 환경 변수 > 캐시 파일 > ChromeDriverManager > PATH
+
+    Args:
+        refresh: True이면 캐시를 무시하고 다시 확인
+        cache_file: 캐시 파일 경로 (기본값: SCRAPER_DRIVER_CACHE)
+        stale: refresh할 때 이전에 반환한 이 결과가 아직 현재 값인 경우에만 다시 확인
+            (여러 스레드가 같은 드라이버로 실패해도 한 번만 확인)
+
+    Returns:
+        driver_path, binary_path 키를 가진 딕셔너리
+    """
+    global _resolved
+    cache_file = Path(cache_file) if cache_file else DEFAULT_CACHE_FILE
+
+    with _resolve_lock:
+        if _resolved and (not refresh or (stale is not None and _resolved is not stale)):
+            return _resolved
+
+        env_path = os.getenv('CHROMEDRIVER_PATH')
+        if env_path:
+            _resolved = {'driver_path': env_path, 'binary_path': _find_chrome_binary()}
+            return _resolved
+
+        cached = None if refresh else _load_cache(cache_file)
+        if cached:
+            logger.info(f"캐시된 chromedriver 사용: {cached['driver_path']}")
+            _resolved = cached
+            return _resolved
+
+        started = time.perf_counter()
+        resolved = {
+            'driver_path': _install_driver(),
+            'binary_path': _find_chrome_binary(),
+            'resolved_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        logger.info(f"chromedriver 확인 완료 ({time.perf_counter() - started:.1f}초): {resolved['driver_path']}")
+        _save_cache(cache_file, resolved)
+        _resolved = resolved
+        return _resolved
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(resolve_chromedriver(refresh=True), ensure_ascii=False, indent=2))
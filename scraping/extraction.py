@@ -0,0 +1,178 @@
+import logging
+import os
+
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# 추출 엔진: lxml (스트리밍 파서) 또는 bs4 (기존 BeautifulSoup 방식)
+DEFAULT_ENGINE = os.getenv('SCRAPER_EXTRACT_ENGINE', 'lxml')
+
+# 의미 있는 텍스트로 간주할 최소 길이
+MIN_TEXT_LENGTH = 10
+
+# article 안에서 텍스트를 수집할 태그
+_TEXT_TAGS = frozenset(['span', 'h1', 'p'])
+# 텍스트로 취급하지 않는 태그 (BeautifulSoup get_text()와 동일)
+_RAW_TEXT_TAGS = frozenset(['script', 'style', 'template'])
+# 게시물 데이터가 들어 있을 가능성이 있는 스크립트 표식
+_SCRIPT_MARKERS = ('display_url', 'video_url', '"caption"')
+
+
+class _PostCollector:
+    """트리를 만들지 않고 파서 이벤트에서 필요한 값만 수집하는 lxml 파서 타깃"""
+
+    def __init__(self):
+        self.article_texts = []
+        self.alt_texts = []
+        self.image_count = 0
+        self.meta = {}
+        self.scripts = []
+        self._article_depth = 0
+        self._article_seen = False
+        self._open = []
+        self._buffer = []
+        self._raw_depth = 0
+        self._script = None
+
+    def start(self, tag, attrib):
+        self._flush()
+
+        if tag == 'article':
+            # BeautifulSoup의 soup.find('article')처럼 첫 번째 article만 사용
+            if self._article_depth or not self._article_seen:
+                self._article_depth += 1
+                self._article_seen = True
+        elif tag == 'img':
+            self.image_count += 1
+            alt = attrib.get('alt', '')
+            if len(alt) > MIN_TEXT_LENGTH:
+                self.alt_texts.append(alt)
+        elif tag == 'meta':
+            key = attrib.get('property') or attrib.get('name')
+            if key and key not in self.meta:
+                self.meta[key] = attrib.get('content', '')
+
+        if tag in _RAW_TEXT_TAGS:
+            self._raw_depth += 1
+            if tag == 'script':
+                self._script = (attrib.get('type', ''), [])
+        elif self._article_depth and tag in _TEXT_TAGS:
+            # 중첩 요소도 시작 태그 순서대로 결과에 들어가도록 자리를 미리 확보
+            self._open.append((tag, len(self.article_texts), []))
+            self.article_texts.append(None)
+
+    def end(self, tag):
+        self._flush()
+
+        if tag in _RAW_TEXT_TAGS:
+            self._raw_depth -= 1
+            if tag == 'script' and self._script is not None:
+                script_type, parts = self._script
+                self._script = None
+                body = ''.join(parts)
+                if script_type == 'application/ld+json' or any(marker in body for marker in _SCRIPT_MARKERS):
+                    self.scripts.append((script_type, body))
+        elif self._open and self._open[-1][0] == tag:
+            _, slot, parts = self._open.pop()
+            self.article_texts[slot] = ''.join(parts)
+        elif tag == 'article' and self._article_depth:
+            self._article_depth -= 1
+
+    def data(self, data):
+        if self._script is not None:
+            self._script[1].append(data)
+        elif not self._raw_depth:
+            self._buffer.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        self.article_texts = [text for text in self.article_texts if text and len(text) > MIN_TEXT_LENGTH]
+        return self
+
+    def _flush(self):
+        # 하나의 텍스트 노드가 여러 data 이벤트로 나뉘어 올 수 있으므로 모아서 처리
+        if not self._buffer:
+            return
+        text = ''.join(self._buffer).strip()
+        self._buffer.clear()
+        if text:
+            for _, _, parts in self._open:
+                parts.append(text)
+
+
+def parse_page(html):
+    """게시물 페이지에서 필요한 값만 한 번의 스트리밍 파싱으로 수집
+
+    Args:
+        html: 페이지 HTML
+
+    Returns:
+        article_texts, alt_texts, image_count, meta, scripts 속성을 가진 수집 결과
+    """
+    parser = etree.HTMLParser(target=_PostCollector())
+    parser.feed(html)
+    return parser.close()
+
+
+def _extract_with_lxml(html):
+    page = parse_page(html)
+    text_content = page.article_texts + page.alt_texts
+    if not text_content and page.meta.get('og:description'):
+        text_content.append(page.meta['og:description'])
+    return {'text_content': text_content, 'image_count': page.image_count}
+
+
+def _extract_with_bs4(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'lxml')
+    text_content = []
+
+    # 1. article 내용 추출
+    article = soup.find('article')
+    if article:
+        for elem in article.find_all(['span', 'h1', 'p']):
+            text = elem.get_text(strip=True)
+            if len(text) > MIN_TEXT_LENGTH:
+                text_content.append(text)
+
+    # 2. 이미지 alt 텍스트 추출
+    images = soup.find_all('img')
+    for img in images:
+        alt_text = img.get('alt', '')
+        if alt_text and len(alt_text) > MIN_TEXT_LENGTH:
+            text_content.append(alt_text)
+
+    # 3. 본문이 렌더링되지 않은 경우 임베디드 메타 설명 사용
+    if not text_content:
+        meta = soup.find('meta', attrs={'property': 'og:description'})
+        if meta and meta.get('content'):
+            text_content.append(meta['content'])
+
+    return {'text_content': text_content, 'image_count': len(images)}
+
+
+EXTRACTORS = {
+    'lxml': _extract_with_lxml,
+    'bs4': _extract_with_bs4,
+}
+
+
+def extract_content(html, engine=None):
+    """페이지 HTML에서 게시물 텍스트와 이미지 수 추출
+
+    Args:
+        html: 페이지 HTML
+        engine: 'lxml' (기본값) 또는 'bs4'
+
+    Returns:
+        text_content (텍스트 목록), image_count 키를 가진 딕셔너리
+    """
+    engine = engine or DEFAULT_ENGINE
+    if engine not in EXTRACTORS:
+        raise ValueError(f"지원하지 않는 추출 엔진: {engine}")
+    return EXTRACTORS[engine](html)
@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scraping.extraction import parse_page
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+HTTP_POOL_SIZE = int(os.getenv('SCRAPER_HTTP_POOL_SIZE', '10'))
+
+# 임베디드 JSON에서 미디어 URL과 캡션을 찾기 위한 패턴
+_MEDIA_URL_PATTERN = re.compile(r'"(?:display_url|video_url)"\s*:\s*"((?:[^"\\]|\\.)+)"')
+_CAPTION_PATTERN = re.compile(r'"caption"\s*:\s*\{[^{}]*?"text"\s*:\s*"((?:[^"\\]|\\.)*)"')
+# og:description 형식: '좋아요 12개, 댓글 3개 - user님, 2024년 1월 1일: "캡션"'
+_OG_CAPTION_PATTERN = re.compile(r':\s*"(.*)"\.?\s*$', re.DOTALL)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class HttpFetchError(Exception):
+    """브라우저 없이 게시물을 가져오지 못한 경우"""
+
+
+def get_session():
+    """프로세스 전체에서 공유하는 keep-alive HTTP 세션 반환"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'User-Agent': USER_AGENT,
+                'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8',
+            })
+            _session = session
+        return _session
+
+
+def _decode_json_string(value):
+    try:
+        return json.loads(f'"{value}"')
+    except ValueError:
+        return value
+
+
+def _iter_ld_json(scripts):
+    for script_type, body in scripts:
+        if script_type != 'application/ld+json':
+            continue
+        try:
+            data = json.loads(body)
+        except ValueError:
+            continue
+        for item in (data if isinstance(data, list) else [data]):
+            if isinstance(item, dict):
+                yield item
+
+
+def _collect_urls(value, urls):
+    if isinstance(value, str):
+        urls.append(value)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_urls(item, urls)
+    elif isinstance(value, dict):
+        _collect_urls(value.get('url') or value.get('contentUrl'), urls)
+
+
+def parse_post_html(html):
+    """서버 렌더링된 게시물 HTML에서 캡션, 이미지 alt 텍스트, 미디어 URL 추출
+
+    Args:
+        html: 게시물 페이지 HTML
+
+    Returns:
+        caption, alt_texts, media_urls, image_count 키를 가진 딕셔너리
+    """
+    page = parse_page(html)
+
+    def meta(name):
+        return page.meta.get(name, '').strip()
+
+    caption = ''
+    media_urls = []
+
+    # 1. 구조화 데이터 (ld+json)
+    for item in _iter_ld_json(page.scripts):
+        caption = caption or item.get('articleBody') or item.get('caption') or ''
+        for key in ('image', 'video', 'contentUrl'):
+            _collect_urls(item.get(key), media_urls)
+
+    # 2. 임베디드 게시물 JSON
+    for _, body in page.scripts:
+        if not caption:
+            match = _CAPTION_PATTERN.search(body)
+            if match:
+                caption = _decode_json_string(match.group(1))
+        media_urls.extend(_decode_json_string(url) for url in _MEDIA_URL_PATTERN.findall(body))
+
+    # 3. 메타 태그
+    if not caption:
+        description = meta('og:description') or meta('description')
+        match = _OG_CAPTION_PATTERN.search(description)
+        caption = match.group(1) if match else description
+    for name in ('og:image', 'og:video'):
+        if meta(name):
+            media_urls.append(meta(name))
+
+    return {
+        'caption': caption.strip(),
+        'alt_texts': page.alt_texts,
+        'media_urls': list(dict.fromkeys(url for url in media_urls if url)),
+        'image_count': page.image_count,
+    }
+
+
+def extract_post(html):
+    """서버 응답 HTML에서 InstagramScraper 결과에 들어갈 텍스트와 미디어 정보 추출
+
+    Returns:
+        text_content (캡션과 alt 텍스트 목록), image_count, media_urls 키를 가진 딕셔너리
+    """
+    data = parse_post_html(html)
+    return {
+        'text_content': ([data['caption']] if data['caption'] else []) + data['alt_texts'],
+        'image_count': data['image_count'],
+        'media_urls': data['media_urls'],
+    }
+
+
+class HttpPostFetcher:
+    """브라우저 없이 HTTP 요청만으로 게시물 컨텐츠를 가져오는 클래스"""
+
+    def __init__(self, session=None, timeout=10, base_url=None, archive=None):
+        """
+        Args:
+            session: 사용할 requests 세션 (기본값: 공유 keep-alive 세션)
+            timeout: 요청 타임아웃 (초)
+            base_url: 요청을 보낼 호스트 재지정 (테스트용 로컬 서버 등)
+            archive: 받은 HTML을 저장할 PageArchive
+        """
+        self.session = session or get_session()
+        self.timeout = timeout
+        self.base_url = base_url
+        self.archive = archive
+
+    def fetch(self, url):
+        """게시물 페이지 HTML 다운로드"""
+        return self._request(url).text
+
+    def _request(self, url):
+        if self.base_url:
+            base = urlsplit(self.base_url)
+            url = urlunsplit(urlsplit(url)._replace(scheme=base.scheme, netloc=base.netloc))
+
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        if '/accounts/login' in response.url:
+            raise HttpFetchError("로그인 페이지로 리다이렉트되었습니다.")
+        # charset이 명시되지 않은 응답은 ISO-8859-1로 해석되므로 UTF-8로 지정
+        if 'charset' not in response.headers.get('Content-Type', ''):
+            response.encoding = 'utf-8'
+        return response
+
+    def scrape(self, url):
+        """게시물을 가져와 InstagramScraper.scrape()와 같은 형식의 결과 반환
+
+        Raises:
+            HttpFetchError: 페이지에서 텍스트 컨텐츠를 찾지 못한 경우
+        """
+        timings = {}
+
+        started = time.perf_counter()
+        response = self._request(url)
+        html = response.text
+        timings['fetch'] = time.perf_counter() - started
+
+        # 추출 규칙이 바뀌었을 때 다시 추출할 수 있도록 추출 전에 원본 저장
+        if self.archive:
+            self.archive.record(url, html, source='http')
+
+        started = time.perf_counter()
+        extracted = extract_post(html)
+        timings['extract'] = time.perf_counter() - started
+
+        if not extracted['text_content']:
+            raise HttpFetchError("HTML에서 게시물 텍스트를 찾을 수 없습니다.")
+
+        return {
+            'url': url,
+            'text': ' '.join(extracted['text_content']),
+            'image_count': extracted['image_count'],
+            'media_urls': extracted['media_urls'],
+            'source': 'http',
+            # 압축된 상태로 네트워크에서 읽은 바이트 수
+            'bytes_transferred': response.raw.tell() if response.raw else len(response.content),
+            'timings': {phase: round(elapsed, 3) for phase, elapsed in timings.items()},
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
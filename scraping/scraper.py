@@ -1,107 +1,332 @@
+import atexit
+import json
 import logging
+import os
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from itertools import islice
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import (TimeoutException, NoSuchElementException, SessionNotCreatedException,
+                                        WebDriverException)
+from scraping.archive import get_shared_archive
+from scraping.cache import get_shared_cache
+from scraping.driver_pool import DriverPool
+from scraping.driver_resolver import resolve_chromedriver
+from scraping.extraction import extract_content
+from scraping.http_fetcher import HttpPostFetcher
 
 logger = logging.getLogger(__name__)
 
-class InstagramScraper:
-    def __init__(self):
-        self.driver = None
-        self.setup_driver()
+# 스크래핑 모드: auto (HTTP 우선, 실패 시 Chrome), http, browser
+DEFAULT_MODE = os.getenv('SCRAPER_MODE', 'auto')
+
+# 단계별 기본 시간 제한 (초)
+DEFAULT_TIMEOUTS = {'navigate': 15, 'ready': 10}
+# 추출(파싱) 단계가 이보다 오래 걸리면 경고 (파싱은 중단할 수 없으므로 제한이 아닌 경고 기준)
+EXTRACT_WARN_SECONDS = 5
+
+# 게시물 본문(article)이 렌더링되면 준비 완료로 판단
+# (og:description은 서버 렌더링 HTML에 이미 있으므로 eager 모드에서는 준비 신호가 될 수 없음)
+READY_SCRIPT = "return !!document.querySelector('article');"
+# 본문 대기 시간이 초과된 경우 대체로 사용할 수 있는 게시물 설명이 있는지 확인
+FALLBACK_SCRIPT = """return !!document.querySelector('meta[property="og:description"]');"""
+
+# 리소스 차단 모드 기본값 (텍스트와 alt 속성만 필요하므로 미디어/폰트/트래킹 요청 생략)
+DEFAULT_BLOCK_RESOURCES = os.getenv('SCRAPER_BLOCK_RESOURCES', '0') == '1'
+
+# 리소스 차단 모드에서 요청하지 않을 URL 패턴 (Network.setBlockedURLs 와일드카드 형식)
+BLOCKED_URL_PATTERNS = [
+    # 이미지/비디오
+    '*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.heic*', '*.svg*', '*.ico*',
+    '*.mp4*', '*.m4v*', '*.webm*', '*.m3u8*',
+    # 폰트
+    '*.woff*', '*.ttf*', '*.otf*',
+    # 트래킹/로깅
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*connect.facebook.net*', '*/logging_client_events*', '*/ajax/bz*',
+]
+
+_shared_pools = {}
+_shared_pool_lock = threading.Lock()
+
 
-    def setup_driver(self):
+def create_driver(block_resources=False):
+    """headless Chrome 드라이버 생성
+
+    Args:
+        block_resources: True이면 이미지, 비디오, 폰트, 트래킹 스크립트 요청을 차단
+    """
+    try:
+        chrome_options = Options()
+        # DOMContentLoaded 시점에 driver.get()이 반환되도록 설정 (이미지 등 로드 완료를 기다리지 않음)
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920x1080')
+        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        # 전송량 측정을 위해 네트워크 이벤트를 performance 로그로 수집
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        if block_resources:
+            chrome_options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images': 2,
+            })
+
+        # 드라이버/Chrome 경로는 프로세스당 한 번 확인하여 캐시된 경로 사용
+        resolved = resolve_chromedriver()
         try:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920x1080')
-            chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            logger.info("Chrome 드라이버 초기화 성공")
-        except Exception as e:
-            logger.error(f"드라이버 설정 실패: {str(e)}")
-            raise
+            driver = _start_chrome(chrome_options, resolved)
+        except SessionNotCreatedException as e:
+            # Chrome이 자동 업데이트되면 캐시에 고정된 chromedriver와 버전이 맞지 않으므로 다시 확인하여 한 번 재시도
+            refreshed = resolve_chromedriver(refresh=True, stale=resolved)
+            if (refreshed['driver_path'], refreshed.get('binary_path')) == (resolved['driver_path'], resolved.get('binary_path')):
+                raise
+            logger.warning(f"Chrome 세션 생성 실패, 다시 확인한 chromedriver로 재시도: {str(e)}")
+            driver = _start_chrome(chrome_options, refreshed)
+
+        if block_resources:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+
+        logger.info(f"Chrome 드라이버 초기화 성공 (리소스 차단: {block_resources})")
+        return driver
+    except Exception as e:
+        logger.error(f"드라이버 설정 실패: {str(e)}")
+        raise
+
+
+def _start_chrome(chrome_options, resolved):
+    if resolved.get('binary_path'):
+        chrome_options.binary_location = resolved['binary_path']
+    return webdriver.Chrome(service=Service(resolved['driver_path']), options=chrome_options)
+
+
+def get_shared_pool(block_resources=DEFAULT_BLOCK_RESOURCES):
+    """프로세스 전체에서 공유하는 드라이버 풀 반환 (드라이버 설정별로 하나씩)"""
+    with _shared_pool_lock:
+        pool = _shared_pools.get(block_resources)
+        if pool is None:
+            pool = DriverPool(partial(create_driver, block_resources=block_resources))
+            atexit.register(pool.close)
+            _shared_pools[block_resources] = pool
+        return pool
+
+
+def warm_up_shared_pool(count=None, block_resources=DEFAULT_BLOCK_RESOURCES):
+    """첫 요청 전에 공유 풀의 드라이버를 백그라운드에서 미리 실행"""
+    pool = get_shared_pool(block_resources)
+    thread = threading.Thread(target=pool.warm_up, args=(count,), name='driver-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+def _drain_transferred_bytes(driver):
+    """performance 로그를 비우고 그 사이 네트워크로 전송된 바이트 수 반환"""
+    total = 0
+    try:
+        entries = driver.get_log('performance')
+    except WebDriverException as e:
+        logger.debug(f"performance 로그를 읽을 수 없습니다: {str(e)}")
+        return None
+    for entry in entries:
+        message = json.loads(entry['message'])['message']
+        if message.get('method') == 'Network.loadingFinished':
+            total += int(message['params'].get('encodedDataLength', 0))
+    return total
+
+
+class InstagramScraper:
+    def __init__(self, pool=None, timeouts=None, mode=None, http_fetcher=None,
+                 block_resources=DEFAULT_BLOCK_RESOURCES, cache=None, extract_engine=None,
+                 archive=None):
+        """
+        Args:
+            pool: 사용할 드라이버 풀 (기본값: 프로세스 공유 풀)
+            timeouts: 단계별 시간 제한 재정의 (navigate, ready)
+            mode: 'auto' (HTTP 우선, 실패 시 Chrome), 'http', 'browser'
+            http_fetcher: 브라우저 없이 게시물을 가져올 HttpPostFetcher
+            block_resources: 공유 풀 사용 시 이미지/폰트/트래킹 요청 차단 여부
+            cache: 결과를 저장할 ScrapeCache (기본값: SCRAPER_CACHE_PATH 설정 시 공유 캐시)
+            extract_engine: HTML 추출 엔진 ('lxml' 또는 'bs4')
+            archive: 가져온 페이지 원본을 저장할 PageArchive (기본값: SCRAPER_ARCHIVE_DIR 설정 시 공유 아카이브)
+        """
+        self.mode = mode or DEFAULT_MODE
+        if self.mode not in ('auto', 'http', 'browser'):
+            raise ValueError(f"지원하지 않는 스크래핑 모드: {self.mode}")
+        # 드라이버는 풀에서 대여하므로 요청마다 브라우저를 새로 띄우지 않습니다.
+        # Chrome은 실제로 드라이버를 대여할 때 처음 실행됩니다.
+        self.pool = pool or get_shared_pool(block_resources)
+        # scrape_many의 동시 작업 수가 풀보다 커도 브라우저 작업은 풀 크기만큼만 대여를 시도하고
+        # 나머지는 대여 시간 제한 없이 차례를 기다림
+        self._browser_slots = threading.BoundedSemaphore(self.pool.size)
+        self.archive = archive or get_shared_archive()
+        self.http_fetcher = http_fetcher or HttpPostFetcher(archive=self.archive)
+        self.cache = cache or get_shared_cache()
+        self.extract_engine = extract_engine
+        # 단계별 시간 제한 (초): navigate, ready
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
 
     def scrape(self, url):
         try:
-            logger.info("스크래핑 프로세스 시작...")
-            
-            if not self._is_valid_instagram_url(url):
-                raise ValueError("유효하지 않은 Instagram URL입니다.")
+            return self._scrape(url)
+        except Exception as e:
+            logger.error(f"스크래핑 중 오류 발생: {str(e)}")
+            return None
+
+    def scrape_many(self, urls, concurrency=4):
+        """여러 URL을 동시에 스크래핑하여 완료되는 순서대로 반환
 
-            # URL 정규화
-            if '?' in url:
-                url = url.split('?')[0]
+        개별 URL의 실패는 결과의 error 항목으로 전달되며 나머지 작업은 계속 진행됩니다.
+        Chrome이 필요한 URL은 드라이버 풀 크기만큼만 동시에 처리되고, 나머지는
+        드라이버 대여 시간 제한에 걸리지 않도록 스크래퍼 안에서 순서를 기다립니다.
 
-            # 페이지 로드
-            self.driver.get(url)
-            time.sleep(3)  # 페이지 로드 대기
+        Args:
+            urls: 스크래핑할 URL 목록 (이터러블)
+            concurrency: 동시에 처리할 최대 URL 수
 
-            # 컨텐츠 로드 대기
+        Yields:
+            index (입력 순서), url, result, error 키를 가진 딕셔너리
+        """
+        if concurrency < 1:
+            raise ValueError("동시 처리 수는 1 이상이어야 합니다.")
+
+        pending = {}
+        url_iter = iter(enumerate(urls))
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='scraper') as executor:
+            try:
+                while True:
+                    # 대기 중인 작업 수를 제한하여 대량 URL 목록도 일정한 메모리로 처리
+                    for index, url in islice(url_iter, concurrency * 2 - len(pending)):
+                        pending[executor.submit(self._scrape, url)] = (index, url)
+                    if not pending:
+                        break
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index, url = pending.pop(future)
+                        try:
+                            yield {'index': index, 'url': url, 'result': future.result(), 'error': None}
+                        except Exception as e:
+                            logger.warning(f"스크래핑 실패 ({url}): {str(e)}")
+                            yield {'index': index, 'url': url, 'result': None, 'error': str(e)}
+            finally:
+                # 호출 측이 중간에 반복을 멈춘 경우 시작되지 않은 작업 취소
+                for future in pending:
+                    future.cancel()
+
+    def _scrape(self, url):
+        logger.info("스크래핑 프로세스 시작...")
+        
+        if not self._is_valid_instagram_url(url):
+            raise ValueError("유효하지 않은 Instagram URL입니다.")
+
+        # URL 정규화
+        if '?' in url:
+            url = url.split('?')[0]
+
+        # 최근에 수집한 게시물은 캐시에서 반환
+        if self.cache:
+            cached = self.cache.get(url)
+            if cached:
+                logger.info("캐시된 스크래핑 결과 사용")
+                return {**cached, 'cached': True}
+
+        result = self._fetch(url)
+        if self.cache:
+            self.cache.set(url, result)
+        return result
+
+    def _fetch(self, url):
+        # 1. 브라우저 없이 HTTP 요청으로 시도
+        if self.mode in ('auto', 'http'):
+            try:
+                result = self.http_fetcher.scrape(url)
+                logger.info(f"HTTP 컨텐츠 추출 성공: {len(result['text'])} 글자")
+                return result
+            except Exception as e:
+                if self.mode == 'http':
+                    raise
+                logger.info(f"HTTP 수집 실패, 브라우저로 재시도: {str(e)}")
+
+        # 2. Chrome으로 페이지 렌더링
+        with self._browser_slots:
+            result = self._scrape_browser(url)
+
+        # 컨텐츠 유효성 검사
+        if not result['text']:
+            raise ValueError("텍스트 컨텐츠를 찾을 수 없습니다")
+
+        logger.info(f"컨텐츠 추출 성공: {len(result['text'])} 글자")
+        return result
+
+    def _scrape_browser(self, url):
+        """풀에서 대여한 Chrome으로 게시물 컨텐츠 추출"""
+        timings = {}
+
+        # 풀에서 드라이버를 대여하여 페이지 로드
+        with self.pool.driver() as driver:
+            # 이전 스크래핑에서 남은 네트워크 로그 제거
+            _drain_transferred_bytes(driver)
+
+            started = time.perf_counter()
+            self._navigate(driver, url)
+            timings['navigate'] = time.perf_counter() - started
+
+            # 게시물 본문이 렌더링되는 즉시 진행
+            started = time.perf_counter()
             try:
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "article"))
+                WebDriverWait(driver, self.timeouts['ready'], poll_frequency=0.1).until(
+                    lambda d: d.execute_script(READY_SCRIPT)
                 )
             except TimeoutException:
-                logger.warning("페이지 로드 타임아웃")
-
-            # HTML 파싱
-            soup = BeautifulSoup(self.driver.page_source, 'lxml')
-            
-            # 텍스트 컨텐츠 추출
-            text_content = []
-            
-            # 1. article 내용 추출
-            article = soup.find('article')
-            if article:
-                # 게시물 텍스트
-                text_elements = article.find_all(['span', 'h1', 'p'])
-                for elem in text_elements:
-                    text = elem.get_text(strip=True)
-                    if len(text) > 10:  # 의미 있는 텍스트만 추출
-                        text_content.append(text)
-
-            # 2. 이미지 alt 텍스트 추출
-            images = soup.find_all('img')
-            for img in images:
-                alt_text = img.get('alt', '')
-                if alt_text and len(alt_text) > 10:
-                    text_content.append(alt_text)
-
-            # 결과 생성
-            result = {
-                'url': url,
-                'text': ' '.join(text_content),
-                'image_count': len(images),
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-            }
-
-            # 컨텐츠 유효성 검사
-            if not result['text']:
-                logger.error("텍스트 컨텐츠를 찾을 수 없습니다")
-                return None
-
-            logger.info(f"컨텐츠 추출 성공: {len(result['text'])} 글자")
-            return result
+                if driver.execute_script(FALLBACK_SCRIPT):
+                    logger.warning("게시물 본문 로드 타임아웃, og:description으로 대체")
+                else:
+                    logger.warning("컨텐츠 로드 타임아웃")
+            timings['ready'] = time.perf_counter() - started
 
-        except Exception as e:
-            logger.error(f"스크래핑 중 오류 발생: {str(e)}")
-            return None
-        finally:
-            if self.driver:
-                self.driver.quit()
+            started = time.perf_counter()
+            page_source = driver.page_source
+            bytes_transferred = _drain_transferred_bytes(driver)
+
+        if self.archive:
+            self.archive.record(url, page_source, source='browser')
+
+        # HTML 파싱 (드라이버 반납 후 진행)
+        extracted = extract_content(page_source, self.extract_engine)
+        text_content = extracted['text_content']
+
+        timings['extract'] = time.perf_counter() - started
+        if timings['extract'] > EXTRACT_WARN_SECONDS:
+            logger.warning(f"추출 단계가 오래 걸렸습니다: {timings['extract']:.2f}초")
+
+        # 결과 생성
+        result = {
+            'url': url,
+            'text': ' '.join(text_content),
+            'image_count': extracted['image_count'],
+            'source': 'browser',
+            'bytes_transferred': bytes_transferred,
+            'timings': {phase: round(elapsed, 3) for phase, elapsed in timings.items()},
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+        return result
+
+    def _navigate(self, driver, url):
+        """페이지 이동 (DOMContentLoaded 시점에 반환, 시간 예산 초과 시 로드 중단)"""
+        driver.set_page_load_timeout(self.timeouts['navigate'])
+        try:
+            driver.get(url)
+        except TimeoutException:
+            logger.warning("페이지 이동 타임아웃, 현재까지 로드된 내용으로 진행")
+            driver.execute_script('window.stop();')
 
     def _is_valid_instagram_url(self, url):
         """Instagram URL 유효성 검사"""
@@ -0,0 +1,769 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pytest
+
+
+def make_llama_analyzer(**attributes):
+    """모델을 로드하지 않은 LlamaAnalyzer (토크나이저/모델 등 필요한 속성만 가짜로 지정)"""
+    from models.llama_model import GenerationTelemetry, LlamaAnalyzer
+
+    analyzer = LlamaAnalyzer.__new__(LlamaAnalyzer)
+    analyzer._entry = type("Entry", (), {"tokenizer_lock": threading.Lock()})()
+    analyzer.device = "cpu"
+    analyzer.label_scoring = False
+    analyzer.telemetry = GenerationTelemetry()
+    analyzer.prefix_cache_size = 0
+    analyzer._prefix_cache = OrderedDict()
+    analyzer._prefix_cache_lock = threading.Lock()
+    analyzer.prefix_cache_stats = {"hits": 0, "misses": 0, "reused_tokens": 0}
+    for name, value in attributes.items():
+        setattr(analyzer, name, value)
+    return analyzer
+
+
+def test_model_registry_loads_each_model_once_across_threads(monkeypatch):
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from models.registry import ModelRegistry
+
+    registry = ModelRegistry()
+    loads = []
+
+    def fake_load(model_path, dtype, device, quantization=None):
+        loads.append((model_path, dtype, device, quantization))
+        time.sleep(0.05)
+        return object()
+
+    monkeypatch.setattr(registry, "_load", fake_load)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get("tiny", torch.float32, "cpu")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(result is results[0] for result in results)
+    assert registry.get("tiny", torch.bfloat16, "cpu") is not results[0]
+    assert len(loads) == 2
+    assert registry.get("tiny", torch.float32, "cpu", "int8") is not results[0]
+    assert len(loads) == 3
+
+
+def test_combined_response_parsing_keeps_only_valid_sections():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    analyzer = make_llama_analyzer()
+
+    parsed = analyzer._parse_combined_response(
+        "키워드: 제주, 바다, 여행\n요약: 제주 바다에서 보낸 오후입니다.\n감정: 긍정적입니다</assistant>", 5
+    )
+    assert parsed == {'keywords': ['제주', '바다', '여행'], 'summary': "제주 바다에서 보낸 오후입니다.", 'sentiment': '긍정'}
+
+    # 형식이 깨진 항목은 결과에서 빠지고 개별 분석으로 대체됨
+    assert analyzer._parse_combined_response("키워드: 제주\n감정: 잘 모르겠음", 5) == {'keywords': ['제주']}
+
+
+def test_batch_generation_restores_input_order():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+
+    class FakeTokenizer:
+        def __call__(self, prompts, **kwargs):
+            return {"input_ids": [prompt.split() for prompt in prompts]}
+
+    analyzer = make_llama_analyzer(tokenizer=FakeTokenizer(), _batch_size_for=lambda sequence_length: 2)
+    batches = []
+
+    def fake_generate(prompts, max_new_tokens, temperature, task, stop):
+        batches.append(prompts)
+        return [f"{prompt} -> 답" for prompt in prompts]
+
+    analyzer._generate_padded = fake_generate
+
+    prompts = ["a", "b b b", "c c", "d d d d", "e"]
+    assert analyzer._generate_batch(prompts) == [f"{prompt} -> 답" for prompt in prompts]
+    # 긴 프롬프트부터 비슷한 길이끼리 묶음
+    assert batches == [["d d d d", "b b b"], ["c c", "a"], ["e"]]
+
+
+def test_label_scoring_picks_most_likely_label():
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from models.llama_model import SENTIMENT_LABELS
+
+    vocab = 64
+
+    def token_id(char):
+        return ord(char) % (vocab - 1) + 1
+
+    class FakeTokenizer:
+        pad_token_id = 0
+        eos_token_id = 0
+
+        def __call__(self, text, **kwargs):
+            return {"input_ids": [0] + [token_id(c) for c in text]}
+
+    class FakeModel:
+        """모든 위치에서 boosts에 지정한 토큰의 로짓을 높인 모델"""
+
+        def __init__(self, boosts):
+            self.boosts = boosts
+
+        def __call__(self, input_ids, attention_mask):
+            logits = torch.zeros(*input_ids.shape, vocab)
+            for char, value in self.boosts.items():
+                logits[..., token_id(char)] = value
+            return type("Output", (), {"logits": logits})()
+
+    analyzer = make_llama_analyzer(tokenizer=FakeTokenizer(), model=FakeModel({"부": 5.0}))
+
+    result = analyzer._score_labels("감정:", SENTIMENT_LABELS)
+    assert result["label"] == "부정"
+    assert set(result["probabilities"]) == set(SENTIMENT_LABELS)
+    assert sum(result["probabilities"].values()) == pytest.approx(1.0, abs=1e-3)
+
+    # 토큰당 확률이 더 높은 긴 레이블이 토큰 수가 적다는 이유로 지지 않음
+    analyzer.model = FakeModel({"나": 2.0, "가": 1.0})
+    assert analyzer._score_labels("답:", ["가", "나나나"])["label"] == "나나나"
+
+    # label_scoring 모드에서는 관련성도 생성 없이 레이블 점수로 분류
+    analyzer = make_llama_analyzer(tokenizer=FakeTokenizer(), model=FakeModel({"낮": 5.0}), label_scoring=True)
+    analyzer._generate_task = None
+    assert analyzer.analyze_content_relevance("제주 바다", "도시 야경") == "낮음"
+
+
+def test_long_text_summary_keeps_every_chunk(monkeypatch):
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    import models.llama_model as llama_model
+
+    class WordTokenizer:
+        def __call__(self, texts, **kwargs):
+            if isinstance(texts, str):
+                return {"input_ids": texts.split()}
+            return {"input_ids": [text.split() for text in texts]}
+
+        def decode(self, ids):
+            return " ".join(ids)
+
+    monkeypatch.setattr(llama_model, "MAX_PROMPT_TOKENS", 60)
+    analyzer = make_llama_analyzer(tokenizer=WordTokenizer())
+    batches = []
+
+    def fake_batch(prompts, max_new_tokens, task, stop):
+        batches.append(prompts)
+        # 청크의 첫 단어를 부분 요약으로 사용
+        return [f"<assistant>요약: {prompt.split(chr(10) * 2)[1].split()[0]}" for prompt in prompts]
+
+    analyzer._generate_batch = fake_batch
+    analyzer._generate_response = lambda prompt, max_new_tokens, task, stop: f"<assistant>요약: {prompt.split(chr(10) * 2)[1]}"
+
+    sentences = [f"문장{i} " + "단어 " * 8 + "입니다." for i in range(20)]
+    text = " ".join(sentences) + "\n\n해시태그: #끝"
+    summary = analyzer.summarize_text(text)
+
+    assert len(batches) == 1 and len(batches[0]) > 1
+    # 모든 청크가 요약되고 마지막 해시태그도 잘리지 않음
+    assert summary.split() == [prompt.split("\n\n")[1].split()[0] for prompt in batches[0]]
+    assert summary.split()[0] == "문장0" and "해시태그:" in summary.split()[-1]
+
+
+def test_stopping_rules_and_telemetry():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from models.llama_model import (GenerationTelemetry, _stop_after_combined, _stop_after_keywords,
+                                    _stop_after_sentences, _stop_after_sentiment, _strip_chat_markers)
+
+    assert not _stop_after_keywords(3)(" 제주, 바다")
+    assert _stop_after_keywords(3)(" 제주, 바다, 여행,")
+    assert _stop_after_keywords(3)(" 제주, 바다\n")
+    assert not _stop_after_sentences(2)("첫 문장입니다. 둘째 문장")
+    assert _stop_after_sentences(2)("첫 문장입니다. 둘째 문장입니다.\n")
+    # 생성 중인 숫자의 마침표는 문장 끝이 아님
+    assert not _stop_after_sentences(1)("가격은 3.")
+    assert not _stop_after_sentences(1)("가격은 3.5")
+    assert not _stop_after_sentences(1)("버전 v1.")
+    assert _stop_after_sentences(1)("가격은 3.5만원입니다. 다")
+    # 문장 끝을 확인하려고 더 생성한 부분은 잘라냄
+    assert _stop_after_sentences(1).trim("가격은 3.5만원입니다. 다음") == "가격은 3.5만원입니다."
+    assert _stop_after_sentences(2).trim("첫 문장입니다. 둘째") == "첫 문장입니다. 둘째"
+    assert _stop_after_sentiment(" 긍정")
+    assert not _stop_after_combined(" 제주\n요약: 긍정적인 하루.\n감정:")
+    assert _stop_after_combined(" 제주\n요약: 긍정적인 하루.\n감정: 부정")
+    assert _strip_chat_markers(" 긍정</assistant>\n<human>") == " 긍정"
+
+    telemetry = GenerationTelemetry()
+    telemetry.record_generated("keywords", 12, 50)
+    telemetry.record_kept("keywords", 9)
+    assert telemetry.stats() == {"keywords": {"calls": 1, "budget_tokens": 50, "generated_tokens": 12,
+                                              "kept_tokens": 9, "kept_ratio": 0.75}}
+
+
+def test_http_backends_share_keep_alive_connections():
+    pytest.importorskip("requests")
+    from concurrent.futures import ThreadPoolExecutor
+    from models.backends import OllamaBackend, OpenAIBackend
+    from models.fake_server import DEFAULT_RESPONSE, FakeLLMServer
+
+    messages = [{"role": "user", "content": "분석해주세요"}]
+    with FakeLLMServer() as server:
+        openai_backend = OpenAIBackend(base_url=server.url, max_concurrency=2)
+        ollama_backend = OllamaBackend(base_url=server.url, max_concurrency=2)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: openai_backend.chat(messages), range(20)))
+        assert results == [DEFAULT_RESPONSE] * 20
+        assert ollama_backend.chat(messages, max_tokens=64) == DEFAULT_RESPONSE
+
+        assert server.stats["requests"] == 21
+        # 동시 요청 수 제한만큼의 연결만 열고 재사용
+        assert server.stats["connections"] <= 2
+        path, payload = server.requests[-1]
+        assert path == "/api/chat" and payload["options"]["num_predict"] == 64
+
+
+def test_content_analyzer_uses_backend():
+    pytest.importorskip("requests")
+    pytest.importorskip("dotenv")
+    from analysis.analyzer import ContentAnalyzer
+    from models.backends import OpenAIBackend
+    from models.fake_server import DEFAULT_RESPONSE, FakeLLMServer
+
+    with FakeLLMServer() as server:
+        analyzer = ContentAnalyzer(backend=OpenAIBackend(base_url=server.url))
+        result = analyzer.analyze_content("제주 바다 여행")
+        scraped = {"text": "제주 바다 여행", "image_count": 2, "media_urls": ["https://scontent.cdninstagram.com/v/t51/a.jpg"],
+                   "timings": {"navigate": 1.2}, "bytes_transferred": 52000, "source": "http", "cached": False}
+        analyzer.analyze_content(scraped)
+        prompt = server.requests[-1][1]["messages"][-1]["content"]
+    assert result == {"success": True, "analysis": DEFAULT_RESPONSE, "original_content": "제주 바다 여행"}
+    # 스크래핑 결과는 본문과 이미지 수만 프롬프트에 포함
+    assert prompt.endswith("제주 바다 여행\n\n이미지 수: 2")
+    assert "cdninstagram" not in prompt and "bytes_transferred" not in prompt
+
+
+@pytest.mark.parametrize("backend_name", ["openai", "ollama"])
+def test_content_analyzer_with_api_key_follows_backend_settings(monkeypatch, backend_name):
+    pytest.importorskip("requests")
+    pytest.importorskip("dotenv")
+    from analysis.analyzer import ContentAnalyzer
+    from models.fake_server import DEFAULT_RESPONSE, FakeLLMServer
+
+    with FakeLLMServer() as server:
+        monkeypatch.setenv("LLM_BACKEND", backend_name)
+        monkeypatch.setenv("LLM_BASE_URL", server.url)
+        monkeypatch.setenv("LLM_MODEL", "custom-model")
+        # main.py/app.py처럼 API 키를 넘겨도 LLM_* 설정을 따름
+        analyzer = ContentAnalyzer(api_key="sk-test")
+        result = analyzer.analyze_content("제주 바다 여행")
+        path, payload = server.requests[-1]
+
+    assert result["analysis"] == DEFAULT_RESPONSE
+    assert analyzer.backend.name == backend_name and analyzer.backend.model == "custom-model"
+    assert analyzer.backend.base_url == server.url
+    if backend_name == "openai":
+        assert analyzer.backend.api_key == "sk-test"
+        # 생성 길이는 지정하지 않으면 서버 기본값 사용
+        assert path == "/v1/chat/completions" and "max_tokens" not in payload
+    else:
+        assert path == "/api/chat" and "num_predict" not in payload["options"]
+
+
+def test_prefix_cache_reuses_and_evicts_least_recent():
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+
+    class FakeTokenizer:
+        def __call__(self, text, **kwargs):
+            return {"input_ids": torch.tensor([[1] + [2] * len(text.split())])}
+
+    forwards = []
+
+    class FakeModel:
+        def __call__(self, input_ids, use_cache):
+            forwards.append(input_ids.shape[1])
+            return type("Output", (), {"past_key_values": object()})()
+
+    analyzer = make_llama_analyzer(tokenizer=FakeTokenizer(), model=FakeModel(), prefix_cache_size=2)
+
+    first = analyzer._prefix_state("제주 바다")
+    assert analyzer._prefix_state("제주 바다") is first
+    analyzer._prefix_state("서울 카페")
+    analyzer._prefix_state("제주 바다")
+    analyzer._prefix_state("부산 야경")
+
+    # 가장 오래 사용하지 않은 '서울 카페'가 제거됨
+    assert [analyzer._content_prefix(text) for text in ("제주 바다", "부산 야경")] == list(analyzer._prefix_cache)
+    assert analyzer.prefix_cache_stats["hits"] == 2 and analyzer.prefix_cache_stats["misses"] == 3
+    assert len(forwards) == 3
+    # 작업 지시가 들어갈 자리가 없는 긴 본문은 캐시하지 않음
+    assert analyzer._prefix_state("단어 " * 600) is None
+
+
+def test_embedding_bank_computes_once_and_persists(tmp_path, monkeypatch):
+    torch = pytest.importorskip("torch")
+    from analysis import embedding_bank
+    from analysis.embedding_bank import EmbeddingBank
+
+    monkeypatch.setattr(embedding_bank, "_memory_cache", {})
+    calls = []
+
+    def encode_text(prompts):
+        calls.append(prompts)
+        return torch.arange(len(prompts) * 4, dtype=torch.float32).reshape(len(prompts), 4) + 1
+
+    bank = EmbeddingBank("ViT-B/32", encode_text, tmp_path)
+    features = bank.get(["음식", "여행"])
+    assert features.shape == (2, 4)
+    assert torch.allclose(features.norm(dim=-1), torch.ones(2))
+    assert bank.get(["음식", "여행"]) is features
+    assert calls == [["이 이미지는 음식를 보여줍니다", "이 이미지는 여행를 보여줍니다"]]
+
+    # 새 프로세스에서는 디스크에서 불러오고 다시 계산하지 않음
+    monkeypatch.setattr(embedding_bank, "_memory_cache", {})
+    reloaded = EmbeddingBank("ViT-B/32", encode_text, tmp_path).get(["음식", "여행"])
+    assert torch.equal(reloaded, features) and len(calls) == 1
+
+    # 카테고리나 모델이 다르면 별도로 계산
+    EmbeddingBank("ViT-B/32", encode_text, tmp_path).get(["음식"])
+    EmbeddingBank("ViT-L/14", encode_text, tmp_path).get(["음식", "여행"])
+    assert len(calls) == 3
+    assert len(list(tmp_path.glob("*.pt"))) == 3
+
+
+def test_analyze_images_batches_and_keeps_input_order(tmp_path):
+    torch = pytest.importorskip("torch")
+    np = pytest.importorskip("numpy")
+    Image = pytest.importorskip("PIL.Image")
+    pytest.importorskip("cv2")
+    pytest.importorskip("clip")
+    from analysis.image_analysis import ImageAnalyzer
+
+    # 빨강 이미지는 '음식', 파랑 이미지는 '여행'과 가깝도록 만든 가짜 모델
+    colors = {"red": (255, 0, 0), "blue": (0, 0, 255)}
+    paths = []
+    for i, name in enumerate(["red", "blue", "broken", "blue", "red"]):
+        path = tmp_path / f"{i}_{name}.png"
+        if name == "broken":
+            path.write_bytes(b"not an image")
+        else:
+            Image.new("RGB", (8, 8), colors[name]).save(path)
+        paths.append(path)
+
+    batches = []
+
+    class FakeModel:
+        def encode_image(self, images):
+            batches.append(images.shape[0])
+            return images.mean(dim=(2, 3))
+
+    analyzer = ImageAnalyzer.__new__(ImageAnalyzer)
+    analyzer.device = "cpu"
+    analyzer.model = FakeModel()
+    analyzer.preprocess = lambda image: torch.from_numpy(np.asarray(image.convert("RGB"), dtype=np.float32)).permute(2, 0, 1)
+    analyzer.categories = ["음식", "여행", "일상"]
+    analyzer.category_features = torch.nn.functional.normalize(torch.tensor([[1.0, 0, 0], [0, 0, 1.0], [0, 1.0, 0]]), dim=-1)
+    analyzer.image_cache = None
+
+    descriptions = analyzer.analyze_images(paths, batch_size=2)
+
+    assert batches == [2, 1, 1]
+    expected = ["이 이미지는 음식", "이 이미지는 여행", "이미지 분석에 실패", "이 이미지는 여행", "이 이미지는 음식"]
+    assert all(description.startswith(prefix) for description, prefix in zip(descriptions, expected))
+
+    # 같은 내용의 이미지는 캐시된 임베딩을 사용하여 다시 인코딩하지 않음
+    from analysis.image_cache import ImageEmbeddingCache
+    analyzer.image_cache = ImageEmbeddingCache(tmp_path / "cache", "fake")
+    batches.clear()
+    assert analyzer.analyze_images(paths, batch_size=8) == descriptions
+    assert analyzer.analyze_images(paths, batch_size=8) == descriptions
+    assert batches == [4]
+    assert analyzer.analyze_image(paths[1]) == descriptions[1]
+    assert batches == [4]
+
+
+def test_sample_frames_skips_to_each_interval(tmp_path):
+    cv2 = pytest.importorskip("cv2")
+    np = pytest.importorskip("numpy")
+    from analysis.video_frames import FrameSampler, sample_frames
+
+    # 10fps, 95프레임 영상 (프레임 번호를 밝기로 기록)
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 32))
+    for index in range(95):
+        writer.write(np.full((32, 32, 3), index * 2, dtype=np.uint8))
+    writer.release()
+
+    def assert_sampled(frames, expected):
+        # JPEG 압축으로 밝기가 조금 달라질 수 있음
+        brightness = [float(frame.mean()) / 2 for frame in frames]
+        assert len(brightness) == len(expected)
+        assert all(abs(value - index) < 1 for value, index in zip(brightness, expected))
+
+    # 어느 방법으로 건너뛰어도 같은 프레임을 샘플링
+    for mode in ("seek", "grab"):
+        assert_sampled(sample_frames(path, 1, mode), list(range(0, 95, 10)))
+        assert_sampled(sample_frames(path, 3, mode), [0, 30, 60, 90])
+
+    # auto는 두 방법의 시간을 한 번씩 재고 빠른 쪽을 선택
+    sampler = FrameSampler(path, 1)
+    assert_sampled(sampler, list(range(0, 95, 10)))
+    assert sampler.mode in ("seek", "grab")
+    assert sampler.timings["seek"] is not None and sampler.timings["grab"] is not None
+    assert sampler.mode == min(sampler.timings, key=sampler.timings.get)
+
+    # 건너뛸 프레임이 없으면 측정 없이 grab
+    single = FrameSampler(path, 0.1)
+    assert len(list(single)) == 95
+    assert single.mode == "grab" and single.timings == {"seek": None, "grab": None}
+
+    with pytest.raises(ValueError):
+        list(sample_frames(tmp_path / "missing.mp4", 1))
+    with pytest.raises(ValueError):
+        FrameSampler(path, 1, mode="fast")
+
+
+def test_keyframe_selector_skips_repeated_scenes(tmp_path):
+    cv2 = pytest.importorskip("cv2")
+    np = pytest.importorskip("numpy")
+    from analysis.video_frames import KeyframeSelector, dhash
+
+    # 장면 A, B, C를 2초씩 보여준 뒤 A로 돌아오는 10fps 영상
+    scenes = [
+        cv2.resize(np.random.RandomState(seed).randint(0, 256, (8, 9, 3)).astype(np.uint8), (72, 64),
+                   interpolation=cv2.INTER_NEAREST)
+        for seed in range(3)
+    ]
+    path = tmp_path / "reel.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (72, 64))
+    for scene in [0, 1, 2, 0]:
+        for _ in range(20):
+            writer.write(scenes[scene])
+    writer.release()
+
+    def scene_of(frame):
+        return min(range(3), key=lambda i: bin(dhash(frame) ^ dhash(scenes[i])).count("1"))
+
+    selector = KeyframeSelector(sample_interval=0.5, max_frames=None)
+    assert [scene_of(frame) for frame in selector.frames(path)] == [0, 1, 2]
+    assert {key: selector.stats[key] for key in ("sampled", "selected", "skipped", "capped")} == {
+        "sampled": 16, "selected": 3, "skipped": 13, "capped": False
+    }
+    assert selector.stats["mode"] in ("seek", "grab")
+
+    capped = KeyframeSelector(sample_interval=0.5, max_frames=2)
+    assert len(list(capped.frames(path))) == 2
+    assert capped.stats["capped"] and capped.stats["selected"] == 2
+
+    # min_distance=0이면 고정 간격 샘플링과 같음
+    fixed = KeyframeSelector(sample_interval=0.5, max_frames=None, min_distance=0)
+    assert len(list(fixed.frames(path))) == 16
+
+
+def test_image_embedding_cache_persists_and_recovers(tmp_path):
+    np = pytest.importorskip("numpy")
+    from analysis.image_cache import ImageEmbeddingCache, content_key
+
+    keys = [content_key(data) for data in (b"a", b"b", b"c")]
+    embeddings = np.array([[3.0, 4.0], [1.0, 0.0], [0.0, 2.0]])
+
+    cache = ImageEmbeddingCache(tmp_path, "ViT-B/32")
+    assert cache.get(keys[0]) is None
+    cache.put(keys[:2], embeddings[:2])
+    cache.put(keys[1:], embeddings[1:])
+    np.testing.assert_allclose(cache.get(keys[0]), [0.6, 0.8], atol=1e-3)
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 3, "store_bytes": 12}
+
+    # 인덱스를 쓰기 전에 중단된 행은 다시 열 때 버림
+    with open(cache.path / "embeddings.f16", "ab") as f:
+        f.write(b"\0\0\0")
+    reopened = ImageEmbeddingCache(tmp_path, "ViT-B/32")
+    np.testing.assert_allclose(reopened.get(keys[2]), [0.0, 1.0])
+    reopened.put([content_key(b"d")], np.array([[1.0, 1.0]]))
+    np.testing.assert_allclose(ImageEmbeddingCache(tmp_path, "ViT-B/32").get(content_key(b"d")), [0.7071, 0.7071], atol=1e-3)
+    assert ImageEmbeddingCache(tmp_path, "ViT-B/32").stats()["entries"] == 4
+
+
+def test_image_embedding_cache_instances_share_directory(tmp_path):
+    np = pytest.importorskip("numpy")
+    from analysis.image_cache import ImageEmbeddingCache, get_shared_image_cache
+
+    # 같은 디렉토리의 두 인스턴스가 번갈아 써도 서로의 행을 덮어쓰지 않음
+    a = ImageEmbeddingCache(tmp_path, "ViT-B/32")
+    b = ImageEmbeddingCache(tmp_path, "ViT-B/32")
+    a.put(["A"], np.array([[1.0, 0.0]]))
+    b.put(["B"], np.array([[0.0, 1.0]]))
+    a.put(["C", "B"], np.array([[1.0, 1.0], [0.0, 1.0]]))
+    np.testing.assert_allclose(a.get("A"), [1.0, 0.0])
+    np.testing.assert_allclose(a.get("B"), [0.0, 1.0])
+    np.testing.assert_allclose(b.get("A"), [1.0, 0.0])
+    assert ImageEmbeddingCache(tmp_path, "ViT-B/32").stats()["entries"] == 3
+    assert (tmp_path / "ViT-B_32" / "index.txt").read_text().split() == ["A", "B", "C"]
+
+    assert get_shared_image_cache(tmp_path, "ViT-B/32") is get_shared_image_cache(tmp_path / ".", "ViT-B/32")
+
+
+class ScriptedTokenizer:
+    """토큰 id를 미리 정한 문자열 조각으로 디코딩하는 토크나이저 (0번은 프롬프트)"""
+
+    eos_token_id = 0
+
+    def __init__(self, pieces):
+        self.pieces = ["<prompt>"] + list(pieces)
+
+    def __call__(self, text, **kwargs):
+        import torch
+        from transformers import BatchEncoding
+        return BatchEncoding({"input_ids": torch.zeros((1, 1), dtype=torch.long)})
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(self.pieces[int(i)] for i in ids if int(i))
+
+    def batch_decode(self, rows, skip_special_tokens=True):
+        return [self.decode(row) for row in rows]
+
+
+class ScriptedModel:
+    """정해진 순서대로 토큰을 생성하며 streamer와 stopping_criteria를 실제 generate처럼 호출"""
+
+    def __init__(self, count):
+        self.count = count
+        self.generated = 0
+
+    def generate(self, input_ids, max_new_tokens, stopping_criteria, streamer=None, **kwargs):
+        import torch
+        if streamer:
+            streamer.put(input_ids)
+        for token in range(1, min(self.count, max_new_tokens) + 1):
+            input_ids = torch.cat([input_ids, torch.tensor([[token]])], dim=1)
+            self.generated += 1
+            if streamer:
+                streamer.put(torch.tensor([token]))
+            if stopping_criteria(input_ids, None).all():
+                break
+        if streamer:
+            streamer.end()
+        return input_ids
+
+
+@pytest.mark.parametrize("pieces, expected, generated", [
+    # 대화 표식이 나오면 멈추고, 표식과 그 뒤는 전송하지 않음
+    (["제주 ", "바다. ", "<hu", "man>", "다음 ", "질문"], "제주 바다. ", 4),
+    # summarize_text와 같이 문장 4개에서 멈추고, 확인하려고 더 생성한 부분은 전송하지 않음
+    (["하나.", " 둘.", " 셋.", " 넷.", " 다섯.", " 여섯."], "하나. 둘. 셋. 넷.", 5),
+    # 숫자 중간의 마침표에서는 멈추지 않음
+    (["가격은 3.", "5만원. ", "둘. ", "셋. ", "넷. ", "다섯. "], "가격은 3.5만원. 둘. 셋. 넷.", 5),
+    # 대화 표식이 아닌 '<'는 그대로 전송
+    (["3 ", "<", " 5 ", "비교"], "3 < 5 비교", 4),
+])
+def test_stream_summary_applies_summary_stopping_rules(pieces, expected, generated):
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+
+    model = ScriptedModel(len(pieces))
+    analyzer = make_llama_analyzer(tokenizer=ScriptedTokenizer(pieces), model=model)
+
+    assert "".join(analyzer.stream_summary("제주 바다 여행")) == expected
+    assert model.generated == generated
+
+
+def test_summary_stops_after_sentence_end_not_mid_number():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+
+    pieces = ["요약:", " 가격은 3.", "5만원.", " 둘.", " 셋.", " 넷.", " 다섯.", " 여섯."]
+    model = ScriptedModel(len(pieces))
+    analyzer = make_llama_analyzer(tokenizer=ScriptedTokenizer(pieces), model=model)
+
+    # 네 번째 문장 끝을 확인한 토큰(" 다섯.")까지 생성하고, 결과에서는 잘라냄
+    assert analyzer.summarize_text("제주 바다 여행") == "가격은 3.5만원. 둘. 셋. 넷."
+    assert model.generated == 7
+
+
+class SpecialTokenWordTokenizer(ScriptedTokenizer):
+    """단어 수로 길이를 세고, 실제 토크나이저처럼 기본으로 BOS를 붙이는 토크나이저"""
+
+    def __call__(self, text, add_special_tokens=True, **kwargs):
+        if "return_tensors" in kwargs:
+            return super().__call__(text, **kwargs)
+        bos = ["<s>"] if add_special_tokens else []
+        if isinstance(text, str):
+            return {"input_ids": bos + text.split()}
+        return {"input_ids": [bos + item.split() for item in text]}
+
+
+@pytest.mark.parametrize("spare_tokens, condensed", [(0, True), (1, False)])
+def test_summary_condenses_when_bos_would_truncate_prompt_tail(monkeypatch, spare_tokens, condensed):
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    import models.llama_model as llama_model
+
+    monkeypatch.setattr(llama_model, "MAX_PROMPT_TOKENS", 40)
+    analyzer = make_llama_analyzer(tokenizer=SpecialTokenWordTokenizer(["요약입니다. "]), model=ScriptedModel(1))
+    # 특수 토큰 없이 센 프롬프트 길이가 MAX_PROMPT_TOKENS - spare_tokens가 되는 본문
+    template_length = len(analyzer._summary_prompt("").split())
+    text = " ".join(["단어"] * (40 - spare_tokens - template_length))
+    assert analyzer._count_tokens([analyzer._summary_prompt(text)])[0] == 40 - spare_tokens
+
+    condensed_texts = []
+    analyzer._condense_long_text = lambda text: condensed_texts.append(text) or "짧은 본문"
+    analyzer.summarize_long_text = lambda text: condensed_texts.append(text) or "긴 텍스트 요약"
+    analyzer._generate_task = lambda *args, **kwargs: "<assistant>요약: 짧은 텍스트 요약"
+
+    # BOS까지 MAX_PROMPT_TOKENS를 넘으면 인코딩에서 '<assistant>'가 잘리므로 축약
+    assert analyzer.summarize_text(text) == ("긴 텍스트 요약" if condensed else "짧은 텍스트 요약")
+    assert "".join(analyzer.stream_summary(text)) == "요약입니다. "
+    assert condensed_texts == ([text, text] if condensed else [])
+
+
+@pytest.fixture
+def sse_server(monkeypatch):
+    pytest.importorskip("selenium")
+    pytest.importorskip("dotenv")
+    from http.server import ThreadingHTTPServer
+    import api.index as api
+
+    class FakeScraper:
+        def scrape(self, url):
+            if "missing" in url:
+                return None
+            return {"url": url, "text": "제주 바다 여행", "image_count": 1, "media_urls": ["https://cdn/x.jpg"]}
+
+    streams = {}
+    monkeypatch.setattr(api, "InstagramScraper", FakeScraper)
+    monkeypatch.setattr(api, "get_text_analyzer", lambda: type("Analyzer", (), {"stream_summary": lambda self, text: streams["factory"]()})())
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), api.Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, streams
+    server.shutdown()
+    server.server_close()
+
+
+def _read_events(response):
+    import json
+    events = []
+    for block in response.read().decode("utf-8").split("\n\n"):
+        if block.strip():
+            event, data = block.split("\n", 1)
+            events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def _post_stream(server, url):
+    import http.client
+    import json
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    connection.request("POST", "/api/analyze/stream", body=json.dumps({"url": url}),
+                       headers={"Content-Type": "application/json"})
+    return connection, connection.getresponse()
+
+
+def test_stream_endpoint_sends_events_in_order(sse_server):
+    server, streams = sse_server
+    streams["factory"] = lambda: iter(["제주 ", "바다 ", "여행"])
+
+    connection, response = _post_stream(server, "https://www.instagram.com/p/ABC/")
+    assert response.getheader("Content-Type").startswith("text/event-stream")
+    events = _read_events(response)
+    connection.close()
+
+    assert events == [
+        ("content", {"text": "제주 바다 여행", "image_count": 1}),
+        ("summary", {"token": "제주 "}),
+        ("summary", {"token": "바다 "}),
+        ("summary", {"token": "여행"}),
+        ("done", {"summary": "제주 바다 여행"}),
+    ]
+
+
+def test_stream_endpoint_reports_errors(sse_server):
+    server, streams = sse_server
+
+    def failing():
+        yield "제주 "
+        raise RuntimeError("generation failed")
+
+    streams["factory"] = failing
+    connection, response = _post_stream(server, "https://www.instagram.com/p/ABC/")
+    events = _read_events(response)
+    connection.close()
+    assert [event for event, _ in events] == ["content", "summary", "error"]
+    assert "generation failed" in events[-1][1]["error"]
+
+    connection, response = _post_stream(server, "https://www.instagram.com/p/missing/")
+    assert _read_events(response) == [("error", {"error": "컨텐츠를 가져오지 못했습니다"})]
+    connection.close()
+
+
+def test_stream_endpoint_stops_generation_when_client_disconnects(sse_server):
+    server, streams = sse_server
+    closed = threading.Event()
+
+    def endless():
+        try:
+            while True:
+                time.sleep(0.01)
+                yield "토큰 " * 256
+        finally:
+            closed.set()
+
+    streams["factory"] = endless
+    connection, response = _post_stream(server, "https://www.instagram.com/p/ABC/")
+    assert response.readline().startswith(b"event: content")
+    response.close()
+    connection.close()
+
+    # 연결이 끊기면 다음 전송에서 실패하고 생성기가 닫힘
+    assert closed.wait(5)
+
+
+def test_stream_summary_condenses_long_text_instead_of_truncating(monkeypatch):
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    import models.llama_model as llama_model
+
+    class LongTextTokenizer(ScriptedTokenizer):
+        """길이는 단어 수로 세고, 생성 프롬프트는 기록"""
+
+        def __init__(self, pieces):
+            super().__init__(pieces)
+            self.prompts = []
+
+        def __call__(self, text, **kwargs):
+            if "return_tensors" in kwargs:
+                self.prompts.append(text)
+                return super().__call__(text, **kwargs)
+            if isinstance(text, str):
+                return {"input_ids": text.split()}
+            return {"input_ids": [item.split() for item in text]}
+
+    monkeypatch.setattr(llama_model, "MAX_PROMPT_TOKENS", 60)
+    tokenizer = LongTextTokenizer(["요약입니다. "])
+    analyzer = make_llama_analyzer(tokenizer=tokenizer, model=ScriptedModel(1))
+    batches = []
+
+    def fake_batch(prompts, max_new_tokens, task, stop):
+        batches.append(prompts)
+        return [f"{prompt.split(chr(10) * 2)[1].split()[0]}" for prompt in prompts]
+
+    analyzer._generate_batch = fake_batch
+
+    sentences = [f"문장{i} " + "단어 " * 8 + "입니다." for i in range(20)]
+    text = " ".join(sentences) + "\n\n#해시태그"
+
+    assert "".join(analyzer.stream_summary(text)) == "요약입니다. "
+    # 모든 청크의 부분 요약이 들어가고 작업 지시(답변 위치)도 잘리지 않음
+    prompt = tokenizer.prompts[-1]
+    assert len(batches) == 1 and len(batches[0]) > 1
+    assert "#해시태그" in batches[0][-1]
+    assert prompt.split("\n\n")[1].split() == [chunk.split("\n\n")[1].split()[0] for chunk in batches[0]]
+    assert prompt.endswith("<assistant>")
+    assert len(prompt.split()) <= 60
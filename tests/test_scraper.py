@@ -0,0 +1,550 @@
+import json
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from scraping import cache as cache_module
+from scraping.archive import PageArchive, replay
+from scraping.cache import ScrapeCache, extract_shortcode
+from scraping.driver_pool import DriverPool
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("browser crashed")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_driver_pool_reuses_healthy_driver():
+    pool = DriverPool(FakeDriver, size=1)
+
+    with pool.driver() as first:
+        pass
+    with pool.driver() as second:
+        pass
+
+    assert first is second
+    assert pool.stats['created'] == 1
+
+
+def test_driver_pool_recycles_after_max_pages():
+    pool = DriverPool(FakeDriver, size=1, max_pages=2)
+
+    drivers = []
+    for _ in range(3):
+        with pool.driver() as driver:
+            drivers.append(driver)
+
+    assert drivers[0] is drivers[1]
+    assert drivers[2] is not drivers[0]
+    assert drivers[0].quit_called
+
+
+def test_driver_pool_replaces_crashed_driver():
+    pool = DriverPool(FakeDriver, size=1)
+
+    with pytest.raises(ValueError):
+        with pool.driver() as crashed:
+            crashed.alive = False
+            raise ValueError("page error")
+    with pool.driver() as replacement:
+        pass
+
+    assert replacement is not crashed
+    assert crashed.quit_called
+
+
+def test_driver_pool_is_bounded():
+    pool = DriverPool(FakeDriver, size=1)
+    entry = pool.checkout()
+
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.05)
+
+    released = threading.Timer(0.05, pool.checkin, args=(entry,))
+    released.start()
+    assert pool.checkout(timeout=1).driver is entry.driver
+
+
+def test_driver_pool_warm_up_respects_pool_size():
+    pool = DriverPool(FakeDriver, size=2)
+    entry = pool.checkout()
+
+    assert pool.warm_up() == 1
+    assert pool.warm_up() == 0
+    assert pool.live_count == 2
+
+    pool.checkin(entry)
+    with pool.driver():
+        pass
+    assert pool.stats['created'] == 2
+
+
+class FixturePostHandler(SimpleHTTPRequestHandler):
+    """모든 게시물 경로에 저장된 게시물 HTML을 응답하는 핸들러"""
+
+    def translate_path(self, path):
+        return str(FIXTURES_DIR / "post.html")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fixture_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixturePostHandler, directory=str(FIXTURES_DIR)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_fetcher_extracts_post_from_fixture_server(fixture_server):
+    pytest.importorskip("requests")
+    pytest.importorskip("lxml")
+    from scraping.http_fetcher import HttpPostFetcher
+
+    fetcher = HttpPostFetcher(base_url=fixture_server)
+    result = fetcher.scrape("https://www.instagram.com/p/C6abcDEFghi/")
+
+    assert result['source'] == 'http'
+    assert result['text'].startswith("제주도 바다에서 보낸 여유로운 오후")
+    assert "May be an image of ocean and beach" in result['text']
+    assert result['image_count'] == 2
+    assert result['bytes_transferred'] == (FIXTURES_DIR / "post.html").stat().st_size
+    assert "https://scontent.cdninstagram.com/v/t51/slide_3.jpg" in result['media_urls']
+
+
+class FakeHttpFetcher:
+    def scrape(self, url):
+        if 'broken' in url:
+            raise RuntimeError("fetch failed")
+        return {'url': url, 'text': f"caption for {url}"}
+
+
+def test_scrape_many_reports_failures_without_aborting_batch():
+    pytest.importorskip("selenium")
+    from scraping.scraper import InstagramScraper
+
+    scraper = InstagramScraper(pool=DriverPool(FakeDriver), mode='http', http_fetcher=FakeHttpFetcher())
+    urls = [f"https://www.instagram.com/p/post{i}/" for i in range(10)]
+    urls[3] = "https://www.instagram.com/p/broken/"
+    urls[7] = "https://example.com/not-instagram"
+
+    outcomes = sorted(scraper.scrape_many(urls, concurrency=3), key=lambda outcome: outcome['index'])
+
+    assert [outcome['url'] for outcome in outcomes] == urls
+    failed = [outcome['index'] for outcome in outcomes if outcome['error']]
+    assert failed == [3, 7]
+    assert outcomes[0]['result']['text'] == f"caption for {urls[0]}"
+
+
+SERVER_RENDERED_HTML = (
+    "<html><head><meta property='og:description' content='서버에서 렌더링된 게시물 설명'></head>"
+    "<body><div id='root'></div></body></html>"
+)
+
+
+class FakeBrowserDriver(FakeDriver):
+    """eager 로드 후 render_after번째 확인에서 article이 렌더링되는 드라이버"""
+
+    def __init__(self, render_after):
+        super().__init__()
+        self.render_after = render_after
+        self.ready_checks = 0
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def get(self, url):
+        pass
+
+    def get_log(self, log_type):
+        return []
+
+    def execute_script(self, script):
+        from scraping.scraper import READY_SCRIPT
+        if script == READY_SCRIPT:
+            self.ready_checks += 1
+            return self.rendered
+        return super().execute_script(script)
+
+    @property
+    def rendered(self):
+        return self.render_after is not None and self.ready_checks >= self.render_after
+
+    @property
+    def page_source(self):
+        if self.rendered:
+            return (FIXTURES_DIR / "post.html").read_text(encoding="utf-8")
+        return SERVER_RENDERED_HTML
+
+
+@pytest.mark.parametrize("render_after", [3, None])
+def test_browser_scrape_waits_for_article_not_server_rendered_meta(render_after):
+    pytest.importorskip("selenium")
+    pytest.importorskip("lxml")
+    from scraping.scraper import InstagramScraper
+
+    driver = FakeBrowserDriver(render_after)
+    scraper = InstagramScraper(pool=DriverPool(lambda: driver, size=1), mode='browser', timeouts={'ready': 0.5})
+    result = scraper.scrape("https://www.instagram.com/p/C6abcDEFghi/")
+
+    if render_after:
+        # og:description이 처음부터 있어도 article이 렌더링될 때까지 대기
+        assert driver.ready_checks == render_after
+        assert result['text'].startswith("제주도 바다에서 보낸 여유로운 오후")
+        assert "May be an image of ocean and beach" in result['text']
+    else:
+        # 본문이 끝내 렌더링되지 않으면 시간 제한 후 og:description으로 대체
+        assert result['text'] == "서버에서 렌더링된 게시물 설명"
+        assert result['timings']['ready'] >= 0.5
+
+
+def test_scrape_many_queues_browser_work_beyond_pool_size():
+    pytest.importorskip("selenium")
+    pytest.importorskip("lxml")
+    from scraping.scraper import InstagramScraper
+
+    class SlowBrowserDriver(FakeBrowserDriver):
+        def get(self, url):
+            time.sleep(0.1)
+
+    # 드라이버 하나를 0.1초씩 쓰는 작업 6개가 대여 시간 제한(0.2초)을 넘겨 기다려도 실패하지 않음
+    pool = DriverPool(lambda: SlowBrowserDriver(render_after=1), size=1, checkout_timeout=0.2)
+    scraper = InstagramScraper(pool=pool, mode='browser')
+    urls = [f"https://www.instagram.com/p/post{i}/" for i in range(6)]
+
+    outcomes = list(scraper.scrape_many(urls, concurrency=6))
+
+    assert [outcome['error'] for outcome in outcomes] == [None] * 6
+    assert pool.stats['created'] == 1
+
+
+def _performance_entry(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+def test_browser_scrape_sums_transferred_bytes_for_current_page_only():
+    pytest.importorskip("selenium")
+    pytest.importorskip("lxml")
+    from scraping.scraper import InstagramScraper
+
+    class LoggingBrowserDriver(FakeBrowserDriver):
+        def __init__(self):
+            super().__init__(render_after=1)
+            # 이전 페이지에서 남은 로그
+            self.performance_log = [_performance_entry("Network.loadingFinished", encodedDataLength=99999)]
+
+        def get(self, url):
+            self.performance_log += [
+                _performance_entry("Network.requestWillBeSent", requestId="1"),
+                _performance_entry("Network.loadingFinished", requestId="1", encodedDataLength=1200),
+                _performance_entry("Network.loadingFinished", requestId="2", encodedDataLength=345),
+                _performance_entry("Network.loadingFailed", requestId="3"),
+                _performance_entry("Network.loadingFinished", requestId="4"),
+            ]
+
+        def get_log(self, log_type):
+            assert log_type == "performance"
+            entries, self.performance_log = self.performance_log, []
+            return entries
+
+    driver = LoggingBrowserDriver()
+    scraper = InstagramScraper(pool=DriverPool(lambda: driver, size=1), mode='browser')
+    result = scraper.scrape("https://www.instagram.com/p/C6abcDEFghi/")
+
+    assert result['bytes_transferred'] == 1200 + 345
+    assert driver.performance_log == []
+
+
+@pytest.mark.parametrize("block_resources", [True, False])
+def test_create_driver_blocks_resources_only_when_requested(monkeypatch, block_resources):
+    pytest.importorskip("selenium")
+    from scraping import scraper as scraper_module
+
+    class FakeChrome:
+        def __init__(self, service, options):
+            self.options = options
+            self.cdp_commands = []
+
+        def execute_cdp_cmd(self, command, params):
+            self.cdp_commands.append((command, params))
+
+    monkeypatch.setattr(scraper_module, "resolve_chromedriver", lambda: {"driver_path": "/fake/chromedriver"})
+    monkeypatch.setattr(scraper_module.webdriver, "Chrome", FakeChrome)
+
+    driver = scraper_module.create_driver(block_resources=block_resources)
+
+    # 전송량 측정용 performance 로그는 차단 여부와 관계없이 수집
+    assert driver.options.to_capabilities()["goog:loggingPrefs"] == {"performance": "ALL"}
+    if block_resources:
+        assert driver.cdp_commands == [
+            ("Network.enable", {}),
+            ("Network.setBlockedURLs", {"urls": scraper_module.BLOCKED_URL_PATTERNS}),
+        ]
+        assert "*.mp4*" in scraper_module.BLOCKED_URL_PATTERNS
+    else:
+        assert driver.cdp_commands == []
+        assert "prefs" not in driver.options.experimental_options
+
+
+def test_create_driver_re_resolves_stale_pinned_chromedriver(monkeypatch):
+    pytest.importorskip("selenium")
+    from selenium.common.exceptions import SessionNotCreatedException
+    from scraping import scraper as scraper_module
+
+    pinned = {"driver_path": "/cache/chromedriver-119", "binary_path": None}
+    current = {"driver_path": "/cache/chromedriver-120", "binary_path": None}
+    refreshes = []
+
+    def fake_resolve(refresh=False, stale=None):
+        if refresh:
+            refreshes.append(stale)
+            return current
+        return pinned
+
+    class FakeChrome:
+        def __init__(self, service, options):
+            # 자동 업데이트된 Chrome과 버전이 맞지 않는 드라이버
+            if service.path == pinned["driver_path"]:
+                raise SessionNotCreatedException("This version of ChromeDriver only supports Chrome version 119")
+            self.driver_path = service.path
+
+    monkeypatch.setattr(scraper_module, "resolve_chromedriver", fake_resolve)
+    monkeypatch.setattr(scraper_module.webdriver, "Chrome", FakeChrome)
+
+    assert scraper_module.create_driver().driver_path == current["driver_path"]
+    assert refreshes == [pinned]
+
+    # 다시 확인해도 같은 드라이버이면 재시도하지 않고 실패
+    current = pinned
+    with pytest.raises(SessionNotCreatedException):
+        scraper_module.create_driver()
+    assert len(refreshes) == 2
+
+
+def test_driver_resolver_refreshes_stale_result_once(tmp_path, monkeypatch):
+    from scraping import driver_resolver
+
+    driver_path = tmp_path / "chromedriver"
+    driver_path.write_text("")
+    installs = []
+    monkeypatch.delenv("CHROMEDRIVER_PATH", raising=False)
+    monkeypatch.setattr(driver_resolver, "_resolved", None)
+    monkeypatch.setattr(driver_resolver, "_find_chrome_binary", lambda: None)
+    monkeypatch.setattr(driver_resolver, "_install_driver", lambda: installs.append(1) or str(driver_path))
+    cache_file = tmp_path / "chromedriver.json"
+
+    first = driver_resolver.resolve_chromedriver(cache_file=cache_file)
+    refreshed = driver_resolver.resolve_chromedriver(refresh=True, cache_file=cache_file, stale=first)
+    # 다른 스레드가 같은 결과로 실패해 다시 요청해도 이미 갱신된 결과를 사용
+    again = driver_resolver.resolve_chromedriver(refresh=True, cache_file=cache_file, stale=first)
+
+    assert len(installs) == 2
+    assert again is refreshed and refreshed is not first
+
+
+def test_extract_shortcode_from_post_and_reel_urls():
+    assert extract_shortcode("https://www.instagram.com/p/C6abcDEFghi/?igsh=xyz") == "C6abcDEFghi"
+    assert extract_shortcode("https://instagram.com/travel_kim/reel/Cx-1_2/") == "Cx-1_2"
+    assert extract_shortcode("https://www.instagram.com/travel_kim/") is None
+
+
+def test_scrape_cache_hits_by_shortcode_and_expires(tmp_path, monkeypatch):
+    cache = ScrapeCache(tmp_path / "cache.db", ttl=60)
+    cache.set("https://www.instagram.com/p/ABC/", {'text': "caption"})
+
+    assert cache.get("https://www.instagram.com/reel/ABC/?utm_source=ig") == {'text': "caption"}
+    assert cache.get("https://www.instagram.com/p/OTHER/") is None
+
+    now = cache_module.time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now + 61)
+    assert cache.get("https://www.instagram.com/p/ABC/") is None
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3, 'entries': 0}
+
+
+def test_scrape_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    cache = ScrapeCache(tmp_path / "cache.db", max_entries=2)
+    clock = iter(range(100))
+    monkeypatch.setattr(cache_module.time, "time", lambda: next(clock))
+
+    cache.set("https://www.instagram.com/p/A/", {'text': "a"})
+    cache.set("https://www.instagram.com/p/B/", {'text': "b"})
+    cache.get("https://www.instagram.com/p/A/")
+    cache.set("https://www.instagram.com/p/C/", {'text': "c"})
+
+    assert cache.get("https://www.instagram.com/p/B/") is None
+    assert cache.get("https://www.instagram.com/p/A/") == {'text': "a"}
+    assert cache.get("https://www.instagram.com/p/C/") == {'text': "c"}
+
+
+TRICKY_ARTICLE_HTML = """
+<html><head><meta property="og:description" content="fallback description text"></head><body>
+<article>
+  <span>outer caption <span>nested part &amp; more</span> tail</span>
+  <p>paragraph <!-- hidden comment --> with comment inside</p>
+  <span><script>var notText = "script contents here";</script>short</span>
+  <h1>unclosed heading text
+</article>
+<article><span>second article is ignored entirely</span></article>
+<img alt="a long enough alternative text"><img alt="short">
+</body></html>
+"""
+
+
+# article이 없는 페이지 (본문 대신 og:description 사용)
+NO_ARTICLE_HTML = """
+<html><head><meta property="og:description" content="og 설명만 있는 게시물입니다">
+<meta name="description" content="name description"></head><body>
+<div><span>article 밖의 span 텍스트는 사용하지 않습니다</span><img alt="short"><img src="x.jpg"></div>
+</body></html>
+"""
+
+# 닫히지 않은 태그, 어긋난 닫는 태그, 따옴표 없는 속성, 엔티티가 섞인 마크업
+MALFORMED_HTML = """
+<html><head><meta property=og:description content='malformed og'></head><body>
+<article><span>닫히지 않은 span <b>굵게 <p>문단이 열린 채 </span></b> 끝
+<div><span>stray</div></span></p></article></article><img alt=따옴표없는대체텍스트입니다 >
+<p>article 밖 <img alt="&amp; 엔티티 &lt;포함&gt; 대체 텍스트"></body>
+"""
+
+
+@pytest.mark.parametrize("html", [
+    (FIXTURES_DIR / "post.html").read_text(encoding="utf-8"),
+    TRICKY_ARTICLE_HTML,
+    "<html><head><meta property='og:description' content='only the meta description'></head></html>",
+    NO_ARTICLE_HTML,
+    MALFORMED_HTML,
+])
+def test_lxml_extraction_matches_beautifulsoup(html):
+    pytest.importorskip("lxml")
+    pytest.importorskip("bs4")
+    from scraping.extraction import extract_content
+
+    assert extract_content(html, engine='lxml') == extract_content(html, engine='bs4')
+
+
+def test_extraction_falls_back_to_og_description_and_survives_malformed_markup():
+    pytest.importorskip("lxml")
+    from scraping.extraction import extract_content
+
+    assert extract_content(NO_ARTICLE_HTML) == {'text_content': ["og 설명만 있는 게시물입니다"], 'image_count': 2}
+    assert extract_content(MALFORMED_HTML) == {
+        'text_content': ["닫히지 않은 span굵게문단이 열린 채", "따옴표없는대체텍스트입니다", "& 엔티티 <포함> 대체 텍스트"],
+        'image_count': 2,
+    }
+
+
+def test_page_archive_records_versions_and_replays_latest(tmp_path):
+    pytest.importorskip("lxml")
+    archive = PageArchive(tmp_path, compression='gzip')
+    html = (FIXTURES_DIR / "post.html").read_text(encoding="utf-8")
+
+    archive.record("https://www.instagram.com/p/C6abcDEFghi/", "<html>old version</html>", source='http')
+    archive.record("https://www.instagram.com/p/C6abcDEFghi/?img_index=2", html, source='http')
+    archive.record("https://www.instagram.com/reel/Reel123/", html, source='browser')
+
+    assert len(list(archive.pages(shortcode="C6abcDEFghi"))) == 2
+    assert list(archive.pages(shortcode="C6abcDEFghi", latest_only=True))[0].read() == html
+
+    results = {result['shortcode']: result for result in replay(archive, workers=1)}
+    assert set(results) == {"C6abcDEFghi", "Reel123"}
+    assert results["C6abcDEFghi"]['text'].startswith("제주도 바다에서 보낸 여유로운 오후")
+    assert len(results["C6abcDEFghi"]['media_urls']) == 4
+    assert results["Reel123"]['source'] == 'browser'
+    assert results["Reel123"]['image_count'] == 2
+
+
+def _load_legacy_scraper():
+    pytest.importorskip("selenium")
+    pytest.importorskip("requests")
+    import importlib.util
+
+    path = Path(__file__).parent.parent / "old" / "instagram_analyzer_wo_api" / "instagram_scraper.py"
+    spec = importlib.util.spec_from_file_location("legacy_instagram_scraper", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_legacy_scraper_extracts_image_and_video_slides():
+    legacy = _load_legacy_scraper()
+    scraper = legacy.InstagramScraper()
+
+    # 이미지 슬라이드 하나와 동영상 슬라이드 하나가 있는 캐러셀 (동영상 슬라이드에도 커버 이미지가 있음)
+    page_source = (
+        '{"carousel_media":['
+        '{"image_versions2":{"candidates":[{"width":1080,"url":"https:\\/\\/scontent.cdninstagram.com\\/a.jpg?x=1\\u0026y=2"},'
+        '{"width":320,"url":"https:\\/\\/scontent.cdninstagram.com\\/a_small.jpg"}]}},'
+        '{"image_versions2":{"candidates":[{"url":"https:\\/\\/scontent.cdninstagram.com\\/b_cover.jpg"}]},'
+        '"video_versions":[{"type":101,"url":"https:\\/\\/scontent.cdninstagram.com\\/b.mp4"},'
+        '{"type":102,"url":"https:\\/\\/scontent.cdninstagram.com\\/b_low.mp4"}]}],'
+        '"user":{"profile_pic_url":"https:\\/\\/scontent.cdninstagram.com\\/profile.jpg"},'
+        '"display_url":"https:\\/\\/scontent.cdninstagram.com\\/a_display.jpg",'
+        '"video_url":"https:\\/\\/scontent.cdninstagram.com\\/b_display.mp4"}'
+    )
+
+    assert scraper._extract_media_urls(page_source) == [
+        "https://scontent.cdninstagram.com/a.jpg?x=1&y=2",
+        "https://scontent.cdninstagram.com/b_cover.jpg",
+    ]
+    assert scraper._extract_video_urls(page_source) == ["https://scontent.cdninstagram.com/b.mp4"]
+    # 임베디드 후보 목록이 없으면 display_url/video_url 사용
+    assert scraper._extract_video_urls('"video_url":"https:\\/\\/scontent.cdninstagram.com\\/reel.mp4"') == [
+        "https://scontent.cdninstagram.com/reel.mp4"
+    ]
+
+
+def test_legacy_scraper_names_downloads_by_content_hash(tmp_path, monkeypatch):
+    import hashlib
+
+    legacy = _load_legacy_scraper()
+    monkeypatch.setattr(legacy, "DOWNLOAD_DIR", str(tmp_path))
+    bodies = {
+        "https://scontent.cdninstagram.com/a.jpg": (b"same image bytes", "image/jpeg"),
+        "https://scontent.cdninstagram.com/a_copy.jpg": (b"same image bytes", "image/jpeg"),
+        "https://scontent.cdninstagram.com/b.mp4": (b"video bytes", "application/octet-stream"),
+        "https://scontent.cdninstagram.com/missing.jpg": (None, "text/html"),
+    }
+
+    class FakeResponse:
+        def __init__(self, url):
+            self.body, content_type = bodies[url]
+            self.status_code = 200 if self.body is not None else 404
+            self.headers = {"Content-Type": content_type}
+
+        def iter_content(self, chunk_size):
+            yield self.body
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+    scraper = legacy.InstagramScraper()
+    scraper.session = type("Session", (), {"get": lambda self, url, **kwargs: FakeResponse(url)})()
+
+    paths = scraper._download_all(list(bodies))
+
+    image_name = f"media_{hashlib.sha256(b'same image bytes').hexdigest()[:16]}.jpg"
+    video_name = f"media_{hashlib.sha256(b'video bytes').hexdigest()[:16]}.mp4"
+    # 내용이 같은 미디어는 하나만 저장하고, Content-Type이 없으면 URL 확장자 사용
+    assert [Path(path).name for path in paths] == [image_name, video_name]
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([image_name, video_name])